@@ -0,0 +1,131 @@
+"""
+Evaluación en precisión arbitraria (decimal) de los modelos de nacimiento y
+muerte 1-4, para los casos mal condicionados en punto flotante: cerca de la
+saturación (1 - ρ → 0) en PICS/PICM y cuando M - L → 0 en PFCS/PFCM.
+
+Las entradas float se convierten a Decimal sin error, de modo que las
+diferencias kμ - λ y M - L se calculan con todos los dígitos.
+
+La suma en decimal es un ciclo de Python O(M) (o O(k)), por lo que solo se
+usa hasta ESTADOS_MAXIMOS estados; en los casos más grandes se conserva el
+cálculo en punto flotante (ver modelos).
+"""
+import math
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+# Dígitos significativos de la aritmética decimal
+DIGITOS = 60
+# Error relativo aceptado en el cálculo de punto flotante
+TOLERANCIA = 1e-9
+EPSILON = 2.0 ** -52
+# Número máximo de términos de la suma en decimal
+ESTADOS_MAXIMOS = 50000
+# Los pesos de población finita se reescalan al pasar de 10^REESCALA
+REESCALA = 100
+
+
+def estable(p):
+    """
+    Condición de estabilidad exacta (con racionales, sin redondeo): ρ < 1 en
+    PICS, M/G/1 y M/D/1, λ < kμ en PICM; los modelos de población o capacidad
+    finita siempre son estables.
+    """
+    if p.op in [1, 7, 8]:
+        return Fraction(p.lambda_) < Fraction(p.mu)
+    if p.op == 2:
+        return Fraction(p.lambda_) < p.k * Fraction(p.mu)
+    return True
+
+
+def mal_condicionado(p, L=None):
+    """
+    Si el error relativo esperado del cálculo en punto flotante supera
+    TOLERANCIA. En PICS/PICM el número de condición es 1 / (1 - ρ); en
+    PFCS/PFCM, M / (M - L), con L del cálculo en punto flotante.
+    """
+    if p.op in [1, 2]:
+        k = p.k if p.op == 2 else 1
+        holgura = float(1 - Fraction(p.lambda_) / (k * Fraction(p.mu)))
+        return holgura <= 0 or EPSILON / holgura > TOLERANCIA
+    if p.op in [3, 4] and p.lambda_ > 0:
+        libres = p.M - L
+        return libres <= 0 or EPSILON * p.M / libres > TOLERANCIA
+    return False
+
+
+def disponible(p):
+    """Si el cálculo en decimal de los parámetros p es razonablemente rápido"""
+    if p.op in [1, 2]:
+        return (p.k if p.op == 2 else 1) <= ESTADOS_MAXIMOS
+    return p.M + 1 <= ESTADOS_MAXIMOS
+
+
+def _poblacion_infinita(lambda_, mu, k):
+    """P0, P(espera), L, Lq y Wq de M/M/k con la suma de Erlang en decimal"""
+    a = lambda_ / mu
+    kmu_menos_lambda = k * mu - lambda_
+    holgura = kmu_menos_lambda / (k * mu)  # 1 - ρ
+    termino = Decimal(1)
+    suma = Decimal(0)
+    for n in range(k):
+        suma += termino
+        termino = termino * a / (n + 1)
+    # termino = a^k / k!
+    P0 = 1 / (suma + termino / holgura)
+    P_espera = termino / holgura * P0
+    Lq = P_espera * (1 - holgura) / holgura
+    return {
+        'P0': P0,
+        '_P_espera': P_espera,
+        'L': Lq + a,
+        'Lq': Lq,
+        'Wq': P_espera / kmu_menos_lambda,
+    }
+
+
+def _poblacion_finita(lambda_, mu, k, M):
+    """
+    P0, P(espera), PNE, L, Lq y Wq de M/M/k/M/M; M - L se suma término a
+    término. Los pesos crecen como M!/(M-n)! (λ/μ)^n, así que cuando pasan
+    de 10^REESCALA se dividen, junto con todas las sumas, por el peso actual
+    (solo importan los cocientes).
+    """
+    peso = Decimal(1)
+    P0 = Decimal(1)  # Peso del estado 0 en la escala actual
+    total = L = Lq = libres = no_espera = Decimal(0)
+    for n in range(M + 1):
+        total += peso
+        L += n * peso
+        Lq += max(n - k, 0) * peso
+        libres += (M - n) * peso
+        if n < k:
+            no_espera += peso
+        peso = peso * (M - n) * lambda_ / (min(n + 1, k) * mu)
+        if peso and peso.adjusted() > REESCALA:
+            P0, total, L, Lq, libres, no_espera = (
+                x / peso for x in (P0, total, L, Lq, libres, no_espera))
+            peso = Decimal(1)
+    L, Lq, libres, no_espera = L / total, Lq / total, libres / total, no_espera / total
+    return {
+        'P0': P0 / total,
+        '_P_espera': 1 - no_espera,
+        'PNE': no_espera,
+        'L': L,
+        'Lq': Lq,
+        'Wq': Lq / (libres * lambda_) if libres else Decimal('NaN'),
+    }
+
+
+def medidas(p):
+    """Medidas en precisión arbitraria de los modelos 1-4, convertidas a float"""
+    with localcontext() as contexto:
+        contexto.prec = DIGITOS
+        lambda_, mu = Decimal(p.lambda_), Decimal(p.mu)
+        if p.op in [1, 2]:
+            valores = _poblacion_infinita(lambda_, mu, p.k if p.op == 2 else 1)
+        elif p.op in [3, 4]:
+            valores = _poblacion_finita(lambda_, mu, p.k if p.op == 4 else 1, p.M)
+        else:
+            raise ValueError("La alta precisión solo está disponible para los modelos 1-4")
+        return {clave: float(valor) if valor.is_finite() else math.nan for clave, valor in valores.items()}
@@ -1,107 +1,288 @@
-from flask import Flask, render_template, request, jsonify
-from teoria_de_colas import QueueTheoryCalculator  # Asumo que guardaste la clase en este módulo
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+from decimal import DecimalException
+from functools import partial
+import json
+import logging
+import math
+import os
+import time
+
+import numpy as np
+
+from modelos import CLAVES_COSTOS, Costos, Parametros, evaluar_con_tiempos, nombre_calculo
+from lotes import calcular_lote
+from optimizacion import optimizar_servidores
+from sensibilidad import K_POR_DEFECTO, sensibilidad_costos
+from planificacion import planificar_personal
+from redes import resolver_red
+from barrido import barrido, calcular_barrido
+from distribucion import distribucion_completa
+from transitorio import transitorio
+from tablas_erlang import cargar_tablas
+from cache_resultados import CacheResultados, normalizar_valor
+from simulacion import DISTRIBUCIONES, simular
+from metricas import LogMuestreado, RegistroMetricas
+from ejecucion import ESTADOS_PESADO, ESTADOS_POR_PARTE, RECHAZOS, EjecutorAcotado, estados
 
 app = Flask(__name__)
 
+# Caché de resultados compartido por todos los hilos del proceso
+results_cache = CacheResultados(
+    max_entradas=int(os.environ.get('RESULT_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('RESULT_CACHE_TTL', 300))
+)
+
+# Métricas de latencia por etapa y modelo, expuestas en /metrics
+metrics = RegistroMetricas()
+metrics.describir('queue_stage_duration_seconds', 'Duración de cada etapa del cálculo por modelo')
+metrics.describir('queue_request_duration_seconds', 'Duración total de /calculate por modelo')
+metrics.describir('queue_requests_total', 'Peticiones a /calculate por modelo y resultado')
+
+# Registro estructurado muestreado; LOG_SAMPLE_RATE=0 lo desactiva
+sampled_log = LogMuestreado(
+    logging.getLogger('queue_app'),
+    tasa=float(os.environ.get('LOG_SAMPLE_RATE', 0.01))
+)
+
+# Los cálculos pesados se ejecutan en un grupo de procesos acotado, con tiempo
+# máximo por petición; con el grupo lleno se responde 503 (ver ejecucion.py)
+executor = EjecutorAcotado(
+    procesos=int(os.environ.get('HEAVY_WORKERS', 2)),
+    pendientes=int(os.environ.get('HEAVY_QUEUE', 8)),
+    tiempo_maximo=float(os.environ.get('REQUEST_TIMEOUT', 30)),
+    estados_maximos=int(os.environ.get('MAX_STATES', 50000000))
+)
+
+# Tablas de Erlang C / P0 precalculadas (python tablas_erlang.py); si no
+# existen, PICM se calcula directamente
+if cargar_tablas():
+    logging.getLogger('queue_app').info('Tablas de Erlang cargadas')
+
+# Mapeo de modelos a opciones numéricas
+model_mapping = {
+    'PICS': 1,
+    'PICM': 2,
+    'PFCS': 3,
+    'PFCM': 4,
+    'MM1K': 5,
+    'MMKK': 6,
+    'MG1': 7,
+    'MD1': 8
+}
+
+# Descripciones comunes de los parámetros
+param_descriptions = {
+    'lambda': 'Tasa de llegada (λ)',
+    'mu': 'Tasa de servicio (μ)',
+    'k': 'Número de servidores',
+    'M': 'Tamaño de la población',
+    'K': 'Capacidad del sistema (K)',
+    'sigma': 'Desviación estándar del tiempo de servicio (σ)',
+    'n_clients': 'Número de clientes para calcular P(n)',
+    'cost_wait': 'Costo unitario por tiempo de espera',
+    'cost_server': 'Costo diario por servidor',
+    'hours': 'Horas laborables'
+}
+
+# Parámetros necesarios para cada modelo; la interfaz construye la lista de
+# modelos a partir de este diccionario (ver /get_models)
+params_config = {
+    'PICS': {  # M/M/1
+        'label': 'M/M/1 (PICS - Población Infinita Canal Simple)',
+        'description': 'Sistema con población infinita y un solo servidor (M/M/1)',
+        'required': ['lambda', 'mu'],
+        'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours']
+    },
+    'PICM': {  # M/M/k
+        'label': 'M/M/k (PICM - Población Infinita Canal Múltiple)',
+        'description': 'Sistema con población infinita y múltiples servidores (M/M/k)',
+        'required': ['lambda', 'mu', 'k'],
+        'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours']
+    },
+    'PFCS': {  # M/M/1/M/M
+        'label': 'M/M/1/M/M (PFCS - Población Finita Canal Simple)',
+        'description': 'Sistema con población finita y un solo servidor (M/M/1/M/M)',
+        'required': ['lambda', 'mu', 'M'],
+        'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours']
+    },
+    'PFCM': {  # M/M/k/M/M
+        'label': 'M/M/k/M/M (PFCM - Población Finita Canal Múltiple)',
+        'description': 'Sistema con población finita y múltiples servidores (M/M/k/M/M)',
+        'required': ['lambda', 'mu', 'k', 'M'],
+        'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours']
+    },
+    'MM1K': {  # M/M/1/K
+        'label': 'M/M/1/K (Canal Simple con Capacidad Finita)',
+        'description': 'Sistema con un solo servidor y capacidad para K clientes; las llegadas con el sistema lleno se pierden (M/M/1/K)',
+        'required': ['lambda', 'mu', 'K'],
+        'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours']
+    },
+    'MMKK': {  # M/M/k/K
+        'label': 'M/M/k/K (Canal Múltiple con Capacidad Finita)',
+        'description': 'Sistema con k servidores y capacidad para K clientes; las llegadas con el sistema lleno se pierden (M/M/k/K)',
+        'required': ['lambda', 'mu', 'k', 'K'],
+        'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours']
+    },
+    'MG1': {  # M/G/1
+        'label': 'M/G/1 (Servicio General, Pollaczek-Khinchine)',
+        'description': 'Sistema con un solo servidor y tiempo de servicio con cualquier distribución de media 1/μ y desviación estándar σ (M/G/1)',
+        'required': ['lambda', 'mu', 'sigma'],
+        'optional': ['cost_wait', 'cost_server', 'hours']
+    },
+    'MD1': {  # M/D/1
+        'label': 'M/D/1 (Servicio Constante)',
+        'description': 'Sistema con un solo servidor y tiempo de servicio constante 1/μ (M/D/1)',
+        'required': ['lambda', 'mu'],
+        'optional': ['cost_wait', 'cost_server', 'hours']
+    }
+}
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/get_models', methods=['GET'])
+def get_models():
+    """Lista de modelos disponibles (en orden) para construir el selector de la interfaz"""
+    return jsonify({
+        'models': [
+            {'value': model, 'label': config['label'], 'description': config['description']}
+            for model, config in params_config.items()
+        ]
+    })
+
 @app.route('/get_params', methods=['POST'])
 def get_params():
     data = request.get_json()
     model = data.get('model')
-    print(f"Modelo recibido: {model}")
-    
-    # Definir los parámetros necesarios para cada modelo
-    params_config = {
-        'PICS': {  # M/M/1
-            'required': ['lambda', 'mu'],
-            'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours'],
-            'descriptions': {
-                'lambda': 'Tasa de llegada (λ)',
-                'mu': 'Tasa de servicio (μ)',
-                'n_clients': 'Número de clientes para calcular P(n)',
-                'cost_wait': 'Costo unitario por tiempo de espera',
-                'cost_server': 'Costo diario por servidor',
-                'hours': 'Horas laborables'
-            }
-        },
-        'PICM': {  # M/M/k
-            'required': ['lambda', 'mu', 'k'],
-            'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours'],
-            'descriptions': {
-                'lambda': 'Tasa de llegada (λ)',
-                'mu': 'Tasa de servicio (μ)',
-                'k': 'Número de servidores',
-                'n_clients': 'Número de clientes para calcular P(n)',
-                'cost_wait': 'Costo unitario por tiempo de espera',
-                'cost_server': 'Costo diario por servidor',
-                'hours': 'Horas laborables'
-            }
-        },
-        'PFCS': {  # M/M/1/M/M
-            'required': ['lambda', 'mu', 'M'],
-            'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours'],
-            'descriptions': {
-                'lambda': 'Tasa de llegada (λ)',
-                'mu': 'Tasa de servicio (μ)',
-                'M': 'Tamaño de la población',
-                'n_clients': 'Número de clientes para calcular P(n)',
-                'cost_wait': 'Costo unitario por tiempo de espera',
-                'cost_server': 'Costo diario por servidor',
-                'hours': 'Horas laborables'
-            }
-        },
-        'PFCM': {  # M/M/k/M/M
-            'required': ['lambda', 'mu', 'k', 'M'],
-            'optional': ['n_clients', 'cost_wait', 'cost_server', 'hours'],
-            'descriptions': {
-                'lambda': 'Tasa de llegada (λ)',
-                'mu': 'Tasa de servicio (μ)',
-                'k': 'Número de servidores',
-                'M': 'Tamaño de la población',
-                'n_clients': 'Número de clientes para calcular P(n)',
-                'cost_wait': 'Costo unitario por tiempo de espera',
-                'cost_server': 'Costo diario por servidor',
-                'hours': 'Horas laborables'
-            }
-        }
-    }
+
+    cache_key = ('get_params', model)
+    cached = results_cache.obtener(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+    sampled_log.registrar('get_params', model=model)
     
     if model not in params_config:
         return jsonify({'error': 'Modelo no válido'})
     
     config = params_config[model]
-    return jsonify({
+    response = {
         'required_params': config['required'],
-        'descriptions': {k: v for k, v in config['descriptions'].items() if k in config['required']},
+        'descriptions': {k: param_descriptions[k] for k in config['required']},
         'optional_params': config['optional'],
-        'optional_descriptions': {k: v for k, v in config['descriptions'].items() if k in config['optional']}
-    })
+        'optional_descriptions': {k: param_descriptions[k] for k in config['optional']}
+    }
+    results_cache.guardar(cache_key, response)
+    return jsonify(response)
 
 
+def _parse_fields(fields):
+    """Lista de campos pedidos ('Wq,P0' o ['Wq', 'P0']); None si no se indicaron"""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    return [field.strip() for field in fields if field.strip()]
+
+def _observe_stage(model, stage, seconds):
+    """Registra la duración de una etapa del cálculo"""
+    metrics.observar('queue_stage_duration_seconds', seconds, model=model, stage=stage)
+
+def _observe_timings(model, timings):
+    """
+    Registra la duración de cada cálculo de la evaluación ('calcular_Wq',
+    'calcular_cadena', ...); los costos se suman en la etapa 'costs'
+    """
+    costs = 0.0
+    for name, seconds in timings.items():
+        if name in CLAVES_COSTOS or name in ('_costos', '_llegadas'):
+            costs += seconds
+        else:
+            _observe_stage(model, nombre_calculo(name), seconds)
+    if costs:
+        _observe_stage(model, 'costs', costs)
+
+def _chains_states(op, chains, k_max=1, M=0, K=0):
+    """
+    Tamaño de un cálculo que resuelve 'chains' cadenas del modelo; en PICM
+    la recurrencia de Erlang avanza k en O(1)
+    """
+    if op == 2:
+        return chains + k_max
+    return chains * estados(op, k_max, M, K)
+
+def _batch_states(op, data):
+    """Tamaño de /calculate_batch: escenarios por estados del escenario más grande"""
+    values = [np.asarray(data.get(name, default)) for name, default in [('lambda', 0), ('mu', 0), ('k', 1), ('M', 0)]]
+    count = np.broadcast(*values).size
+    return count * estados(op, int(np.max(values[2])), int(np.max(values[3])))
+
+def _sweep_size(op, data):
+    """Tamaño de /sweep: puntos de la rejilla y estados del punto más grande"""
+    points = 1
+    largest = {name: int(float(data.get(name) or 0)) for name in ['k', 'M']}
+    for rango in data.get('ranges', []):
+        points *= max(1, int(rango.get('steps', 2)))
+        if rango.get('param') in largest:
+            largest[rango['param']] = max(largest[rango['param']], int(float(rango.get('start', 0))),
+                                          int(float(rango.get('stop', 0))))
+    return points, estados(op, largest['k'] or 1, largest['M'])
+
+def _sweep_parts(op, arguments, points, point_states):
+    """Filas de un barrido pesado, calculadas en el grupo de procesos por partes"""
+    part = max(1, ESTADOS_POR_PARTE // point_states)
+    for start in range(0, points, part):
+        yield from executor.ejecutar(calcular_barrido, op, desde=start, hasta=start + part,
+                                     estados=min(part, points - start) * point_states, **arguments)
+
+def _staffing_states(rates, mu, k_max):
+    """
+    Tamaño de /staffing: cada intervalo evalúa Erlang B en O(√a) y mueve k
+    desde el intervalo anterior, en O(|Δa|) pasos aproximadamente
+    """
+    loads = [min(rate / mu, k_max) if mu > 0 else 0 for rate in rates]
+    size = sum(math.isqrt(int(load)) + 1 for load in loads)
+    return size + sum(abs(b - a) for a, b in zip([0] + loads, loads))
+
+def _network_states(nodes, routes):
+    """Tamaño de /network: nodos más ternas de enrutamiento (el sistema es disperso)"""
+    return nodes + routes
+
+def _rejected(error):
+    """Respuesta 503 para los cálculos rechazados por sobrecarga, por tiempo o por un proceso caído"""
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+def _observe_request(model, status, started):
+    """Registra la duración total y el resultado de una petición a /calculate"""
+    metrics.observar('queue_request_duration_seconds', time.perf_counter() - started, model=model)
+    metrics.incrementar('queue_requests_total', model=model, status=status)
+
 @app.route('/calculate', methods=['POST'])
 def calculate():
+    started = time.perf_counter()
+    model_label = 'unknown'
     try:
         
         data = request.get_json()
         model = data.get('model')
-        print(f"Modelo recibido para cálculo: {model}")
         
         if not model:
             return jsonify({'error': 'No se ha seleccionado ningún modelo'})
+        model_label = model if model in model_mapping else 'unknown'
         
-        # Mapeo de modelos a opciones numéricas
-        model_mapping = {
-            'PICS': 1,
-            'PICM': 2,
-            'PFCS': 3,
-            'PFCM': 4
-        }
-        
-        # Crear instancia del calculador
-        calculator = QueueTheoryCalculator()
+        # Clave normalizada: modelo, parámetros redondeados y datos de costos
+        cache_key = ('calculate', model) + tuple(
+            normalizar_valor(data.get(name, default)) for name, default in [
+                ('lambda', 0), ('mu', 0), ('k', 1), ('M', None), ('K', None), ('sigma', 0),
+                ('n_clients', None), ('cost_wait', 0), ('cost_server', 0), ('hours', 8)
+            ]
+        ) + (tuple(_parse_fields(data.get('fields')) or ()),)
+        cached = results_cache.obtener(cache_key)
+        if cached is not None:
+            _observe_request(model_label, 'cache_hit', started)
+            return jsonify(cached)
         
         # Configurar parámetros básicos
         
@@ -109,39 +290,34 @@ def calculate():
         mu = float(data.get('mu', 0))
         k = int(data.get('k', 1))
         M = int(data.get('M', 0)) if data.get('M') else None
+        K = int(data.get('K')) if data.get('K') else 0
+        sigma = float(data.get('sigma', 0))
         n_clients = int(data.get('n_clients')) if data.get('n_clients') else None
-        
-        # Configurar el modelo y parámetros
-        calculator.set_parameters(
-            lambda_=lambda_val, 
-            mu=mu, 
-            k=k, 
-            M=M, 
-            op=model_mapping[model]
-        )
-        
-        # Realizar cálculos básicos
-        results = calculator.calculate(n=n_clients)
-        
-        # Calcular costos si se proporcionaron los datos
         cost_wait = float(data.get('cost_wait', 0))
         cost_server = float(data.get('cost_server', 0))
         hours = float(data.get('hours', 8))
+        fields = _parse_fields(data.get('fields'))
+        _observe_stage(model_label, 'parse', time.perf_counter() - started)
+        
+        # Registros inmutables: la evaluación no comparte estado entre hilos
+        with metrics.cronometro('queue_stage_duration_seconds', model=model_label, stage='set_parameters'):
+            params = Parametros(model_mapping[model], lambda_val, mu, k, M or 0, K, sigma)
+            costs = Costos(cost_wait, cost_server, hours) if cost_wait > 0 or cost_server > 0 else None
+            if fields and costs is None and any(field in CLAVES_COSTOS for field in fields):
+                costs = Costos(cost_wait, cost_server, hours)
+        
+        # Realizar cálculos (y costos si se proporcionaron los datos); con 'fields'
+        # solo se evalúan las medidas pedidas y sus dependencias
+        with metrics.cronometro('queue_stage_duration_seconds', model=model_label, stage='evaluate'):
+            try:
+                evaluated, timings = executor.ejecutar(evaluar_con_tiempos, params, n_clients, costs, fields,
+                                                       estados=estados(params.op, k, M, K))
+                results = evaluated.como_dict()
+            except (ValueError, ZeroDivisionError, OverflowError, DecimalException) as e:
+                raise ValueError(f"Error en los cálculos: {str(e)}")
+        _observe_timings(model_label, timings)
         
-        if cost_wait > 0 or cost_server > 0:
-            calculator.set_cost_parameters(
-                costo_unitario=cost_wait,
-                costo_diario=cost_server,
-                horas_laborables=hours
-            )
-            costs = {
-                'CTte': calculator.calcular_CTte(),
-                'CTts': calculator.calcular_CTts(),
-                'CTse': calculator.calcular_CTse(),
-                'CTs': calculator.calcular_CTs(),
-                'CT': calculator.calcular_CT()
-            }
-            results.update(costs)
+        serialize_started = time.perf_counter()
         
         # Preparar descripciones para los resultados
         descriptions = {
@@ -149,6 +325,8 @@ def calculate():
             'P0': 'Probabilidad de sistema vacío',
             'PE': 'Probabilidad de sistema ocupado',
             'PNE': 'Probabilidad de que no todos los servidores estén ocupados',
+            'PB': 'Probabilidad de bloqueo (sistema lleno)',
+            'lambda_ef': 'Tasa efectiva de llegada (λ efectiva)',
             'Pk': 'Probabilidad de k clientes en el sistema',
             'L': 'Número promedio de clientes en el sistema (L)',
             'Lq': 'Número promedio de clientes en la cola (Lq)',
@@ -169,21 +347,470 @@ def calculate():
         # Formatear resultados para evitar números muy largos
         formatted_results = {}
         for key, value in results.items():
-            # Redondear a 6 decimales y eliminar ceros innecesarios
+            # Redondear a 6 decimales y eliminar ceros innecesarios; NaN/inf como null
+            if not math.isfinite(value):
+                formatted_results[key] = None
+                continue
             formatted_value = round(value, 6)
             if formatted_value == int(formatted_value):
                 formatted_value = int(formatted_value)
             formatted_results[key] = formatted_value
-        print(f"Resultados calculados: {formatted_results}")
-        return jsonify({
+        response = {
             'results': formatted_results,
-            'descriptions': descriptions
-        })
+            'descriptions': descriptions,
+            # 'alta_precision' cuando el caso estaba mal condicionado en punto
+            # flotante ('float_mal_condicionado' si era demasiado grande para
+            # recalcularlo); 'tabla' si se interpoló en las tablas de Erlang
+            'metodo': evaluated.metodo
+        }
+        if evaluated.cotas:
+            # Cotas de error absoluto de los valores interpolados
+            response['cotas'] = evaluated.cotas
+        results_cache.guardar(cache_key, response)
+        json_response = jsonify(response)
+        _observe_stage(model_label, 'serialize', time.perf_counter() - serialize_started)
+        
+        sampled_log.registrar('calculate', model=model, results=formatted_results,
+                              duration_ms=round((time.perf_counter() - started) * 1000, 3))
+        _observe_request(model_label, 'ok', started)
+        return json_response
     
+    except RECHAZOS as e:
+        _observe_request(model_label, 'rejected', started)
+        return _rejected(e)
     except ValueError as ve:
+        _observe_request(model_label, 'error', started)
         return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
     except Exception as e:
+        _observe_request(model_label, 'error', started)
         return jsonify({'error': f"Error inesperado: {str(e)}"})
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Expone las métricas en formato de texto de Prometheus"""
+    stats = results_cache.estadisticas()
+    extras = {
+        'queue_cache_hits_total': ('counter', stats['hits']),
+        'queue_cache_misses_total': ('counter', stats['misses']),
+        'queue_cache_evictions_total': ('counter', stats['evictions']),
+        'queue_cache_expirations_total': ('counter', stats['expirations']),
+        'queue_cache_size': ('gauge', stats['size']),
+    }
+    return Response(metrics.exponer(extras), mimetype='text/plain; version=0.0.4')
+
+@app.route('/simulate', methods=['POST'])
+def simulate():
+    """Simula el modelo con réplicas independientes repartidas entre 'workers' procesos"""
+    try:
+        data = request.get_json()
+        model = data.get('model')
+
+        if model not in model_mapping:
+            return jsonify({'error': 'Modelo no válido'})
+
+        # Distribuciones opcionales: {'type': 'erlang', 'params': [2, 1.5]}
+        distributions = {}
+        for key in ['arrival_dist', 'service_dist']:
+            spec = data.get(key)
+            if spec:
+                if spec.get('type') not in DISTRIBUCIONES:
+                    return jsonify({'error': f"Distribución no válida: {spec.get('type')}"})
+                distributions[key] = DISTRIBUCIONES[spec['type']](*[float(p) for p in spec.get('params', [])])
+
+        customers = int(data.get('customers', 100000))
+        replicas = int(data.get('replicas', 10))
+        workers = int(data['workers']) if data.get('workers') is not None else 1
+        if workers < 1:
+            raise ValueError("El número de procesos debe ser al menos 1")
+        # Las réplicas se reparten en el grupo de procesos compartido, una
+        # tarea por proceso; el tamaño es el número de clientes simulados
+        result = simular(
+            model_mapping[model],
+            lambda_=float(data.get('lambda', 0)),
+            mu=float(data.get('mu', 0)),
+            k=int(data.get('k', 1)),
+            M=int(data.get('M')) if data.get('M') else None,
+            llegadas=distributions.get('arrival_dist'),
+            servicio=distributions.get('service_dist'),
+            clientes=customers,
+            replicas=replicas,
+            semilla=int(data['seed']) if data.get('seed') is not None else None,
+            n=int(data.get('n_clients')) if data.get('n_clients') is not None else None,
+            workers=min(workers, executor.procesos),
+            ejecutar_lotes=partial(executor.ejecutar_varios, estados=customers * replicas)
+        )
+        return jsonify(result)
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Devuelve los contadores del caché de resultados"""
+    return jsonify(results_cache.estadisticas())
+
+@app.route('/calculate_batch', methods=['POST'])
+def calculate_batch():
+    """Calcula muchos escenarios de un mismo modelo en una sola pasada vectorizada"""
+    try:
+        data = request.get_json()
+        model = data.get('model')
+
+        if model not in model_mapping:
+            return jsonify({'error': 'Modelo no válido'})
+
+        cost_wait = data.get('cost_wait')
+        cost_server = data.get('cost_server')
+        results = executor.ejecutar(
+            calcular_lote,
+            model_mapping[model],
+            lambda_=data.get('lambda', 0),
+            mu=data.get('mu', 0),
+            k=data.get('k', 1),
+            M=data.get('M', 0),
+            n=int(data.get('n_clients')) if data.get('n_clients') is not None else None,
+            costo_unitario=cost_wait,
+            costo_diario=cost_server,
+            horas_laborables=data.get('hours', 8),
+            estados=_batch_states(model_mapping[model], data)
+        )
+
+        # Resultados en formato columnar; los escenarios inválidos se devuelven como null
+        columns = {}
+        for key, values in results.items():
+            columns[key] = [None if not math.isfinite(v) else round(v, 6) for v in values.ravel().tolist()]
+        count = len(next(iter(columns.values()))) if columns else 0
+        return jsonify({'results': columns, 'count': count})
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+@app.route('/distribution', methods=['POST'])
+def distribution():
+    """Distribución P0..PN con su CDF, P(Wq > t) y percentiles del tiempo de espera"""
+    try:
+        data = request.get_json()
+        model = data.get('model')
+
+        if model not in model_mapping:
+            return jsonify({'error': 'Modelo no válido'})
+
+        times = [float(t) for t in data.get('times', [])]
+        percentiles = [float(q) for q in data.get('percentiles', [])]
+        cache_key = ('distribution', model) + tuple(
+            normalizar_valor(data.get(name, default)) for name, default in [
+                ('lambda', 0), ('mu', 0), ('k', 1), ('M', None), ('K', None), ('N', None)
+            ]
+        ) + (tuple(normalizar_valor(t) for t in times), tuple(normalizar_valor(q) for q in percentiles))
+        cached = results_cache.obtener(cache_key)
+        if cached is not None:
+            return jsonify(cached)
+
+        k = int(data.get('k', 1))
+        M = int(data.get('M')) if data.get('M') else 0
+        K = int(data.get('K')) if data.get('K') else 0
+        N = int(data.get('N')) if data.get('N') is not None else None
+        result = executor.ejecutar(
+            distribucion_completa,
+            model_mapping[model],
+            lambda_=float(data.get('lambda', 0)),
+            mu=float(data.get('mu', 0)),
+            k=k,
+            M=M,
+            N=N,
+            tiempos=times,
+            percentiles=percentiles,
+            K=K,
+            estados=max(estados(model_mapping[model], k, M, K), N or 0)
+        )
+        response = {'results': result}
+        results_cache.guardar(cache_key, response)
+        return jsonify(response)
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+@app.route('/transient', methods=['POST'])
+def transient():
+    """L(t), Lq(t), Wq(t) y P0(t) durante la jornada, partiendo del sistema vacío"""
+    try:
+        data = request.get_json()
+        model = data.get('model')
+
+        if model not in model_mapping:
+            return jsonify({'error': 'Modelo no válido'})
+
+        cost_wait = data.get('cost_wait')
+        cost_server = data.get('cost_server')
+        k = int(data.get('k', 1))
+        M = int(data.get('M')) if data.get('M') else 0
+        K = int(data.get('K')) if data.get('K') else 0
+        # El análisis transitorio siempre se considera pesado
+        result = executor.ejecutar(
+            transitorio,
+            model_mapping[model],
+            lambda_=float(data.get('lambda', 0)),
+            mu=float(data.get('mu', 0)),
+            k=k,
+            M=M,
+            K=K,
+            horas=float(data.get('hours', 8)),
+            puntos=int(data.get('points', 97)),
+            n0=int(data.get('n0', 0)),
+            incluir_estados=bool(data.get('states', False)),
+            costo_unitario=float(cost_wait) if cost_wait is not None else None,
+            costo_diario=float(cost_server) if cost_server is not None else None,
+            estados=max(ESTADOS_PESADO, estados(model_mapping[model], k, M, K))
+        )
+        return jsonify({'results': result})
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+@app.route('/optimize', methods=['POST'])
+def optimize():
+    """Busca el número de servidores de costo mínimo o el menor que cumple las metas"""
+    try:
+        data = request.get_json()
+        model = data.get('model')
+
+        if model not in ['PICM', 'PFCM']:
+            return jsonify({'error': 'La optimización solo está disponible para PICM y PFCM'})
+
+        target_wq = data.get('target_Wq')
+        target_wait = data.get('target_P_wait')
+        op = model_mapping[model]
+        M = int(data.get('M')) if data.get('M') else None
+        lambda_val = float(data.get('lambda', 0))
+        mu = float(data.get('mu', 0))
+        k_max = int(data.get('k_max', 10000))
+        if op == 2 and mu > 0 and lambda_val >= 0:
+            first_k = math.floor(lambda_val / mu) + 1
+            if first_k > k_max:
+                return jsonify({'error': f"Se necesitan más de {k_max} servidores para que el sistema sea estable"}), 422
+            # B(first_k) se evalúa en O(√a) y cada k siguiente en O(1)
+            size = k_max - first_k + 1 + math.isqrt(first_k)
+        else:
+            size = _chains_states(op, min(k_max, M or 0), k_max, M or 0)
+        # Es el peor caso: la búsqueda suele detenerse mucho antes, así que no se
+        # rechaza por presupuesto; los cálculos pesados los acota el tiempo máximo
+        result = executor.ejecutar(
+            optimizar_servidores,
+            lambda_=lambda_val,
+            mu=mu,
+            op=op,
+            M=M,
+            costo_unitario=float(data.get('cost_wait', 0)),
+            costo_diario=float(data.get('cost_server', 0)),
+            horas_laborables=float(data.get('hours', 8)),
+            Wq_max=float(target_wq) if target_wq is not None else None,
+            P_espera_max=float(target_wait) if target_wait is not None else None,
+            k_max=k_max,
+            estados=min(size, executor.estados_maximos)
+        )
+        return jsonify({'results': result})
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+@app.route('/cost_sensitivity', methods=['POST'])
+def cost_sensitivity():
+    """Costo total sobre una rejilla de costos y k, con el k óptimo de cada celda de costos"""
+    try:
+        data = request.get_json()
+        model = data.get('model')
+
+        if model not in ['PICM', 'PFCM', 'MMKK']:
+            return jsonify({'error': 'El análisis de sensibilidad solo está disponible para PICM, PFCM y MMKK'})
+
+        op = model_mapping[model]
+        lambda_val = float(data.get('lambda', 0))
+        mu = float(data.get('mu', 0))
+        k_min = int(data['k_min']) if data.get('k_min') is not None else None
+        k_max = int(data['k_max']) if data.get('k_max') is not None else None
+        M = int(data.get('M')) if data.get('M') else 0
+        K = int(data.get('K')) if data.get('K') else 0
+        # Una cadena por k (ver sensibilidad.sensibilidad_costos para los valores por defecto)
+        first_k = k_min if k_min is not None else (math.floor(lambda_val / mu) + 1 if op == 2 and mu > 0 else 1)
+        last_k = k_max if k_max is not None else first_k + K_POR_DEFECTO - 1
+        result = executor.ejecutar(
+            sensibilidad_costos,
+            op,
+            lambda_=lambda_val,
+            mu=mu,
+            costos_espera=[float(c) for c in data.get('cost_wait', [])],
+            costos_servidor=[float(c) for c in data.get('cost_server', [])],
+            horas=[float(h) for h in data.get('hours', [8])],
+            M=M,
+            K=K,
+            k_min=k_min,
+            k_max=k_max,
+            incluir_costos=bool(data.get('include_costs', False)),
+            estados=_chains_states(op, max(1, last_k - first_k + 1), last_k, M, K)
+        )
+        return jsonify({'results': result})
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+@app.route('/staffing', methods=['POST'])
+def staffing():
+    """Plan de servidores por intervalos para un perfil de tasas de llegada (M/M/k por intervalo)"""
+    try:
+        data = request.get_json()
+
+        def optional(name):
+            value = data.get(name)
+            return float(value) if value is not None else None
+
+        rates = [float(rate) for rate in data.get('lambdas', [])]
+        mu = float(data.get('mu', 0))
+        k_max = int(data.get('k_max', 100000))
+        result = executor.ejecutar(
+            planificar_personal,
+            rates,
+            mu=mu,
+            duracion=float(data.get('interval_hours', 0.25)),
+            costo_unitario=float(data.get('cost_wait', 0)),
+            costo_diario=float(data.get('cost_server', 0)),
+            horas_laborables=float(data.get('hours', 8)),
+            Wq_max=optional('target_Wq'),
+            P_espera_max=optional('target_P_wait'),
+            tiempo_servicio=optional('service_time'),
+            nivel_servicio=optional('service_level'),
+            k_max=k_max,
+            estados=int(_staffing_states(rates, mu, k_max))
+        )
+        return jsonify({'results': result})
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+@app.route('/network', methods=['POST'])
+def network():
+    """Red de Jackson abierta: medidas por nodo y de toda la red"""
+    try:
+        data = request.get_json()
+
+        # El enrutamiento puede venir como matriz densa ('routing') o como
+        # ternas [origen, destino, probabilidad] ('routing_sparse')
+        routing = data.get('routing_sparse', [])
+        if data.get('routing') is not None:
+            routing = [(i, j, p) for i, row in enumerate(data['routing']) for j, p in enumerate(row) if p]
+
+        cost_wait = data.get('cost_wait')
+        cost_server = data.get('cost_server')
+        external = [float(rate) for rate in data.get('external_lambda', [])]
+        result = executor.ejecutar(
+            resolver_red,
+            external,
+            mu=data.get('mu', 0),
+            k=data.get('k', 1),
+            enrutamiento=routing,
+            costo_unitario=float(cost_wait) if cost_wait is not None else None,
+            costo_diario=float(cost_server) if cost_server is not None else None,
+            horas_laborables=float(data.get('hours', 8)),
+            estados=_network_states(len(external), len(routing))
+        )
+        return jsonify({'results': result})
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+@app.route('/sweep', methods=['POST'])
+def sweep():
+    """Barre uno o dos parámetros y devuelve los resultados como NDJSON en streaming"""
+    try:
+        data = request.get_json()
+        model = data.get('model')
+
+        if model not in model_mapping:
+            return jsonify({'error': 'Modelo no válido'})
+
+        cost_wait = data.get('cost_wait')
+        cost_server = data.get('cost_server')
+        arguments = dict(
+            parametros={key: data[key] for key in ['lambda', 'mu', 'k', 'M'] if data.get(key) is not None},
+            rangos=data.get('ranges', []),
+            n=int(data.get('n_clients')) if data.get('n_clients') is not None else None,
+            costo_unitario=float(cost_wait) if cost_wait is not None else None,
+            costo_diario=float(cost_server) if cost_server is not None else None,
+            horas_laborables=float(data.get('hours', 8))
+        )
+        points, point_states = _sweep_size(model_mapping[model], data)
+        executor.verificar_presupuesto(points * point_states)
+        if executor.pesado(point_states):
+            # Si cada punto resuelve una cadena grande, el barrido se calcula en el
+            # grupo de procesos por partes y cada parte se envía al terminar;
+            # si no, las filas se generan mientras se envían
+            rows = _sweep_parts(model_mapping[model], arguments, points, point_states)
+        else:
+            rows = barrido(model_mapping[model], **arguments)
+        # Validar los rangos antes de empezar a enviar la respuesta
+        first = next(rows, None)
+
+    except RECHAZOS as e:
+        return _rejected(e)
+    except ValueError as ve:
+        return jsonify({'error': f"Error en los valores proporcionados: {str(ve)}"})
+    except Exception as e:
+        return jsonify({'error': f"Error inesperado: {str(e)}"})
+
+    def generate():
+        if first is None:
+            return
+        yield json.dumps(_format_row(first)) + '\n'
+        try:
+            for row in rows:
+                yield json.dumps(_format_row(row)) + '\n'
+        except RECHAZOS as e:
+            # La respuesta ya empezó: el rechazo de una parte se envía como última fila
+            yield json.dumps({'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def _format_row(row):
+    """Redondea los valores numéricos de una fila del barrido y reemplaza NaN/inf por null"""
+    formatted = {}
+    for key, value in row.items():
+        if isinstance(value, float):
+            value = round(value, 6) if math.isfinite(value) else None
+        formatted[key] = value
+    return formatted
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Servidor de desarrollo; en producción usar gunicorn (ver gunicorn.conf.py)
+    app.run(debug=os.environ.get('FLASK_DEBUG', '0') == '1')
\ No newline at end of file
@@ -0,0 +1,164 @@
+import itertools
+import math
+
+from teoria_de_colas import QueueTheoryCalculator
+
+# Parámetros que se pueden barrer
+PARAMETROS_BARRIBLES = ['lambda', 'mu', 'k', 'M']
+PARAMETROS_ENTEROS = ['k', 'M']
+
+
+def valores_rango(rango):
+    """
+    Genera los valores de un rango {'param', 'start', 'stop', 'steps'} sin
+    materializarlos en memoria. Los extremos se incluyen; k y M se redondean.
+    """
+    inicio = float(rango['start'])
+    fin = float(rango['stop'])
+    pasos = int(rango.get('steps', 2))
+    if pasos < 1:
+        raise ValueError("El número de pasos debe ser al menos 1")
+
+    entero = rango['param'] in PARAMETROS_ENTEROS
+    for i in range(pasos):
+        valor = inicio if pasos == 1 else inicio + (fin - inicio) * i / (pasos - 1)
+        yield int(round(valor)) if entero else valor
+
+
+class _EstadoErlang:
+    """
+    Estado de la recurrencia de Erlang para una carga a = λ/μ fija.
+    Permite avanzar de k a k+1 en O(1) cuando el barrido recorre k en orden.
+    """
+
+    def __init__(self, a):
+        self.a = a
+        self.k = 0
+        self.B = 1.0       # Erlang B(k, a)
+        self.log_T = 0.0   # log(a^k / k!)
+        self.log_S = 0.0   # log(sum_{n=0}^{k} a^n / n!)
+
+    def avanzar(self, k):
+        """Avanza la recurrencia hasta k servidores"""
+        while self.k < k:
+            self.k += 1
+            self.B = self.a * self.B / (self.k + self.a * self.B)
+            self.log_T += math.log(self.a / self.k)
+            mayor = max(self.log_S, self.log_T)
+            self.log_S = mayor + math.log(math.exp(self.log_S - mayor) + math.exp(self.log_T - mayor))
+
+
+def _resultados_picm(estado, lambda_, mu, k, n=None):
+    """Mismas claves que QueueTheoryCalculator.calculate() para PICM, a partir del estado de Erlang"""
+    a = estado.a
+    if lambda_ >= k * mu:
+        raise ValueError("El sistema no es estable. La tasa de llegada debe ser menor que k por la tasa de servicio.")
+    estado.avanzar(k)
+    B = estado.B
+    C = k * B / (k - a * (1 - B))
+    # P0 = 1 / (S_k + a^k/k! * a / (k - a)) = (1 / S_k) / (1 + B * a / (k - a))
+    P0 = math.exp(-estado.log_S) / (1 + B * a / (k - a))
+    Wq = C / (k * mu - lambda_)
+    Lq = lambda_ * Wq
+
+    resultados = {'ro': lambda_ / (k * mu), 'P0': P0}
+    if n is not None:
+        if n <= k:
+            log_pn = n * math.log(a) - math.lgamma(n + 1)
+        else:
+            log_pn = n * math.log(a) - math.lgamma(k + 1) - (n - k) * math.log(k)
+        resultados[f'P{n}'] = P0 * math.exp(log_pn)
+    resultados.update({
+        'Pk': C,
+        'L': Lq + a,
+        'Lq': Lq,
+        'Ln': Lq / C,
+        'W': Wq + 1 / mu,
+        'Wq': Wq,
+        'Wn': Wq / C,
+    })
+    return resultados
+
+
+def barrido(op, parametros, rangos, n=None, costo_unitario=None, costo_diario=None,
+            horas_laborables=8, desde=0, hasta=None):
+    """
+    Recorre una rejilla de uno o dos parámetros y genera una fila de resultados
+    por punto, sin construir la rejilla completa en memoria.
+
+    El último rango es el más interno. Entre puntos consecutivos se reutiliza la
+    misma calculadora y, cuando el modelo es PICM y el parámetro interno es k,
+    el estado de la recurrencia de Erlang, de modo que cada paso de k cuesta O(1).
+
+    Args:
+        op (int): Modelo (1: PICS, 2: PICM, 3: PFCS, 4: PFCM).
+        parametros (dict): Valores fijos de 'lambda', 'mu', 'k' y 'M'.
+        rangos (list): Uno o dos rangos {'param', 'start', 'stop', 'steps'}.
+        n (int, optional): Número de clientes para calcular Pn.
+        costo_unitario, costo_diario, horas_laborables: Parámetros de costos.
+        desde, hasta (int, optional): Calcular solo los puntos desde..hasta-1,
+            en el orden de la rejilla, para repartir un barrido en partes.
+
+    Yields:
+        dict: Parámetros del punto y sus resultados, o 'error' si el punto no
+            se puede calcular.
+    """
+    if not 1 <= len(rangos) <= 2:
+        raise ValueError("Se requieren uno o dos rangos de parámetros")
+    for rango in rangos:
+        if rango.get('param') not in PARAMETROS_BARRIBLES:
+            raise ValueError(f"Parámetro no barrible: {rango.get('param')}")
+
+    calcular_costos = costo_unitario is not None or costo_diario is not None
+    cu = costo_unitario or 0
+    cd = costo_diario or 0
+    h = horas_laborables
+    calculadora = QueueTheoryCalculator()
+
+    def puntos():
+        if len(rangos) == 1:
+            for valor in valores_rango(rangos[0]):
+                yield {rangos[0]['param']: valor}
+        else:
+            for externo in valores_rango(rangos[0]):
+                for interno in valores_rango(rangos[1]):
+                    yield {rangos[0]['param']: externo, rangos[1]['param']: interno}
+
+    estado_erlang = None
+    for punto in itertools.islice(puntos(), desde, hasta):
+        valores = dict(parametros)
+        valores.update(punto)
+        fila = dict(valores)
+        try:
+            lambda_ = float(valores.get('lambda', 0))
+            mu = float(valores.get('mu', 0))
+            k = int(valores.get('k', 1))
+            M = int(valores.get('M', 0))
+
+            if op == 2 and lambda_ > 0:
+                a = lambda_ / mu
+                if estado_erlang is None or estado_erlang.a != a or estado_erlang.k > k:
+                    estado_erlang = _EstadoErlang(a)
+                resultados = _resultados_picm(estado_erlang, lambda_, mu, k, n)
+            else:
+                calculadora.set_parameters(lambda_=lambda_, mu=mu, k=k, M=M, op=op)
+                resultados = calculadora.calculate(n=n)
+
+            if calcular_costos:
+                # Mismas fórmulas que calcular_CTte, calcular_CTts, calcular_CTse y
+                # calcular_CTs, con la tasa efectiva λ(M - L) en población finita
+                llegadas = lambda_ * (M - resultados['L']) if op in [3, 4] else lambda_
+                resultados['CTte'] = llegadas * h * resultados['Wq'] * cu
+                resultados['CTts'] = llegadas * h * resultados['W'] * cu
+                resultados['CTse'] = llegadas * h * (1 / mu) * cu
+                resultados['CTs'] = k * cd
+                resultados['CT'] = resultados['CTts'] + resultados['CTs']
+            fila.update(resultados)
+        except (ValueError, ZeroDivisionError, OverflowError) as e:
+            fila['error'] = str(e)
+        yield fila
+
+
+def calcular_barrido(op, parametros, rangos, desde=0, hasta=None, **opciones):
+    """Filas desde..hasta-1 de barrido() en una lista, para calcularlas en otro proceso"""
+    return list(barrido(op, parametros, rangos, desde=desde, hasta=hasta, **opciones))
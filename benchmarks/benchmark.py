@@ -0,0 +1,200 @@
+"""
+Suite de benchmarks de QueueTheoryCalculator y del endpoint /calculate.
+
+Uso:
+    python benchmarks/benchmark.py --salida benchmarks/baseline.json
+    python benchmarks/benchmark.py --comparar benchmarks/baseline.json --umbral 0.25
+
+En modo comparación el proceso termina con código 1 si algún tiempo supera
+al de la línea base en más del umbral relativo indicado.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from teoria_de_colas import QueueTheoryCalculator  # noqa: E402
+
+MODELOS = {1: 'PICS', 2: 'PICM', 3: 'PFCS', 4: 'PFCM'}
+
+METODOS = [
+    'calcular_ro', 'calcular_P0', 'calcular_Pn', 'calcular_Pk', 'calcular_PE',
+    'calcular_PNE', 'calcular_L', 'calcular_Lq', 'calcular_Ln', 'calcular_W',
+    'calcular_Wq', 'calcular_Wn', 'calcular_CTte', 'calcular_CTts',
+    'calcular_CTse', 'calcular_CTs', 'calcular_CT',
+]
+
+VALORES_K = [1, 10, 100, 1000]
+VALORES_M = [10, 100, 1000, 10000, 100000]
+
+# Tiempos por debajo de este valor (segundos) se consideran ruido al comparar
+PISO_RUIDO = 20e-6
+
+
+def escenarios(rapido=False):
+    """Rejilla de escenarios (op, lambda, mu, k, M) para los cuatro modelos"""
+    valores_k = VALORES_K[:3] if rapido else VALORES_K
+    valores_m = VALORES_M[:3] if rapido else VALORES_M
+    mu = 1.0
+    for op in [1, 2, 3, 4]:
+        for k in (valores_k if op in [2, 4] else [1]):
+            for M in (valores_m if op in [3, 4] else [None]):
+                if M is not None and k > M:
+                    continue
+                if op in [1, 2]:
+                    lambda_ = 0.8 * k * mu  # Utilización del 80 %
+                else:
+                    lambda_ = 0.8 * k * mu / M  # Carga ofrecida del 80 % de los servidores
+                yield op, lambda_, mu, k, M
+
+
+def nombre_escenario(op, k, M):
+    return f"{MODELOS[op]}/k={k}/M={M}"
+
+
+def _medir(funcion, repeticiones):
+    """Mediana del tiempo de 'funcion' (que prepara su propio estado en frío)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        tiempos.append(funcion())
+    return statistics.median(tiempos)
+
+
+def medir_metodos(op, lambda_, mu, k, M, repeticiones):
+    """Tiempo en frío de calculate() y de cada calcular_* (calculadora nueva en cada medición)"""
+    resultados = {}
+
+    def nueva_calculadora():
+        calculadora = QueueTheoryCalculator()
+        calculadora.set_parameters(lambda_=lambda_, mu=mu, k=k, M=M or 0, n=1, op=op)
+        calculadora.set_cost_parameters(costo_unitario=1, costo_diario=10, horas_laborables=8)
+        return calculadora
+
+    def cronometrar(metodo):
+        def medicion():
+            calculadora = nueva_calculadora()
+            funcion = getattr(calculadora, metodo)
+            inicio = time.perf_counter()
+            funcion()
+            return time.perf_counter() - inicio
+        return medicion
+
+    def cronometrar_calculate():
+        calculadora = nueva_calculadora()
+        inicio = time.perf_counter()
+        calculadora.calculate(n=1)
+        return time.perf_counter() - inicio
+
+    for nombre, medicion in [('calculate', cronometrar_calculate)] + [(m, cronometrar(m)) for m in METODOS]:
+        try:
+            resultados[nombre] = _medir(medicion, repeticiones)
+        except (ValueError, ZeroDivisionError, OverflowError) as e:
+            resultados[nombre] = {'error': str(e)}
+    return resultados
+
+
+def medir_http(cliente, op, lambda_, mu, k, M, repeticiones):
+    """Latencia de extremo a extremo de /calculate con el cliente de pruebas de Flask"""
+    datos = {'model': MODELOS[op], 'lambda': lambda_, 'mu': mu, 'k': k,
+             'cost_wait': 1, 'cost_server': 10, 'hours': 8, 'n_clients': 1}
+    if M is not None:
+        datos['M'] = M
+
+    def medicion():
+        inicio = time.perf_counter()
+        respuesta = cliente.post('/calculate', json=datos)
+        respuesta.get_json()
+        return time.perf_counter() - inicio
+
+    return _medir(medicion, repeticiones)
+
+
+def ejecutar(repeticiones=3, rapido=False, http=True):
+    """Ejecuta toda la suite y devuelve el diccionario de resultados"""
+    cliente = None
+    if http:
+        import app as aplicacion
+        # Sin caché, para medir el cálculo completo en cada petición
+        aplicacion.results_cache.max_entradas = 0
+        aplicacion.results_cache.limpiar()
+        cliente = aplicacion.app.test_client()
+
+    resultados = {}
+    for op, lambda_, mu, k, M in escenarios(rapido):
+        nombre = nombre_escenario(op, k, M)
+        print(f"  {nombre}", file=sys.stderr)
+        tiempos = medir_metodos(op, lambda_, mu, k, M, repeticiones)
+        if cliente is not None:
+            tiempos['http_calculate'] = medir_http(cliente, op, lambda_, mu, k, M, repeticiones)
+        resultados[nombre] = tiempos
+
+    return {
+        'meta': {
+            'fecha': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'repeticiones': repeticiones,
+        },
+        'resultados': resultados,
+    }
+
+
+def comparar(base, actual, umbral):
+    """Devuelve la lista de regresiones (escenario, medida, base, actual, razón)"""
+    regresiones = []
+    for escenario, tiempos in actual['resultados'].items():
+        tiempos_base = base['resultados'].get(escenario, {})
+        for medida, valor in tiempos.items():
+            valor_base = tiempos_base.get(medida)
+            if not isinstance(valor, float) or not isinstance(valor_base, float):
+                continue
+            if valor < PISO_RUIDO:
+                continue
+            razon = valor / max(valor_base, PISO_RUIDO)
+            if razon > 1 + umbral:
+                regresiones.append((escenario, medida, valor_base, valor, razon))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--comparar', help='Archivo JSON de línea base con el que comparar')
+    parser.add_argument('--umbral', type=float, default=0.25,
+                        help='Regresión relativa máxima permitida (0.25 = 25 %%)')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--rapido', action='store_true', help='Rejilla reducida (k <= 100, M <= 1000)')
+    parser.add_argument('--sin-http', action='store_true', help='No medir el endpoint /calculate')
+    args = parser.parse_args(argv)
+
+    actual = ejecutar(args.repeticiones, args.rapido, http=not args.sin_http)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(actual, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(base, actual, args.umbral)
+        if regresiones:
+            print(f"{len(regresiones)} regresiones por encima del {args.umbral:.0%}:")
+            for escenario, medida, valor_base, valor, razon in regresiones:
+                print(f"  {escenario} {medida}: {valor_base * 1e3:.3f} ms -> {valor * 1e3:.3f} ms ({razon:.2f}x)")
+            return 1
+        print("Sin regresiones")
+    elif not args.salida:
+        json.dump(actual, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
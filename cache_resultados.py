@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalizar_valor(valor):
+    """
+    Normaliza un parámetro para usarlo en la clave del caché. Los números se
+    guardan exactos (sin redondear), para que dos entradas distintas nunca
+    compartan un resultado; solo se unifican 2, 2.0 y '2'.
+    """
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, bool):
+        return valor
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+    if numero.is_integer() and abs(numero) < 2 ** 53:
+        return int(numero)
+    return numero.hex()
+
+
+class CacheResultados:
+    """
+    Caché LRU acotado con expiración por tiempo (TTL), seguro para hilos.
+
+    Lleva contadores de aciertos, fallos, expulsiones por tamaño y expiraciones
+    para poder exponerlos como estadísticas.
+    """
+
+    def __init__(self, max_entradas=1024, ttl=300):
+        """
+        Args:
+            max_entradas (int): Número máximo de resultados guardados; 0 desactiva el caché.
+            ttl (float): Segundos que vive cada entrada; None o 0 para no expirar.
+        """
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.expiraciones = 0
+
+    def obtener(self, clave):
+        """Devuelve el valor guardado para la clave o None si no está (o expiró)"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+
+            valor, expira = entrada
+            if expira is not None and expira <= time.monotonic():
+                del self._datos[clave]
+                self.expiraciones += 1
+                self.fallos += 1
+                return None
+
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        """Guarda un valor y expulsa el menos usado recientemente si se supera el tamaño"""
+        if self.max_entradas <= 0:
+            return
+        expira = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.expulsiones += 1
+
+    def limpiar(self):
+        """Vacía el caché sin reiniciar los contadores"""
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        """Devuelve los contadores del caché"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'size': len(self._datos),
+                'max_size': self.max_entradas,
+                'ttl': self.ttl,
+                'hits': self.aciertos,
+                'misses': self.fallos,
+                'evictions': self.expulsiones,
+                'expirations': self.expiraciones,
+                'hit_ratio': self.aciertos / consultas if consultas else 0.0,
+            }
@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+
+from modelos import Evaluacion, Parametros, log_factoriales, servidores
+from nacimiento_muerte import extender
+
+# Probabilidad que se deja fuera al truncar la distribución de los modelos de
+# población infinita cuando no se indica N
+TOLERANCIA_COLA = 1e-12
+# Número máximo de estados que se devuelven
+N_MAXIMO = 1000000
+# Iteraciones máximas de bisección para los percentiles de población finita
+ITERACIONES_BISECCION = 200
+
+
+def _n_por_defecto(p, P_espera):
+    """Menor N tal que la probabilidad de más de N clientes es menor que TOLERANCIA_COLA"""
+    if p.lambda_ == 0:
+        return 0
+    if p.op == 1:
+        ro = p.lambda_ / p.mu
+        return math.ceil(math.log(TOLERANCIA_COLA) / math.log(ro))
+    # M/M/k: P(n > k + j) = Pk ro^(j+1), con Pk la probabilidad de espera
+    ro = p.lambda_ / (p.k * p.mu)
+    return p.k + max(0, math.ceil(math.log(TOLERANCIA_COLA / P_espera) / math.log(ro)))
+
+
+# --------------------- TIEMPO DE ESPERA ---------------------
+
+class _ColaEsperaErlang:
+    """
+    P(Wq > t) en los modelos de nacimiento y muerte sin cola geométrica
+    (población o capacidad finita).
+
+    Un cliente que llega (y entra) encuentra n clientes con probabilidad
+    πn ∝ λn Pn; si n >= k espera n - k + 1 servicios a tasa kμ, es decir, un
+    tiempo Erlang(n - k + 1, kμ). Entonces
+        P(Wq > t) = Σ_{j>=0} Poisson(j; kμt) · G_j,   G_j = Σ_{n>=k+j} πn
+    """
+
+    def __init__(self, p, cadena):
+        k = servidores(p)
+        llegadas = cadena.nacimientos * cadena.P[:-1]
+        pi = llegadas / llegadas.sum()
+        self.tasa = k * p.mu
+        self.G = np.cumsum(pi[k:][::-1])[::-1] if k < len(pi) else np.zeros(1)
+        self.log_fact = log_factoriales(len(self.G) - 1)
+        self.j = np.arange(len(self.G))
+
+    def cola(self, t):
+        if t <= 0:
+            return float(self.G[0])
+        x = self.tasa * t
+        poisson = np.exp(-x + self.j * math.log(x) - self.log_fact)
+        return float(min(1.0, poisson @ self.G))
+
+    def percentil(self, q):
+        """Menor t con P(Wq > t) <= 1 - q (bisección sobre la cola, que es decreciente)"""
+        objetivo = 1 - q
+        if self.cola(0) <= objetivo:
+            return 0.0
+        bajo, alto = 0.0, 1 / self.tasa
+        while self.cola(alto) > objetivo:
+            bajo, alto = alto, alto * 2
+        for _ in range(ITERACIONES_BISECCION):
+            medio = (bajo + alto) / 2
+            if self.cola(medio) > objetivo:
+                bajo = medio
+            else:
+                alto = medio
+            if alto - bajo <= 1e-12 * alto:
+                break
+        return alto
+
+
+class _ColaEsperaExponencial:
+    """P(Wq > t) = P_espera · exp(-(kμ - λ) t) en M/M/1 y M/M/k"""
+
+    def __init__(self, p, P_espera):
+        self.P_espera = P_espera
+        self.tasa = servidores(p) * p.mu - p.lambda_
+
+    def cola(self, t):
+        if t <= 0:
+            return self.P_espera
+        return self.P_espera * math.exp(-self.tasa * t)
+
+    def percentil(self, q):
+        objetivo = 1 - q
+        if self.P_espera <= objetivo:
+            return 0.0
+        return math.log(self.P_espera / objetivo) / self.tasa
+
+
+# --------------------- API ---------------------
+
+def distribucion_completa(op, lambda_, mu, k=1, M=0, N=None, tiempos=(), percentiles=(), K=0):
+    """
+    Distribución completa del número de clientes y del tiempo de espera en
+    cola de un modelo de nacimiento y muerte (todos salvo M/G/1 y M/D/1), a
+    partir de la cadena que resuelve nacimiento_muerte.resolver.
+
+    Args:
+        op (int): Modelo (ver modelos.MODELOS).
+        lambda_, mu, k, M, K: Parámetros del modelo.
+        N (int, optional): Último estado a devolver. Por defecto M (o K) en
+            los modelos de población o capacidad finita y, en los de población
+            infinita, el menor N que deja fuera menos de TOLERANCIA_COLA de
+            probabilidad.
+        tiempos (list): Valores de t para calcular P(Wq > t).
+        percentiles (list): Probabilidades q en (0, 1) para calcular el menor
+            t tal que P(Wq <= t) >= q.
+
+    Returns:
+        dict: n, Pn y CDF para n = 0..N, la probabilidad restante después de
+            N, la probabilidad de esperar, P(Wq > t) y los percentiles de Wq.
+    """
+    if N is not None and N < 0:
+        raise ValueError("N debe ser mayor o igual que 0")
+    p = Parametros(op, lambda_, mu, k, M or 0, K or 0)
+    evaluacion = Evaluacion(p)
+    if '_cadena' not in evaluacion.grafo:
+        raise ValueError("La distribución de estados no está disponible para este modelo")
+    cadena = evaluacion['_cadena']  # Verifica también la estabilidad
+
+    if op in [1, 2]:
+        # Población infinita: estados 0..k resueltos y cola geométrica
+        if N is None:
+            N = _n_por_defecto(p, evaluacion['_P_espera'])
+        if N > N_MAXIMO:
+            raise ValueError(f"N no puede ser mayor que {N_MAXIMO}")
+        P = extender(cadena, N)
+        cola = _ColaEsperaExponencial(p, evaluacion['_P_espera'])
+    else:
+        N = len(cadena.P) - 1 if N is None else min(N, len(cadena.P) - 1)
+        P = cadena.P[:N + 1]
+        cola = _ColaEsperaErlang(p, cadena)
+
+    for q in percentiles:
+        if not 0 < q < 1:
+            raise ValueError(f"Percentil no válido: {q}. Debe estar entre 0 y 1")
+
+    CDF = np.minimum(np.cumsum(P), 1.0)
+    return {
+        'n': list(range(N + 1)),
+        'Pn': P.tolist(),
+        'CDF': CDF.tolist(),
+        'P_restante': max(0.0, 1.0 - float(CDF[-1])),
+        'P_espera': cola.cola(0),
+        't': list(tiempos),
+        'P_Wq_mayor_t': [cola.cola(t) for t in tiempos],
+        'percentiles_Wq': {str(q): cola.percentil(q) for q in percentiles},
+    }
@@ -0,0 +1,188 @@
+"""
+Ejecución acotada de los cálculos pesados.
+
+Los cálculos baratos se hacen en el hilo de la petición. Los pesados (por
+ejemplo PFCM con M grande) se envían a un grupo de procesos de tamaño fijo,
+para que no retengan el GIL del proceso que atiende las peticiones baratas.
+Cada cálculo pesado tiene un tiempo máximo de espera, y si ya hay demasiados
+en curso la petición se rechaza de inmediato en lugar de encolarse sin fin.
+
+El tamaño de un cálculo se mide en estados: los de la cadena que hay que
+resolver, multiplicados por el número de cadenas en los cálculos que
+resuelven varias (lotes, barridos, optimización) o los clientes simulados.
+"""
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TiempoExcedido
+from concurrent.futures.process import BrokenProcessPool
+
+# Estados a partir de los cuales un cálculo se considera pesado
+ESTADOS_PESADO = 20000
+
+# Estados de cada parte de un cálculo pesado que se envía por partes
+ESTADOS_POR_PARTE = 10 * ESTADOS_PESADO
+
+
+class Sobrecarga(RuntimeError):
+    """No hay capacidad para aceptar otro cálculo pesado"""
+
+
+class TiempoAgotado(RuntimeError):
+    """El cálculo no terminó dentro del tiempo máximo de la petición"""
+
+
+class CalculoInterrumpido(RuntimeError):
+    """El proceso que hacía el cálculo terminó de forma inesperada"""
+
+
+# Errores por los que un cálculo se rechaza sin ser culpa de sus parámetros
+RECHAZOS = (Sobrecarga, TiempoAgotado, CalculoInterrumpido)
+
+
+def estados(op, k=1, M=0, K=0):
+    """
+    Tamaño aproximado del cálculo: número de estados de la cadena que hay que
+    resolver (M + 1 en población finita, K + 1 en capacidad finita, k en
+    PICM y 1 en los demás modelos).
+    """
+    if op in [3, 4]:
+        return (M or 0) + 1
+    if op in [5, 6]:
+        return (K or 0) + 1
+    if op == 2:
+        return k
+    return 1
+
+
+class EjecutorAcotado:
+    """
+    Grupo de procesos con un máximo de cálculos en curso (en ejecución más
+    en espera). El grupo se crea con el primer cálculo pesado, de modo que
+    cada proceso de gunicorn crea el suyo después del fork, y se vuelve a
+    crear si un proceso del grupo muere (por ejemplo por falta de memoria).
+
+    Args:
+        procesos (int): Procesos del grupo.
+        pendientes (int): Máximo de cálculos aceptados a la vez; los
+            siguientes se rechazan con Sobrecarga.
+        tiempo_maximo (float): Segundos que una petición espera su resultado
+            antes de TiempoAgotado.
+        estados_maximos (int): Presupuesto por petición; los cálculos más
+            grandes se rechazan con ValueError sin ejecutarse.
+    """
+
+    def __init__(self, procesos=2, pendientes=8, tiempo_maximo=30.0, estados_maximos=50000000):
+        self.procesos = procesos
+        self.pendientes = pendientes
+        self.tiempo_maximo = tiempo_maximo
+        self.estados_maximos = estados_maximos
+        self._cupos = threading.BoundedSemaphore(pendientes)
+        self._grupo = None
+        self._cerrojo = threading.Lock()
+
+    def pesado(self, estados):
+        """Si un cálculo de ese tamaño se envía al grupo de procesos"""
+        return estados >= ESTADOS_PESADO
+
+    def verificar_presupuesto(self, estados):
+        """Rechaza con ValueError los cálculos de más de estados_maximos estados"""
+        if estados > self.estados_maximos:
+            raise ValueError(f"El cálculo excede el presupuesto de {self.estados_maximos} estados por petición")
+
+    def _obtener_grupo(self):
+        with self._cerrojo:
+            if self._grupo is None:
+                self._grupo = ProcessPoolExecutor(max_workers=self.procesos)
+            return self._grupo
+
+    def _descartar_grupo(self, grupo):
+        """Descarta un grupo roto; el siguiente cálculo crea uno nuevo"""
+        with self._cerrojo:
+            if self._grupo is grupo:
+                self._grupo = None
+        grupo.shutdown(wait=False, cancel_futures=True)
+
+    def _enviar(self, funcion, args, kwargs):
+        """Envía un cálculo al grupo, recreándolo una vez si está roto; devuelve (grupo, futuro)"""
+        grupo = self._obtener_grupo()
+        try:
+            return grupo, grupo.submit(funcion, *args, **kwargs)
+        except BrokenProcessPool:
+            self._descartar_grupo(grupo)
+            grupo = self._obtener_grupo()
+            return grupo, grupo.submit(funcion, *args, **kwargs)
+
+    def _tomar_cupos(self, n):
+        """Toma n cupos sin esperar, o ninguno si no hay suficientes"""
+        tomados = 0
+        while tomados < n and self._cupos.acquire(blocking=False):
+            tomados += 1
+        if tomados < n:
+            for _ in range(tomados):
+                self._cupos.release()
+            raise Sobrecarga("El servidor está ocupado con otros cálculos; intente de nuevo más tarde")
+
+    def _esperar(self, enviados):
+        """Resultados de los futuros, en orden, dentro del tiempo máximo"""
+        limite = time.monotonic() + self.tiempo_maximo
+        try:
+            return [futuro.result(timeout=max(0.0, limite - time.monotonic()))
+                    for _, futuro in enviados]
+        except TiempoExcedido:
+            raise TiempoAgotado(f"El cálculo superó el tiempo máximo de {self.tiempo_maximo:g} segundos") from None
+        except BrokenProcessPool:
+            for grupo in {id(grupo): grupo for grupo, _ in enviados}.values():
+                self._descartar_grupo(grupo)
+            raise CalculoInterrumpido("El proceso de cálculo terminó de forma inesperada; intente de nuevo") from None
+        finally:
+            for _, futuro in enviados:
+                futuro.cancel()
+
+    def ejecutar(self, funcion, *args, estados=1, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs): en el hilo actual si el cálculo es
+        barato y en el grupo de procesos si tiene ESTADOS_PESADO estados o más.
+        La función y sus argumentos deben poder serializarse con pickle.
+        """
+        self.verificar_presupuesto(estados)
+        if not self.pesado(estados):
+            return funcion(*args, **kwargs)
+        return self.ejecutar_varios(funcion, [args], estados=estados, **kwargs)[0]
+
+    def ejecutar_varios(self, funcion, tareas, estados=1, **kwargs):
+        """
+        Ejecuta funcion(*tarea, **kwargs) para cada tarea y devuelve los
+        resultados en el mismo orden. Si el cálculo es pesado, las tareas se
+        reparten en el grupo de procesos y cada una ocupa un cupo; si no hay
+        cupos para todas, la petición se rechaza con Sobrecarga.
+        """
+        self.verificar_presupuesto(estados)
+        tareas = list(tareas)
+        if not self.pesado(estados):
+            return [funcion(*tarea, **kwargs) for tarea in tareas]
+
+        self._tomar_cupos(len(tareas))
+        enviados = []
+        try:
+            for tarea in tareas:
+                grupo, futuro = self._enviar(funcion, tarea, kwargs)
+                # El cupo se libera cuando la tarea termina, aunque la petición
+                # ya haya dejado de esperarla, para que el límite cuente el
+                # trabajo real en curso
+                futuro.add_done_callback(lambda _: self._cupos.release())
+                enviados.append((grupo, futuro))
+        except BaseException as error:
+            for _ in range(len(tareas) - len(enviados)):
+                self._cupos.release()
+            for _, futuro in enviados:
+                futuro.cancel()
+            if isinstance(error, BrokenProcessPool):
+                raise CalculoInterrumpido("No se pudo iniciar el proceso de cálculo; intente de nuevo") from None
+            raise
+        return self._esperar(enviados)
+
+    def cerrar(self):
+        with self._cerrojo:
+            if self._grupo is not None:
+                self._grupo.shutdown(wait=False, cancel_futures=True)
+                self._grupo = None
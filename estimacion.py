@@ -0,0 +1,345 @@
+"""
+Estimación de los parámetros de un modelo a partir de registros de eventos.
+
+Cada registro es un cliente atendido con su llegada, inicio y fin de servicio
+(y, opcionalmente, el identificador del cliente). Los registros deben estar
+ordenados por llegada y atenderse en orden de llegada, de modo que los
+inicios de servicio no decrecen.
+
+Se lee el archivo por bloques (CSV) o con mmap (binario) y se usan
+estimadores de una sola pasada, así que la memoria no depende del tamaño del
+archivo:
+    - media y varianza de los tiempos entre llegadas y de servicio (Welford,
+      combinando bloques con la fórmula de Chan);
+    - servidores ocupados a la vez, con un montículo de fines de servicio;
+    - número de clientes distintos (población), con HyperLogLog;
+    - muestras de tamaño fijo (reservorio) para la prueba de exponencialidad.
+
+Uso:
+    python estimacion.py registro.csv [--op 2]
+"""
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+# Registros por bloque
+TAMANO_BLOQUE = 65536
+# Tamaño de las muestras para la prueba de Kolmogorov-Smirnov
+TAMANO_MUESTRA = 10000
+# Bits de índice de HyperLogLog (2^14 registros, error relativo ~0.8 %)
+BITS_HLL = 14
+# Registro binario: llegada, inicio y fin de servicio y cliente
+FORMATO_BINARIO = np.dtype([('llegada', '<f8'), ('inicio', '<f8'), ('fin', '<f8'), ('cliente', '<i8')])
+COLUMNAS = {'llegada': 'llegada', 'inicio': 'inicio', 'fin': 'fin', 'cliente': 'cliente'}
+
+# Valores críticos del estadístico de Kolmogorov-Smirnov modificado de
+# Stephens para la exponencial con media estimada
+CRITICOS_KS = {0.15: 0.926, 0.10: 0.990, 0.05: 1.094, 0.025: 1.190, 0.01: 1.308}
+
+
+# --------------------- ESTIMADORES EN LÍNEA ---------------------
+
+class _Welford:
+    """Media y varianza en una pasada; cada bloque se combina con la fórmula de Chan"""
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.M2 = 0.0
+
+    def agregar(self, valores):
+        n_b = len(valores)
+        if n_b == 0:
+            return
+        media_b = float(valores.mean())
+        M2_b = float(((valores - media_b) ** 2).sum())
+        n = self.n + n_b
+        delta = media_b - self.media
+        self.media += delta * n_b / n
+        self.M2 += M2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+
+    @property
+    def varianza(self):
+        return self.M2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def cv(self):
+        """Coeficiente de variación (1 para la exponencial)"""
+        return math.sqrt(self.varianza) / self.media if self.media > 0 else float('nan')
+
+
+class _Reservorio:
+    """Muestra uniforme de tamaño fijo de un flujo (algoritmo R, por bloques)"""
+
+    def __init__(self, tamano, semilla=0):
+        self.tamano = tamano
+        self.muestra = np.empty(tamano)
+        self.vistos = 0
+        self.rng = np.random.default_rng(semilla)
+
+    def agregar(self, valores):
+        libres = max(0, min(self.tamano - self.vistos, len(valores)))
+        self.muestra[self.vistos:self.vistos + libres] = valores[:libres]
+        resto = valores[libres:]
+        if len(resto):
+            # El elemento i-ésimo del flujo reemplaza una posición al azar con probabilidad tamano / (i + 1)
+            indices = np.arange(self.vistos + libres, self.vistos + len(valores)) + 1
+            posiciones = (self.rng.random(len(resto)) * indices).astype(np.int64)
+            elegidos = posiciones < self.tamano
+            self.muestra[posiciones[elegidos]] = resto[elegidos]
+        self.vistos += len(valores)
+
+    @property
+    def valores(self):
+        return self.muestra[:min(self.vistos, self.tamano)]
+
+
+def _mezclar(x):
+    """Función de mezcla splitmix64 sobre enteros de 64 bits"""
+    x = x.astype(np.uint64)
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _bits(x):
+    """Número de bits significativos de cada entero (0 para 0)"""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for s in (32, 16, 8, 4, 2, 1):
+        mayor = x >= (np.uint64(1) << np.uint64(s))
+        n += s * mayor
+        x[mayor] >>= np.uint64(s)
+    return n + (x > 0)
+
+
+class _HyperLogLog:
+    """Número aproximado de elementos distintos con memoria fija (2^bits registros)"""
+
+    def __init__(self, bits=BITS_HLL):
+        self.bits = bits
+        self.registros = np.zeros(1 << bits, dtype=np.int64)
+
+    def agregar(self, hashes):
+        indices = (hashes >> np.uint64(64 - self.bits)).astype(np.int64)
+        resto = hashes & np.uint64((1 << (64 - self.bits)) - 1)
+        rangos = (64 - self.bits) - _bits(resto) + 1
+        np.maximum.at(self.registros, indices, rangos)
+
+    def estimar(self):
+        m = len(self.registros)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimacion = alfa * m * m / np.sum(2.0 ** -self.registros)
+        vacios = int(np.count_nonzero(self.registros == 0))
+        if estimacion <= 2.5 * m and vacios:
+            # Rango pequeño: conteo lineal
+            estimacion = m * math.log(m / vacios)
+        return estimacion
+
+
+def _hash_texto(valores):
+    """Hash de 64 bits de identificadores de texto"""
+    return np.array([int.from_bytes(hashlib.blake2b(str(v).encode(), digest_size=8).digest(), 'little')
+                     for v in valores], dtype=np.uint64)
+
+
+def prueba_exponencial(muestra):
+    """
+    Prueba de Kolmogorov-Smirnov de exponencialidad con la media estimada de
+    la muestra, con el estadístico modificado de Stephens
+        D* = (D - 0.2/n)(√n + 0.26 + 0.5/√n)
+    y sus valores críticos (ya tienen en cuenta que la media se estima).
+    """
+    n = len(muestra)
+    if n < 5:
+        return {'n': n, 'D': None, 'D_modificado': None, 'rechaza_5': None}
+    x = np.sort(muestra)
+    F = 1 - np.exp(-x / x.mean())
+    i = np.arange(1, n + 1)
+    D = float(max(np.max(i / n - F), np.max(F - (i - 1) / n)))
+    D_mod = (D - 0.2 / n) * (math.sqrt(n) + 0.26 + 0.5 / math.sqrt(n))
+    return {
+        'n': n,
+        'D': D,
+        'D_modificado': D_mod,
+        'rechaza': {str(nivel): D_mod > critico for nivel, critico in CRITICOS_KS.items()},
+        'rechaza_5': D_mod > CRITICOS_KS[0.05],
+    }
+
+
+# --------------------- LECTURA ---------------------
+
+def _bloques_binario(ruta, tamano_bloque):
+    """Bloques de un archivo binario FORMATO_BINARIO abierto con mmap"""
+    registros = np.memmap(ruta, dtype=FORMATO_BINARIO, mode='r')
+    for inicio in range(0, len(registros), tamano_bloque):
+        bloque = registros[inicio:inicio + tamano_bloque]
+        yield bloque['llegada'], bloque['inicio'], bloque['fin'], _mezclar(bloque['cliente'])
+
+
+def _bloques_csv(ruta, tamano_bloque, columnas):
+    """Bloques de un CSV con encabezado; las columnas se buscan por nombre"""
+    with open(ruta, newline='') as archivo:
+        lector = csv.reader(archivo)
+        encabezado = next(lector)
+        try:
+            posiciones = [encabezado.index(columnas[c]) for c in ['llegada', 'inicio', 'fin']]
+        except ValueError:
+            raise ValueError(f"El CSV debe tener las columnas {columnas['llegada']}, {columnas['inicio']} y {columnas['fin']}")
+        cliente = encabezado.index(columnas['cliente']) if columnas['cliente'] in encabezado else None
+
+        filas = []
+        for fila in lector:
+            filas.append(fila)
+            if len(filas) == tamano_bloque:
+                yield _convertir(filas, posiciones, cliente)
+                filas = []
+        if filas:
+            yield _convertir(filas, posiciones, cliente)
+
+
+def _convertir(filas, posiciones, cliente):
+    tiempos = np.array([[fila[p] for p in posiciones] for fila in filas], dtype=float)
+    hashes = _hash_texto(fila[cliente] for fila in filas) if cliente is not None else None
+    return tiempos[:, 0], tiempos[:, 1], tiempos[:, 2], hashes
+
+
+# --------------------- API ---------------------
+
+class Estimacion(NamedTuple):
+    """Parámetros estimados y diagnósticos de un registro de eventos"""
+    registros: int
+    lambda_: float
+    mu: float
+    sigma: float
+    k: int
+    M: int
+    lambda_individual: float
+    L: float
+    cv_llegadas: float
+    cv_servicio: float
+    prueba_llegadas: dict
+    prueba_servicio: dict
+
+    def parametros(self, op=1):
+        """Argumentos de QueueTheoryCalculator.set_parameters para el modelo op"""
+        finita = op in [3, 4]
+        return {
+            'lambda_': self.lambda_individual if finita else self.lambda_,
+            'mu': self.mu,
+            'k': self.k if op in [2, 4, 6] else 1,
+            'M': self.M if finita else 0,
+            'sigma': self.sigma if op == 7 else 0,
+            'op': op,
+        }
+
+
+def estimar(ruta, formato=None, tamano_bloque=TAMANO_BLOQUE, columnas=None, semilla=0):
+    """
+    Estima λ, μ, σ, el número de servidores y el tamaño de la población de un
+    registro de eventos, en una sola pasada y con memoria constante.
+
+    Args:
+        ruta (str): Archivo CSV (con encabezado) o binario (FORMATO_BINARIO).
+        formato (str, optional): 'csv' o 'binario'; por defecto según la extensión.
+        tamano_bloque (int): Registros por bloque.
+        columnas (dict, optional): Nombres de las columnas del CSV (ver COLUMNAS).
+
+    Returns:
+        Estimacion: λ = 1 / media entre llegadas; μ = 1 / media de servicio;
+            σ = desviación estándar del servicio; k = máximo de servicios
+            simultáneos; M = clientes distintos (0 si no hay identificador);
+            λ por cliente = λ / (M - L), con L = Σ tiempo en el sistema / T
+            (para los modelos de población finita); CV y prueba de
+            exponencialidad de las llegadas y del servicio.
+    """
+    if formato is None:
+        formato = 'csv' if ruta.lower().endswith('.csv') else 'binario'
+    if formato == 'csv':
+        bloques = _bloques_csv(ruta, tamano_bloque, {**COLUMNAS, **(columnas or {})})
+    elif formato == 'binario':
+        bloques = _bloques_binario(ruta, tamano_bloque)
+    else:
+        raise ValueError("Formato no válido. Use 'csv' o 'binario'")
+
+    entre_llegadas, servicio = _Welford(), _Welford()
+    muestra_llegadas = _Reservorio(TAMANO_MUESTRA, semilla)
+    muestra_servicio = _Reservorio(TAMANO_MUESTRA, semilla + 1)
+    poblacion = _HyperLogLog()
+    ocupados = []  # Montículo con los fines de los servicios en curso
+    k = 0
+    registros = 0
+    tiempo_en_sistema = 0.0
+    primera = ultima = ultimo_fin = None
+    con_clientes = False
+
+    for llegadas, inicios, fines, hashes in bloques:
+        if len(llegadas) == 0:
+            continue
+        if np.any(inicios < llegadas) or np.any(fines < inicios):
+            raise ValueError("Cada registro debe cumplir llegada <= inicio <= fin")
+        brechas = np.diff(llegadas) if ultima is None else np.diff(llegadas, prepend=ultima)
+        if np.any(brechas < 0):
+            raise ValueError("Los registros deben estar ordenados por llegada")
+        if primera is None:
+            primera = float(llegadas[0])
+        ultima = float(llegadas[-1])
+        ultimo_fin = float(fines.max()) if ultimo_fin is None else max(ultimo_fin, float(fines.max()))
+
+        duraciones = fines - inicios
+        entre_llegadas.agregar(brechas)
+        servicio.agregar(duraciones)
+        muestra_llegadas.agregar(brechas)
+        muestra_servicio.agregar(duraciones)
+        tiempo_en_sistema += float((fines - llegadas).sum())
+        registros += len(llegadas)
+        if hashes is not None:
+            con_clientes = True
+            poblacion.agregar(hashes)
+
+        for inicio, fin in zip(inicios.tolist(), fines.tolist()):
+            while ocupados and ocupados[0] <= inicio:
+                heapq.heappop(ocupados)
+            heapq.heappush(ocupados, fin)
+            k = max(k, len(ocupados))
+
+    if registros < 2 or entre_llegadas.media <= 0 or servicio.media <= 0:
+        raise ValueError("El registro no tiene suficientes eventos para estimar las tasas")
+
+    lambda_ = 1 / entre_llegadas.media
+    T = ultimo_fin - primera
+    L = tiempo_en_sistema / T if T > 0 else 0.0
+    M = round(poblacion.estimar()) if con_clientes else 0
+    return Estimacion(
+        registros=registros,
+        lambda_=lambda_,
+        mu=1 / servicio.media,
+        sigma=math.sqrt(servicio.varianza),
+        k=k,
+        M=M,
+        lambda_individual=lambda_ / (M - L) if M > L else float('nan'),
+        L=L,
+        cv_llegadas=entre_llegadas.cv,
+        cv_servicio=servicio.cv,
+        prueba_llegadas=prueba_exponencial(muestra_llegadas.valores),
+        prueba_servicio=prueba_exponencial(muestra_servicio.valores),
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('ruta')
+    parser.add_argument('--formato', choices=['csv', 'binario'])
+    parser.add_argument('--op', type=int, default=1, help='Modelo para el que se muestran los parámetros')
+    args = parser.parse_args()
+    estimacion = estimar(args.ruta, args.formato)
+    print(json.dumps({**estimacion._asdict(), 'parametros': estimacion.parametros(args.op)}, indent=2))
@@ -0,0 +1,42 @@
+"""
+Configuración de gunicorn para producción:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Varios procesos con hilos atienden las peticiones; los cálculos pesados de
+cada proceso pasan a su grupo acotado (ejecucion.py), así que los baratos
+mantienen una latencia baja. Los núcleos se reparten entre los grupos: con
+W procesos web, cada grupo tiene núcleos // W procesos de cálculo, de modo
+que entre todos no hay más procesos de cálculo que núcleos. Los valores se
+pueden cambiar con variables de entorno.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+nucleos = multiprocessing.cpu_count()
+# Las peticiones baratas duran milisegundos y cada proceso tiene varios
+# hilos, así que basta con un proceso web por cada cuatro núcleos
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, nucleos // 4)))
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', 4))
+
+# Procesos del grupo de cálculo de cada proceso web (app.py lo lee al cargar)
+os.environ.setdefault('HEAVY_WORKERS', str(max(1, nucleos // workers)))
+
+# El tiempo del proceso debe superar el tiempo máximo de cada cálculo, para
+# que la petición responda 503 antes de que gunicorn reinicie el proceso
+timeout = int(float(os.environ.get('REQUEST_TIMEOUT', 30))) + 30
+graceful_timeout = 30
+keepalive = 5
+
+# Cargar la aplicación antes del fork: los procesos comparten las tablas de
+# Erlang mapeadas en memoria
+preload_app = True
+
+# Reiniciar los procesos de vez en cuando para acotar la memoria
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
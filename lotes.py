@@ -0,0 +1,222 @@
+import numpy as np
+
+from modelos import log_factoriales
+
+# Máximo de celdas (escenarios x estados) que se procesan a la vez en los
+# modelos de población finita, para acotar la memoria de cada bloque.
+CELDAS_POR_BLOQUE = 1 << 22
+
+
+def _bloques(tamanos, total):
+    """Divide los índices ordenados por tamaño en bloques de a lo sumo CELDAS_POR_BLOQUE celdas"""
+    orden = np.argsort(tamanos, kind='stable')
+    inicio = 0
+    while inicio < total:
+        fin = inicio + 1
+        while fin < total and (fin - inicio + 1) * (tamanos[orden[fin]] + 1) <= CELDAS_POR_BLOQUE:
+            fin += 1
+        yield orden[inicio:fin]
+        inicio = fin
+
+
+def _pics(lambda_, mu):
+    """M/M/1 vectorizado"""
+    ro = lambda_ / mu
+    estable = ro < 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        L = np.where(estable, lambda_ / (mu - lambda_), np.nan)
+        Lq = np.where(estable, lambda_ ** 2 / (mu * (mu - lambda_)), np.nan)
+        W = np.where(estable, 1 / (mu - lambda_), np.nan)
+        Wq = np.where(estable, lambda_ / (mu * (mu - lambda_)), np.nan)
+    return {
+        'ro': ro,
+        'P0': np.where(estable, 1 - ro, np.nan),
+        'L': L,
+        'Lq': Lq,
+        'Ln': L,
+        'W': W,
+        'Wq': Wq,
+        'Wn': W,
+    }
+
+
+def _picm(lambda_, mu, k):
+    """M/M/k vectorizado (P0 en escala logarítmica)"""
+    total = len(lambda_)
+    a = lambda_ / mu
+    estable = lambda_ < k * mu
+    log_fact = log_factoriales(int(k.max()))
+
+    P0 = np.full(total, np.nan)
+    Pk = np.full(total, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_a = np.log(a)
+        for idx in _bloques(k, total):
+            kb = k[idx]
+            n = np.arange(int(kb.max()))
+            # log(a^n / n!) para n < k; el resto queda fuera de la suma
+            log_terminos = n[None, :] * log_a[idx, None] - log_fact[None, :len(n)]
+            log_terminos = np.where(n[None, :] < kb[:, None], log_terminos, -np.inf)
+            log_terminos[:, 0] = 0.0
+            # log(a^k / k! * kμ / (kμ - λ))
+            log_ultimo = (kb * log_a[idx] - log_fact[kb]
+                          + np.log(kb * mu[idx] / (kb * mu[idx] - lambda_[idx])))
+            maximo = np.maximum(log_terminos.max(axis=1), log_ultimo)
+            suma = np.exp(log_terminos - maximo[:, None]).sum(axis=1) + np.exp(log_ultimo - maximo)
+            log_P0 = -maximo - np.log(suma)
+            P0[idx] = np.exp(log_P0)
+            Pk[idx] = np.exp(log_ultimo + log_P0)
+
+        P0 = np.where(estable, P0, np.nan)
+        Pk = np.where(estable, Pk, np.nan)
+        Wq = Pk / (k * mu - lambda_)
+        Lq = lambda_ * Wq
+    return {
+        'ro': lambda_ / (k * mu),
+        'P0': P0,
+        'Pk': Pk,
+        'L': Lq + a,
+        'Lq': Lq,
+        'Ln': Lq / Pk,
+        'W': Wq + 1 / mu,
+        'Wq': Wq,
+        'Wn': Wq / Pk,
+    }
+
+
+def _poblacion_finita(lambda_, mu, k, M, n=None):
+    """PFCS / PFCM vectorizado sobre la distribución de estados en escala logarítmica"""
+    total = len(lambda_)
+    P0 = np.empty(total)
+    PE = np.empty(total)
+    PNE = np.empty(total)
+    L = np.empty(total)
+    Lq = np.empty(total)
+    Pn = np.zeros(total)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_a = np.log(lambda_ / mu)
+        for idx in _bloques(M, total):
+            Mb = M[idx]
+            kb = k[idx]
+            estados = np.arange(int(Mb.max()) + 1)
+            j = estados[None, 1:]
+            # Incremento de la recurrencia: log((M - n + 1) / min(n, k)) + log(λ/μ)
+            incrementos = (np.log((Mb[:, None] - j + 1) / np.minimum(j, kb[:, None]))
+                           + log_a[idx, None])
+            log_pesos = np.zeros((len(idx), len(estados)))
+            log_pesos[:, 1:] = np.cumsum(np.where(j <= Mb[:, None], incrementos, -np.inf), axis=1)
+            log_pesos[np.isnan(log_pesos)] = -np.inf
+            P = np.exp(log_pesos - log_pesos.max(axis=1, keepdims=True))
+            P /= P.sum(axis=1, keepdims=True)
+
+            P0[idx] = P[:, 0]
+            L[idx] = P @ estados
+            Lq[idx] = (P * np.maximum(estados[None, :] - kb[:, None], 0)).sum(axis=1)
+            PE[idx] = np.where(estados[None, :] >= kb[:, None], P, 0).sum(axis=1)
+            # P(n < k) sumada directamente, como en modelos: 1 - PE pierde dígitos cuando PE ≈ 1
+            PNE[idx] = np.where(estados[None, :] < kb[:, None], P, 0).sum(axis=1)
+            if n is not None and 0 <= n < len(estados):
+                Pn[idx] = P[:, n]
+
+        Wq = Lq / ((M - L) * lambda_)
+        resultados = {
+            'ro': np.zeros(total),
+            'P0': P0,
+            'PE': PE,
+            'PNE': PNE,
+            'L': L,
+            'Lq': Lq,
+            'Ln': Lq / PE,
+            'W': Wq + 1 / mu,
+            'Wq': Wq,
+            'Wn': Wq / PE,
+        }
+    if n is not None:
+        resultados[f'P{n}'] = Pn
+    return resultados
+
+
+def _pn_infinita(op, resultados, lambda_, mu, k, n):
+    """Pn para los modelos de población infinita a partir de P0"""
+    if op == 1:
+        return resultados['P0'] * resultados['ro'] ** n
+    if n == 0:
+        return resultados['P0']
+    a = lambda_ / mu
+    log_fact = log_factoriales(max(n, int(k.max())))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_pn = np.where(
+            n <= k,
+            n * np.log(a) - log_fact[n],
+            n * np.log(a) - log_fact[k] - (n - k) * np.log(k),
+        )
+        return resultados['P0'] * np.exp(log_pn)
+
+
+def calcular_lote(op, lambda_, mu, k=1, M=0, n=None,
+                  costo_unitario=None, costo_diario=None, horas_laborables=8):
+    """
+    Calcula en una sola pasada vectorizada las medidas de desempeño de muchos
+    escenarios del mismo modelo.
+
+    Los argumentos numéricos pueden ser escalares o arreglos; se combinan con
+    las reglas de broadcasting de NumPy. Los escenarios inestables o inválidos
+    quedan como NaN en lugar de interrumpir todo el lote.
+
+    Args:
+        op (int): Modelo (1: PICS, 2: PICM, 3: PFCS, 4: PFCM).
+        lambda_, mu: Tasas de llegada y de servicio.
+        k: Número de servidores.
+        M: Tamaño de la población (modelos finitos).
+        n (int, optional): Número de clientes para calcular Pn.
+        costo_unitario, costo_diario, horas_laborables: Parámetros de costos;
+            los costos solo se calculan si se proporciona alguno de los dos primeros.
+
+    Returns:
+        dict: Arreglos columnares con las mismas claves que
+            QueueTheoryCalculator.calculate() (más los costos si aplica).
+    """
+    if op not in [1, 2, 3, 4]:
+        raise ValueError(f"Modelo no válido: {op}")
+
+    calcular_costos = costo_unitario is not None or costo_diario is not None
+    lambda_, mu, k, M, cu, cd, h = np.broadcast_arrays(
+        np.asarray(lambda_, dtype=float),
+        np.asarray(mu, dtype=float),
+        np.asarray(k, dtype=np.int64),
+        np.asarray(0 if M is None else M, dtype=np.int64),
+        np.asarray(0 if costo_unitario is None else costo_unitario, dtype=float),
+        np.asarray(0 if costo_diario is None else costo_diario, dtype=float),
+        np.asarray(horas_laborables, dtype=float),
+    )
+    forma = lambda_.shape
+    lambda_, mu, k, M, cu, cd, h = (np.ravel(x) for x in (lambda_, mu, k, M, cu, cd, h))
+    if np.any(k < 1):
+        raise ValueError("El número de servidores debe ser al menos 1")
+
+    if op == 1:
+        resultados = _pics(lambda_, mu)
+    elif op == 2:
+        resultados = _picm(lambda_, mu, k)
+    else:
+        if np.any(M < 0):
+            raise ValueError("El tamaño de la población no puede ser negativo")
+        k_efectivo = np.ones_like(k) if op == 3 else k
+        resultados = _poblacion_finita(lambda_, mu, k_efectivo, M, n)
+        if op == 3:
+            del resultados['PNE']
+
+    if n is not None and op in [1, 2]:
+        resultados[f'P{n}'] = _pn_infinita(op, resultados, lambda_, mu, k, n)
+
+    if calcular_costos:
+        # Mismas tasas que '_llegadas' en modelos: la efectiva λ(M - L) en población finita
+        llegadas = lambda_ * (M - resultados['L']) if op in [3, 4] else lambda_
+        resultados['CTte'] = llegadas * h * resultados['Wq'] * cu
+        resultados['CTts'] = llegadas * h * resultados['W'] * cu
+        resultados['CTse'] = llegadas * h * (1 / mu) * cu
+        resultados['CTs'] = k * cd
+        resultados['CT'] = resultados['CTts'] + resultados['CTs']
+
+    return {clave: valor.reshape(forma) for clave, valor in resultados.items()}
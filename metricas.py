@@ -0,0 +1,155 @@
+import json
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Límites superiores (segundos) de los buckets de los histogramas de duración
+BUCKETS_SEGUNDOS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histograma:
+    """Histograma de buckets fijos con suma y conteo (formato de Prometheus)"""
+
+    def __init__(self, buckets=BUCKETS_SEGUNDOS):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)  # El último es +Inf
+        self.suma = 0.0
+        self.conteo = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            self.conteos[indice] += 1
+            self.suma += valor
+            self.conteo += 1
+
+    def instantanea(self):
+        """Copia consistente de (conteos acumulados, suma, conteo)"""
+        with self._lock:
+            conteos = list(self.conteos)
+            suma, conteo = self.suma, self.conteo
+        acumulados = []
+        total = 0
+        for c in conteos:
+            total += c
+            acumulados.append(total)
+        return acumulados, suma, conteo
+
+
+def _etiquetas(etiquetas):
+    """Formatea un dict de etiquetas como {clave="valor",...}"""
+    if not etiquetas:
+        return ''
+    partes = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{clave}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+class RegistroMetricas:
+    """
+    Registro de histogramas y contadores por nombre y etiquetas, exportable en
+    el formato de texto de Prometheus.
+    """
+
+    def __init__(self):
+        self._histogramas = {}
+        self._contadores = {}
+        self._ayuda = {}
+        self._lock = threading.Lock()
+
+    def describir(self, nombre, ayuda):
+        self._ayuda[nombre] = ayuda
+
+    def observar(self, nombre, valor, **etiquetas):
+        """Registra una observación en el histograma 'nombre' con las etiquetas dadas"""
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        histograma = self._histogramas.get(clave)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(clave, Histograma())
+        histograma.observar(valor)
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        """Incrementa el contador 'nombre' con las etiquetas dadas"""
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    @contextmanager
+    def cronometro(self, nombre, **etiquetas):
+        """Mide la duración del bloque y la registra en el histograma 'nombre'"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def exponer(self, extras=None):
+        """
+        Devuelve todas las métricas en formato de texto de Prometheus.
+
+        Args:
+            extras (dict, optional): Valores adicionales {nombre: (tipo, valor)}
+                que se exportan sin etiquetas (por ejemplo, los del caché).
+        """
+        lineas = []
+        with self._lock:
+            histogramas = sorted(self._histogramas.items())
+            contadores = sorted(self._contadores.items())
+
+        ultimo = None
+        for (nombre, etiquetas), histograma in histogramas:
+            if nombre != ultimo:
+                if nombre in self._ayuda:
+                    lineas.append(f'# HELP {nombre} {self._ayuda[nombre]}')
+                lineas.append(f'# TYPE {nombre} histogram')
+                ultimo = nombre
+            acumulados, suma, conteo = histograma.instantanea()
+            limites = [repr(b) for b in histograma.buckets] + ['+Inf']
+            for limite, acumulado in zip(limites, acumulados):
+                lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas + (("le", limite),))} {acumulado}')
+            lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {suma}')
+            lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {conteo}')
+
+        ultimo = None
+        for (nombre, etiquetas), valor in contadores:
+            if nombre != ultimo:
+                if nombre in self._ayuda:
+                    lineas.append(f'# HELP {nombre} {self._ayuda[nombre]}')
+                lineas.append(f'# TYPE {nombre} counter')
+                ultimo = nombre
+            lineas.append(f'{nombre}{_etiquetas(etiquetas)} {valor}')
+
+        for nombre, (tipo, valor) in sorted((extras or {}).items()):
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            lineas.append(f'{nombre} {valor}')
+
+        return '\n'.join(lineas) + '\n'
+
+
+class LogMuestreado:
+    """
+    Registro estructurado (una línea JSON por evento) de solo una fracción de
+    los eventos. Con tasa 0 queda desactivado sin costo de serialización.
+    """
+
+    def __init__(self, logger, tasa=0.01):
+        self.logger = logger
+        self.tasa = tasa
+
+    def registrar(self, evento, **campos):
+        if self.tasa <= 0 or (self.tasa < 1 and random.random() >= self.tasa):
+            return
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        campos['event'] = evento
+        self.logger.info(json.dumps(campos, ensure_ascii=False, default=str))
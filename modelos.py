@@ -0,0 +1,496 @@
+import math
+import sys
+import time
+from decimal import DecimalException
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+import alta_precision
+from nacimiento_muerte import momentos, probabilidad, resolver
+from tablas_erlang import consultar as consultar_tabla
+
+MENSAJE_INESTABLE = "El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1."
+MENSAJE_INESTABLE_K = "El sistema no es estable. La tasa de llegada debe ser menor que k por la tasa de servicio."
+
+# Modelos: 1: PICS (M/M/1), 2: PICM (M/M/k), 3: PFCS (M/M/1/M/M),
+# 4: PFCM (M/M/k/M/M), 5: M/M/1/K, 6: M/M/k/K, 7: M/G/1, 8: M/D/1
+
+
+class Parametros(NamedTuple):
+    """Parámetros inmutables de un modelo"""
+    op: int
+    lambda_: float
+    mu: float
+    k: int = 1
+    M: int = 0
+    K: int = 0          # Capacidad del sistema (M/M/1/K, M/M/k/K)
+    sigma: float = 0    # Desviación estándar del tiempo de servicio (M/G/1)
+
+
+class Costos(NamedTuple):
+    """Parámetros de costos"""
+    costo_unitario: float = 0
+    costo_diario: float = 0
+    horas_laborables: float = 8
+
+
+class Resultados(NamedTuple):
+    """
+    Medidas de desempeño de un modelo. Las que no aplican al modelo o no se
+    pidieron quedan en None; los cocientes indefinidos (por ejemplo Ln cuando
+    nadie espera) en NaN.
+    """
+    op: int
+    campos: tuple = ()
+    ro: Optional[float] = None
+    P0: Optional[float] = None
+    L: Optional[float] = None
+    Lq: Optional[float] = None
+    Ln: Optional[float] = None
+    W: Optional[float] = None
+    Wq: Optional[float] = None
+    Wn: Optional[float] = None
+    Pk: Optional[float] = None
+    PE: Optional[float] = None
+    PNE: Optional[float] = None
+    PB: Optional[float] = None
+    lambda_ef: Optional[float] = None
+    n: Optional[int] = None
+    Pn: Optional[float] = None
+    CTte: Optional[float] = None
+    CTts: Optional[float] = None
+    CTse: Optional[float] = None
+    CTs: Optional[float] = None
+    CT: Optional[float] = None
+    metodo: str = 'float'   # 'float', 'alta_precision', 'float_mal_condicionado' o 'tabla'
+    cotas: Optional[dict] = None    # Cotas de error absoluto de las medidas interpoladas de la tabla
+
+    def como_dict(self):
+        """
+        Diccionario con los campos calculados, con las mismas claves y orden que
+        QueueTheoryCalculator.calculate() (Pn aparece como P{n}).
+        """
+        resultados = {}
+        for clave in campos_disponibles(self.op):
+            if clave in self.campos:
+                resultados[f'P{self.n}' if clave == 'Pn' else clave] = getattr(self, clave)
+        return resultados
+
+
+# Medidas que calculate() devuelve para cada modelo (además de ro, P0 y Pn)
+CLAVES_POR_MODELO = {
+    1: ('L', 'Lq', 'Ln', 'W', 'Wq', 'Wn'),
+    2: ('Pk', 'L', 'Lq', 'Ln', 'W', 'Wq', 'Wn'),
+    3: ('PE', 'L', 'Lq', 'Ln', 'W', 'Wq', 'Wn'),
+    4: ('PE', 'PNE', 'L', 'Lq', 'Ln', 'W', 'Wq', 'Wn'),
+    5: ('PE', 'PB', 'lambda_ef', 'L', 'Lq', 'Ln', 'W', 'Wq', 'Wn'),
+    6: ('PE', 'PB', 'lambda_ef', 'L', 'Lq', 'Ln', 'W', 'Wq', 'Wn'),
+    7: ('L', 'Lq', 'Ln', 'W', 'Wq', 'Wn'),
+    8: ('L', 'Lq', 'Ln', 'W', 'Wq', 'Wn'),
+}
+CLAVES_COSTOS = ('CTte', 'CTts', 'CTse', 'CTs', 'CT')
+
+
+def campos_disponibles(op):
+    """Campos que se pueden pedir para un modelo, en el orden de calculate()"""
+    pn = ('Pn',) if 'Pn' in MODELOS[op] else ()
+    return ('ro', 'P0') + pn + CLAVES_POR_MODELO[op] + CLAVES_COSTOS
+
+
+def campos_por_defecto(op, n=None, costos=False):
+    """Campos que calculate() devuelve: ro, P0, Pn (si hay n), las medidas del modelo y los costos"""
+    pn = ('Pn',) if n is not None and 'Pn' in MODELOS[op] else ()
+    return ('ro', 'P0') + pn + CLAVES_POR_MODELO[op] + (CLAVES_COSTOS if costos else ())
+
+
+def _cociente(a, b):
+    """a / b, o NaN si b es 0"""
+    return a / b if b else math.nan
+
+
+def servidores(p):
+    """Número de servidores efectivo según el modelo"""
+    return p.k if p.op in [2, 4, 6] else 1
+
+
+def _validar(p):
+    """Lanza ValueError si los parámetros no tienen sentido para el modelo"""
+    if not p.mu > 0:
+        raise ValueError("La tasa de servicio debe ser positiva")
+    if p.lambda_ < 0:
+        raise ValueError("La tasa de llegada no puede ser negativa")
+    if p.op in [2, 4, 6] and p.k < 1:
+        raise ValueError("El número de servidores debe ser al menos 1")
+    if p.op in [3, 4] and p.M < 1:
+        raise ValueError("Los modelos de población finita requieren M")
+
+
+def _verificar_estabilidad(p):
+    """Lanza ValueError si un modelo de población infinita no es estable (comparación exacta)"""
+    if not alta_precision.estable(p):
+        raise ValueError(MENSAJE_INESTABLE if p.op == 1 else MENSAJE_INESTABLE_K)
+
+
+# --------------------- TASAS DE NACIMIENTO Y MUERTE ---------------------
+# Cada función devuelve los argumentos de nacimiento_muerte.resolver
+
+def _tasas_poblacion_infinita(p):
+    """M/M/1 y M/M/k: estados 0..k y cola geométrica de razón λ/kμ"""
+    k = servidores(p)
+    _verificar_estabilidad(p)
+    return np.full(k, float(p.lambda_)), p.mu * np.arange(1, k + 1), p.lambda_ / (k * p.mu)
+
+
+def _tasas_poblacion_finita(p):
+    """M/M/k/M/M: λn = (M - n) λ, μn = min(n, k) μ"""
+    n = np.arange(p.M)
+    return (p.M - n) * float(p.lambda_), np.minimum(n + 1, servidores(p)) * float(p.mu)
+
+
+def _tasas_capacidad_finita(p):
+    """M/M/k/K: λn = λ para n < K, μn = min(n, k) μ"""
+    k = servidores(p)
+    if p.K < k:
+        raise ValueError("La capacidad K debe ser mayor o igual que el número de servidores")
+    n = np.arange(p.K)
+    return np.full(p.K, float(p.lambda_)), np.minimum(n + 1, k) * float(p.mu)
+
+
+def log_factoriales(n_max):
+    """Devuelve el vector log(n!) para n = 0..n_max"""
+    tabla = np.zeros(n_max + 1)
+    if n_max > 0:
+        tabla[1:] = np.cumsum(np.log(np.arange(1, n_max + 1)))
+    return tabla
+
+
+def distribucion_poblacion_finita(lambda_, mu, k, M):
+    """
+    Calcula la distribución de estados [P0, ..., PM] de un modelo de población
+    finita con k servidores (M/M/k/M/M) con el resolvedor de nacimiento y
+    muerte.
+
+    Args:
+        lambda_ (float): Tasa de llegada por cliente de la población.
+        mu (float): Tasa de servicio.
+        k (int): Número de servidores.
+        M (int): Tamaño de la población.
+
+    Returns:
+        list: Probabilidades P0..PM.
+    """
+    cadena = resolver(*_tasas_poblacion_finita(Parametros(4, lambda_, mu, k, M)))
+    return cadena.P.tolist()
+
+
+# --------------------- MODELOS ---------------------
+# Cada modelo es un grafo de dependencias {medida: función(v)}, donde v es la
+# Evaluacion en curso: una función obtiene sus entradas con v['otra_medida'],
+# que se calculan bajo demanda y una sola vez. Las entradas internas (que no
+# son campos de Resultados) empiezan con '_'.
+
+def _pn(v):
+    if v.n is None:
+        raise ValueError("Pn requiere el número de clientes n")
+    return probabilidad(v['_cadena'], v.n)
+
+
+def _costos(v):
+    if v.costos is None:
+        raise ValueError("Los campos de costos requieren los parámetros de costos")
+    return v.costos
+
+
+def _holgura_mg1(v):
+    """1 - ρ de M/G/1, que solo existe si el sistema es estable"""
+    if not v.p.lambda_ / v.p.mu < 1:
+        raise ValueError(MENSAJE_INESTABLE)
+    if v.p.sigma < 0:
+        raise ValueError("La desviación estándar del tiempo de servicio no puede ser negativa")
+    return 1 - v.p.lambda_ / v.p.mu
+
+
+def _metodo_alta_precision(v):
+    """
+    'alta_precision' si el cálculo en decimal es viable y termina bien; si
+    no (demasiados estados o error de la aritmética decimal), se conservan
+    los valores en punto flotante con 'float_mal_condicionado'
+    """
+    if not alta_precision.disponible(v.p):
+        return 'float_mal_condicionado'
+    try:
+        v['_alta_precision']
+    except DecimalException:
+        return 'float_mal_condicionado'
+    return 'alta_precision'
+
+
+def _metodo_poblacion_infinita(v):
+    _verificar_estabilidad(v.p)
+    return _metodo_alta_precision(v) if alta_precision.mal_condicionado(v.p) else 'float'
+
+
+def _metodo_picm(v):
+    metodo = _metodo_poblacion_infinita(v)
+    return 'tabla' if metodo == 'float' and v['_tabla'] else metodo
+
+
+# Error relativo de redondeo de las pocas operaciones en punto flotante con
+# las que se obtiene cada medida a partir de la tabla
+REDONDEO_TABLA = 8 * sys.float_info.epsilon
+
+
+def _cotas_tabla(v):
+    """
+    Cotas de error absoluto de las medidas de PICM que salen de la tabla:
+    las de P(espera) y P0 son las de la interpolación, y L, Lq, W y Wq son
+    lineales en P(espera). A cada una se suma el redondeo de las operaciones
+    que la forman (por ejemplo L = Lq + a, W = Wq + 1/μ), que domina cuando
+    la interpolación es casi exacta.
+    """
+    tabla = v['_tabla']
+    cota_Lq = tabla.cota_C * v['ro'] / (1 - v['ro'])
+    cota_Wq = tabla.cota_C / (v.p.k * v.p.mu - v.p.lambda_)
+    cotas = {'P0': tabla.cota_P0, 'Pk': tabla.cota_C, 'L': cota_Lq, 'Lq': cota_Lq, 'W': cota_Wq, 'Wq': cota_Wq}
+    return {clave: cota + REDONDEO_TABLA * abs(v[clave]) for clave, cota in cotas.items()}
+
+
+def _metodo_poblacion_finita(v):
+    return _metodo_alta_precision(v) if alta_precision.mal_condicionado(v.p, v['_momentos'][0]) else 'float'
+
+
+def _con_alta_precision(grafo, claves):
+    """
+    Copia de 'grafo' en la que las medidas 'claves' se toman del cálculo en
+    precisión arbitraria cuando '_metodo' indica que el cálculo en punto
+    flotante está mal condicionado.
+    """
+    def nodo(clave, calculo):
+        def evaluar_nodo(v):
+            if v['_metodo'] == 'alta_precision':
+                return v['_alta_precision'][clave]
+            return calculo(v)
+        return evaluar_nodo
+
+    return {
+        **grafo,
+        **{clave: nodo(clave, grafo[clave]) for clave in claves},
+        '_alta_precision': lambda v: alta_precision.medidas(v.p),
+    }
+
+
+# Comunes a todos los modelos; '_llegadas' es la tasa que se usa en los costos
+_COMUNES = {
+    '_llegadas': lambda v: v.p.lambda_,
+    '_costos': _costos,
+    'CTte': lambda v: v['_llegadas'] * v['_costos'].horas_laborables * v['Wq'] * v['_costos'].costo_unitario,
+    'CTts': lambda v: v['_llegadas'] * v['_costos'].horas_laborables * v['W'] * v['_costos'].costo_unitario,
+    'CTse': lambda v: v['_llegadas'] * v['_costos'].horas_laborables * (1 / v.p.mu) * v['_costos'].costo_unitario,
+    'CTs': lambda v: v.p.k * v['_costos'].costo_diario,
+    'CT': lambda v: v['CTts'] + v['CTs'],
+}
+
+# Modelos de nacimiento y muerte: solo cambian las tasas y las medidas propias
+_NACIMIENTO_MUERTE = {
+    **_COMUNES,
+    '_cadena': lambda v: resolver(*v['_tasas']),
+    '_P': lambda v: v['_cadena'].P,
+    '_momentos': lambda v: momentos(v['_cadena'], servidores(v.p)),
+    '_P_espera': lambda v: v['_momentos'][2],  # P(n >= k)
+    'P0': lambda v: float(v['_P'][0]),
+    'Pn': _pn,
+    'L': lambda v: v['_momentos'][0],
+    'Lq': lambda v: v['_momentos'][1],
+    'Ln': lambda v: _cociente(v['Lq'], v['_P_espera']),
+    'W': lambda v: v['Wq'] + 1 / v.p.mu,
+    'Wn': lambda v: _cociente(v['Wq'], v['_P_espera']),
+}
+
+# M/M/1 y M/M/k: Wq = P(espera) / (kμ - λ)
+_POBLACION_INFINITA = {
+    **_NACIMIENTO_MUERTE,
+    '_tasas': lambda v: _tasas_poblacion_infinita(v.p),
+    '_metodo': _metodo_poblacion_infinita,
+    'Wq': lambda v: v['_P_espera'] / (servidores(v.p) * v.p.mu - v.p.lambda_),
+}
+
+_PICS = _con_alta_precision({
+    **_POBLACION_INFINITA,
+    'ro': lambda v: v.p.lambda_ / v.p.mu,
+}, ['P0', '_P_espera', 'L', 'Lq', 'Wq'])
+
+# Si hay tablas de Erlang cargadas y (k, λ/μ) está en la rejilla, P(espera),
+# P0, L y Lq salen de la tabla sin resolver la cadena ('_metodo' = 'tabla',
+# con las cotas de error en '_cotas')
+_PICM = _con_alta_precision({
+    **_POBLACION_INFINITA,
+    '_metodo': _metodo_picm,
+    '_tabla': lambda v: consultar_tabla(v.p.k, v.p.lambda_ / v.p.mu),
+    '_cotas': _cotas_tabla,
+    '_P_espera': lambda v: v['_tabla'].C if v['_tabla'] else v['_momentos'][2],
+    'ro': lambda v: v.p.lambda_ / (v.p.k * v.p.mu),
+    'P0': lambda v: v['_tabla'].P0 if v['_tabla'] else float(v['_P'][0]),
+    'Lq': lambda v: v['_P_espera'] * v['ro'] / (1 - v['ro']) if v['_tabla'] else v['_momentos'][1],
+    'L': lambda v: v['Lq'] + v.p.lambda_ / v.p.mu if v['_tabla'] else v['_momentos'][0],
+    'Pk': lambda v: v['_P_espera'],
+}, ['P0', '_P_espera', 'L', 'Lq', 'Wq'])
+
+# M/M/1/M/M y M/M/k/M/M
+_POBLACION_FINITA = _con_alta_precision({
+    **_NACIMIENTO_MUERTE,
+    '_tasas': lambda v: _tasas_poblacion_finita(v.p),
+    '_metodo': _metodo_poblacion_finita,
+    'ro': lambda v: 0,
+    'PE': lambda v: v['_P_espera'],
+    # P(n < k) sumada directamente: 1 - PE pierde dígitos cuando PE ≈ 1
+    'PNE': lambda v: float(v['_P'][:servidores(v.p)].sum()),
+    # Tasa efectiva λ(M - L): con ella los costos de espera son horas · L · cu,
+    # igual que la integral de L(t) del análisis transitorio
+    '_llegadas': lambda v: (v.p.M - v['L']) * v.p.lambda_,
+    'Wq': lambda v: _cociente(v['Lq'], v['_llegadas']),
+}, ['P0', '_P_espera', 'PNE', 'L', 'Lq', 'Wq'])
+
+# M/M/1/K y M/M/k/K: las llegadas que encuentran el sistema lleno se pierden
+_CAPACIDAD_FINITA = {
+    **_NACIMIENTO_MUERTE,
+    '_tasas': lambda v: _tasas_capacidad_finita(v.p),
+    '_llegadas': lambda v: v['lambda_ef'],
+    'ro': lambda v: v.p.lambda_ / (servidores(v.p) * v.p.mu),
+    'PE': lambda v: v['_P_espera'],
+    'PB': lambda v: float(v['_P'][-1]),
+    'lambda_ef': lambda v: v.p.lambda_ * (1 - v['PB']),
+    'Wq': lambda v: _cociente(v['Lq'], v['lambda_ef']),
+}
+
+# M/G/1 (Pollaczek-Khinchine): Wq = λ E[S²] / (2 (1 - ρ)), E[S²] = σ² + 1/μ²
+_MG1 = {
+    **_COMUNES,
+    '_holgura': _holgura_mg1,
+    '_varianza': lambda v: 0.0 if v.p.op == 8 else v.p.sigma ** 2,
+    'ro': lambda v: v.p.lambda_ / v.p.mu,
+    'P0': lambda v: v['_holgura'],
+    'Wq': lambda v: v.p.lambda_ * (v['_varianza'] + 1 / v.p.mu ** 2) / (2 * v['_holgura']),
+    'Lq': lambda v: v.p.lambda_ * v['Wq'],
+    'L': lambda v: v['Lq'] + v['ro'],
+    'Ln': lambda v: _cociente(v['Lq'], v['ro']),
+    'W': lambda v: v['Wq'] + 1 / v.p.mu,
+    'Wn': lambda v: _cociente(v['Wq'], v['ro']),
+}
+
+# Tabla de despacho: grafo de dependencias de cada modelo
+MODELOS = {
+    1: _PICS,
+    2: _PICM,
+    3: _POBLACION_FINITA,
+    4: _POBLACION_FINITA,
+    5: _CAPACIDAD_FINITA,
+    6: _CAPACIDAD_FINITA,
+    7: _MG1,
+    8: _MG1,  # M/D/1: M/G/1 con σ = 0
+}
+
+
+def nombre_calculo(nombre):
+    """Nombre con el que se informa la duración de un nodo: 'Wq' -> 'calcular_Wq', '_cadena' -> 'calcular_cadena'"""
+    return 'calcular_' + nombre.lstrip('_')
+
+
+class Evaluacion(dict):
+    """
+    Evaluación perezosa de un modelo: v['Wq'] calcula Wq y solo las medidas de
+    las que depende, cada una una sola vez, y las guarda. Se crea una por
+    petición, por lo que no hay estado compartido entre hilos.
+
+    Si se indica medidor(nombre, segundos), se le informa la duración de cada
+    nodo que se calcula, sin contar la de los nodos de los que depende (que
+    se informan aparte).
+    """
+
+    def __init__(self, p, n=None, costos=None, medidor=None):
+        super().__init__()
+        if p.op not in MODELOS:
+            raise ValueError(f"Modelo no válido: {p.op}")
+        _validar(p)
+        self.p = p
+        self.n = n
+        self.costos = costos
+        self.grafo = MODELOS[p.op]
+        self.medidor = medidor
+        self._tiempo_dependencias = 0.0
+
+    def __missing__(self, nombre):
+        if self.medidor is None:
+            valor = self.grafo[nombre](self)
+        else:
+            valor = self._calcular_medido(nombre)
+        self[nombre] = valor
+        return valor
+
+    def _calcular_medido(self, nombre):
+        anterior = self._tiempo_dependencias
+        self._tiempo_dependencias = 0.0
+        inicio = time.perf_counter()
+        try:
+            valor = self.grafo[nombre](self)
+        finally:
+            total = time.perf_counter() - inicio
+            propio = total - self._tiempo_dependencias
+            self._tiempo_dependencias = anterior + total
+        self.medidor(nombre, propio)
+        return valor
+
+    def resultados(self, campos=None):
+        """
+        Resultados con los campos pedidos. Por defecto, los mismos que
+        calculate(): ro, P0, Pn (si hay n), las medidas del modelo y los costos
+        (si hay parámetros de costos).
+        """
+        if campos is None:
+            campos = campos_por_defecto(self.p.op, self.n, self.costos is not None)
+        else:
+            disponibles = campos_disponibles(self.p.op)
+            for campo in campos:
+                if campo not in disponibles:
+                    raise ValueError(f"Campo no válido para este modelo: {campo}")
+            campos = tuple(campos)
+        valores = {c: self[c] for c in campos}
+        # Método con el que se calcularon los campos pedidos y, si salieron de
+        # la tabla de Erlang, sus cotas de error
+        metodo = self.get('_metodo', 'float')
+        cotas = None
+        if metodo == 'tabla':
+            cotas = {c: cota for c, cota in self['_cotas'].items() if c in campos}
+        return Resultados(op=self.p.op, campos=campos, n=self.n, metodo=metodo, cotas=cotas, **valores)
+
+
+def evaluar(p, n=None, costos=None, campos=None):
+    """
+    Evalúa un modelo sin estado compartido; se puede llamar desde varios hilos
+    a la vez.
+
+    Args:
+        p (Parametros): Parámetros del modelo.
+        n (int, optional): Número de clientes para calcular Pn.
+        costos (Costos, optional): Si se indica, también se calculan los costos.
+        campos (list, optional): Medidas a calcular (por ejemplo ['Wq']); solo
+            se evalúan esas y las que necesitan.
+
+    Returns:
+        Resultados: Las medidas calculadas.
+    """
+    return Evaluacion(p, n, costos).resultados(campos)
+
+
+def evaluar_con_tiempos(p, n=None, costos=None, campos=None):
+    """
+    Como evaluar(), pero devuelve también la duración de cada nodo calculado
+    (ver Evaluacion), para registrarla aunque el cálculo se haga en otro
+    proceso.
+
+    Returns:
+        tuple: (Resultados, {nombre: segundos})
+    """
+    tiempos = {}
+    resultados = Evaluacion(p, n, costos, medidor=tiempos.__setitem__).resultados(campos)
+    return resultados, tiempos
@@ -0,0 +1,105 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Cadena(NamedTuple):
+    """
+    Distribución estacionaria de una cadena de nacimiento y muerte.
+
+    P contiene P0..PN. Si la cadena tiene cola geométrica, los estados n > N
+    cumplen Pn = PN · razon_cola^(n - N) y suman P_cola.
+    """
+    P: np.ndarray
+    nacimientos: np.ndarray
+    P_cola: float = 0.0
+    razon_cola: float = 0.0
+
+
+def resolver(nacimientos, muertes, razon_cola=None):
+    """
+    Resuelve en O(N) una cadena de nacimiento y muerte con tasas dependientes
+    del estado.
+
+    Usa el producto de las razones de tasas en escala logarítmica,
+        log Pn = log P0 + Σ_{m=1..n} log(λ_{m-1} / μ_m),
+    y normaliza con el máximo, por lo que no hay desbordamiento aunque N sea
+    del orden de 10^6. Una tasa de nacimiento 0 corta la cadena (los estados
+    siguientes tienen probabilidad 0).
+
+    Args:
+        nacimientos: Tasas λ0..λ_{N-1} (de n a n + 1).
+        muertes: Tasas μ1..μN (de n a n - 1), todas positivas.
+        razon_cola (float, optional): Si se indica, la cadena continúa sin fin
+            después de N con Pn+1 = razon_cola · Pn (por ejemplo λ / kμ en
+            M/M/k a partir de n = k); debe ser menor que 1.
+
+    Returns:
+        Cadena: P0..PN y, si aplica, la probabilidad de la cola geométrica.
+    """
+    nacimientos = np.asarray(nacimientos, dtype=float)
+    muertes = np.asarray(muertes, dtype=float)
+    if nacimientos.shape != muertes.shape:
+        raise ValueError("Se requiere el mismo número de tasas de nacimiento y de muerte")
+    if np.any(muertes <= 0):
+        raise ValueError("Las tasas de muerte deben ser positivas")
+    if razon_cola is not None and not 0 <= razon_cola < 1:
+        raise ValueError("El sistema no es estable. La razón de la cola geométrica debe ser menor que 1.")
+
+    with np.errstate(divide='ignore'):
+        incrementos = np.log(nacimientos) - np.log(muertes)
+    log_pesos = np.concatenate(([0.0], np.cumsum(incrementos)))
+    pesos = np.exp(log_pesos - log_pesos.max())
+
+    cola = 0.0
+    if razon_cola:
+        cola = pesos[-1] * razon_cola / (1 - razon_cola)
+    total = pesos.sum() + cola
+    return Cadena(pesos / total, nacimientos, cola / total, razon_cola or 0.0)
+
+
+def momentos(cadena, k):
+    """
+    (L, Lq, P(n >= k)) de la cadena, incluida la cola geométrica si la hay
+    (en ese caso se requiere N >= k).
+    """
+    P = cadena.P
+    N = len(P) - 1
+    n = np.arange(N + 1)
+    L = float(P @ n)
+    Lq = float(P[k:] @ n[:N + 1 - k]) if k <= N else 0.0
+    P_espera = float(P[k:].sum()) if k <= N else 0.0
+
+    if cadena.P_cola:
+        r = cadena.razon_cola
+        # Σ_{j>=1} (N + j - k) PN r^j = PN [(N - k) r / (1 - r) + r / (1 - r)^2]
+        base = P[-1] * r / (1 - r)
+        extra = P[-1] * r / (1 - r) ** 2
+        L += N * base + extra
+        Lq += (N - k) * base + extra
+        P_espera += cadena.P_cola
+    return float(L), float(Lq), float(P_espera)
+
+
+def probabilidad(cadena, n):
+    """Pn de la cadena para cualquier n >= 0"""
+    N = len(cadena.P) - 1
+    if n < 0:
+        return 0
+    if n <= N:
+        return float(cadena.P[n])
+    if cadena.P_cola:
+        return float(cadena.P[-1] * math.exp((n - N) * math.log(cadena.razon_cola)))
+    return 0
+
+
+def extender(cadena, N):
+    """P0..PN como arreglo, continuando la cola geométrica si N supera los estados resueltos"""
+    resueltos = len(cadena.P) - 1
+    if N <= resueltos:
+        return cadena.P[:N + 1].copy()
+    extra = np.zeros(N - resueltos)
+    if cadena.P_cola:
+        extra = cadena.P[-1] * np.exp(np.arange(1, N - resueltos + 1) * math.log(cadena.razon_cola))
+    return np.concatenate((cadena.P, extra))
@@ -0,0 +1,168 @@
+import math
+import sys
+
+from teoria_de_colas import QueueTheoryCalculator
+
+
+def erlang_b_sucesivos(a, k_inicial=1):
+    """
+    Genera (k, B(k, a)) para k = k_inicial, k_inicial + 1, ... B(k_inicial)
+    se evalúa directamente con erlang_b (O(√a)) y los siguientes con la
+    recurrencia de Erlang B:
+        B(k) = a * B(k-1) / (k + a * B(k-1))
+    Cada paso de k a k+1 cuesta O(1).
+
+    Args:
+        a (float): Carga ofrecida λ/μ.
+        k_inicial (int): Primer número de servidores a generar.
+    """
+    k = k_inicial
+    B = erlang_b(k, a)
+    while True:
+        yield k, B
+        k += 1
+        B = a * B / (k + a * B)
+
+
+def erlang_b(k, a):
+    """
+    Erlang B(k, a) evaluada directamente, sin recorrer la recurrencia desde
+    k = 0:
+        B(k, a) = (a^k / k!) / Σ_{i=0}^{k} a^i / i!
+    Los términos se suman relativos al mayor (i = min(k, ⌊a⌋)) y se cortan
+    cuando ya no cambian la suma, de modo que el costo es O(√a) y no hay
+    desbordamiento para cargas grandes. Si B es despreciable frente a la
+    suma se calcula en escala logarítmica (y puede ser 0.0).
+    """
+    if a == 0:
+        return 1.0 if k == 0 else 0.0
+    m = min(k, math.floor(a))
+    suma = termino = 1.0
+    for i in range(m, 0, -1):
+        termino *= i / a
+        suma += termino
+        if termino < suma * sys.float_info.epsilon:
+            break
+    termino = 1.0
+    for i in range(m + 1, k + 1):
+        termino *= a / i
+        suma += termino
+        if termino < suma * sys.float_info.epsilon:
+            return math.exp((k - m) * math.log(a) - math.lgamma(k + 1) + math.lgamma(m + 1) - math.log(suma))
+    return termino / suma
+
+
+def erlang_c(k, a, B):
+    """Probabilidad de espera de Erlang C a partir de Erlang B (requiere a < k)"""
+    return k * B / (k - a * (1 - B))
+
+
+def _medidas_picm(lambda_, mu, k, B):
+    """Medidas de M/M/k a partir de Erlang B para k servidores"""
+    a = lambda_ / mu
+    C = erlang_c(k, a, B)
+    Wq = C / (k * mu - lambda_)
+    return {'P_espera': C, 'Wq': Wq, 'W': Wq + 1 / mu, 'Lq': lambda_ * Wq, 'L': lambda_ * Wq + a}
+
+
+def _medidas_pfcm(calculadora, k):
+    """
+    Medidas de M/M/k/M/M para k servidores. La distribución depende de k, así
+    que la cadena se resuelve de nuevo para cada k (O(M)); las medidas de un
+    mismo k comparten esa solución en la evaluación de la calculadora.
+    """
+    calculadora.k = k
+    Wq = calculadora.calcular_Wq()
+    return {'P_espera': calculadora.calcular_PE(), 'Wq': Wq, 'W': Wq + 1 / calculadora.mu,
+            'Lq': calculadora.calcular_Lq(), 'L': calculadora.calcular_L()}
+
+
+def optimizar_servidores(lambda_, mu, op=2, M=None, costo_unitario=0, costo_diario=0,
+                         horas_laborables=8, Wq_max=None, P_espera_max=None, k_max=10000):
+    """
+    Busca el número de servidores k para un modelo PICM (op 2) o PFCM (op 4).
+
+    Si se indica Wq_max y/o P_espera_max devuelve el menor k que cumple todas
+    las metas; si no, devuelve el k de costo total mínimo
+        CT(k) = λ * horas * W(k) * costo_unitario + k * costo_diario
+    (las mismas fórmulas que calcular_CTts + calcular_CTs; en PFCM λ es la
+    tasa efectiva λ(M - L(k))).
+
+    Para PICM se parte del primer k estable, evaluando Erlang B directamente
+    en O(√a), y se sigue con la recurrencia de Erlang B/C, de modo que pasar
+    de k a k+1 cuesta O(1). La búsqueda de costo se detiene en cuanto la cota inferior
+    L_min * horas * costo_unitario + k * costo_diario alcanza el mejor costo,
+    con L_min = λ/μ (PICM) o Mλ/(λ + μ), el L sin cola de PFCM.
+
+    Args:
+        lambda_ (float): Tasa de llegada.
+        mu (float): Tasa de servicio.
+        op (int): 2 (PICM) o 4 (PFCM).
+        M (int, optional): Tamaño de la población (solo PFCM).
+        costo_unitario, costo_diario, horas_laborables: Parámetros de costos.
+        Wq_max (float, optional): Tiempo máximo de espera en cola.
+        P_espera_max (float, optional): Probabilidad máxima de esperar.
+        k_max (int): Máximo número de servidores a evaluar.
+
+    Returns:
+        dict: k elegido, sus medidas (Wq, W, L, Lq, P_espera, CT) y el número
+            de valores de k evaluados.
+    """
+    if op not in [2, 4]:
+        raise ValueError("La optimización de servidores solo aplica a PICM y PFCM")
+    if mu <= 0 or lambda_ < 0:
+        raise ValueError("Las tasas deben ser positivas")
+    if op == 4 and not M:
+        raise ValueError("El modelo PFCM requiere el tamaño de la población M")
+
+    por_meta = Wq_max is not None or P_espera_max is not None
+    L_min = lambda_ / mu if op == 2 else M * lambda_ / (lambda_ + mu)
+    costo_espera_min = L_min * horas_laborables * costo_unitario
+
+    def costo_total(medidas, k):
+        llegadas = lambda_ if op == 2 else lambda_ * (M - medidas['L'])
+        return llegadas * horas_laborables * medidas['W'] * costo_unitario + k * costo_diario
+
+    def cumple(medidas):
+        return ((Wq_max is None or medidas['Wq'] <= Wq_max) and
+                (P_espera_max is None or medidas['P_espera'] <= P_espera_max))
+
+    if op == 2:
+        # Primer k estable: k > λ/μ
+        k_inicial = math.floor(lambda_ / mu) + 1
+        if k_inicial > k_max:
+            raise ValueError(f"Se necesitan más de {k_max} servidores para que el sistema sea estable")
+        candidatos = ((k, _medidas_picm(lambda_, mu, k, B))
+                      for k, B in erlang_b_sucesivos(lambda_ / mu, k_inicial))
+    else:
+        calculadora = QueueTheoryCalculator()
+        calculadora.set_parameters(lambda_=lambda_, mu=mu, k=1, M=M, op=4)
+        # Con k >= M ningún cliente espera; no tiene sentido buscar más allá
+        k_max = min(k_max, M)
+        candidatos = ((k, _medidas_pfcm(calculadora, k)) for k in range(1, k_max + 1))
+
+    mejor = None
+    evaluados = 0
+    for k, medidas in candidatos:
+        if k > k_max:
+            break
+        evaluados += 1
+        medidas['CT'] = costo_total(medidas, k)
+
+        if por_meta:
+            if cumple(medidas):
+                mejor = (k, medidas)
+                break
+        else:
+            if mejor is None or medidas['CT'] < mejor[1]['CT']:
+                mejor = (k, medidas)
+            # Ningún k mayor puede mejorar el costo en más que una tolerancia relativa
+            if costo_espera_min + (k + 1) * costo_diario >= mejor[1]['CT'] * (1 - 1e-12):
+                break
+
+    if mejor is None:
+        # Solo ocurre al buscar por metas: la búsqueda de costo siempre tiene candidatos
+        raise ValueError(f"Ningún número de servidores hasta k = {k_max} cumple las metas")
+
+    k, medidas = mejor
+    return dict(k=k, evaluados=evaluados, **medidas)
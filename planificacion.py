@@ -0,0 +1,152 @@
+import math
+import sys
+
+from optimizacion import erlang_b, erlang_c
+
+# Número máximo de servidores por intervalo
+K_MAXIMO = 100000
+
+
+class _EstadoErlang:
+    """
+    Erlang B(k, a) para una carga a fija, que se mueve de k a k ± 1 en O(1):
+        B(k + 1) = a B(k) / (k + 1 + a B(k))
+        B(k - 1) = k B(k) / (a (1 - B(k)))
+    El estado inicial se evalúa directamente con erlang_b. Si B cae por
+    debajo del menor float normal ya no tiene precisión para bajar, y el
+    paso hacia abajo se vuelve a evaluar directamente.
+    """
+
+    def __init__(self, a, k):
+        self.a = a
+        self.k = k
+        self.B = erlang_b(k, a)
+
+    def subir(self):
+        self.k += 1
+        self.B = self.a * self.B / (self.k + self.a * self.B)
+
+    def bajar(self):
+        if self.B < sys.float_info.min:
+            self.B = erlang_b(self.k - 1, self.a)
+        else:
+            self.B = self.k * self.B / (self.a * (1 - self.B))
+        self.k -= 1
+
+def planificar_personal(tasas, mu, duracion=0.25, costo_unitario=0, costo_diario=0,
+                        horas_laborables=8, Wq_max=None, P_espera_max=None,
+                        tiempo_servicio=None, nivel_servicio=None, k_max=K_MAXIMO):
+    """
+    Plan de servidores para un perfil de demanda por intervalos (por ejemplo
+    de 15 minutos), tratando cada intervalo como un M/M/k estacionario e
+    independiente de los demás (aproximación SIPP).
+
+    Si se indica alguna meta (Wq_max, P_espera_max o el nivel de servicio
+    P(Wq <= tiempo_servicio) >= nivel_servicio) se elige en cada intervalo el
+    menor k que las cumple todas; si no, el k de costo mínimo
+        CT = λ · duracion · W(k) · costo_unitario + k · duracion · costo_diario / horas_laborables
+    (el costo diario por servidor se reparte entre las horas laborables).
+
+    Cada intervalo parte del k del intervalo anterior: evalúa Erlang B en ese
+    k directamente (O(√a)) y sube o baja con la recurrencia, de modo que un
+    perfil que cambia poco entre intervalos solo mueve k unos pocos pasos.
+
+    Args:
+        tasas (list): Tasa de llegada λ de cada intervalo.
+        mu (float): Tasa de servicio.
+        duracion (float): Duración de cada intervalo, en las mismas unidades
+            de tiempo que las tasas (por defecto 0.25 horas).
+        costo_unitario, costo_diario, horas_laborables: Parámetros de costos.
+        Wq_max, P_espera_max (float, optional): Metas de espera.
+        tiempo_servicio, nivel_servicio (float, optional): Meta de nivel de
+            servicio; se deben indicar juntos.
+        k_max (int): Máximo número de servidores por intervalo.
+
+    Returns:
+        dict: k, Wq, P_espera y CT de cada intervalo, el costo total del
+            perfil y las horas-servidor.
+    """
+    if mu <= 0:
+        raise ValueError("La tasa de servicio debe ser positiva")
+    if duracion <= 0:
+        raise ValueError("La duración de los intervalos debe ser positiva")
+    if any(lambda_ < 0 for lambda_ in tasas):
+        raise ValueError("Las tasas de llegada no pueden ser negativas")
+    if (tiempo_servicio is None) != (nivel_servicio is None):
+        raise ValueError("El nivel de servicio requiere el tiempo y el nivel")
+    if nivel_servicio is not None and not 0 < nivel_servicio < 1:
+        raise ValueError("El nivel de servicio debe estar entre 0 y 1")
+
+    por_meta = Wq_max is not None or P_espera_max is not None or nivel_servicio is not None
+    costo_servidor = duracion * costo_diario / horas_laborables
+
+    def medidas(estado, lambda_):
+        k = estado.k
+        C = erlang_c(k, estado.a, estado.B)
+        Wq = C / (k * mu - lambda_)
+        CT = lambda_ * duracion * (Wq + 1 / mu) * costo_unitario + k * costo_servidor
+        return C, Wq, CT
+
+    def cumple(estado, lambda_):
+        C, Wq, _ = medidas(estado, lambda_)
+        if Wq_max is not None and Wq > Wq_max:
+            return False
+        if P_espera_max is not None and C > P_espera_max:
+            return False
+        if nivel_servicio is not None:
+            return 1 - C * math.exp(-(estado.k * mu - lambda_) * tiempo_servicio) >= nivel_servicio
+        return True
+
+    plan = []
+    k_anterior = 1
+    for lambda_ in tasas:
+        if lambda_ == 0:
+            plan.append({'lambda': lambda_, 'k': 0, 'Wq': 0.0, 'P_espera': 0.0, 'CT': 0.0})
+            continue
+
+        a = lambda_ / mu
+        estable = math.floor(a) + 1
+        if estable > k_max:
+            raise ValueError(f"Se necesitan más de {k_max} servidores para λ = {lambda_}")
+        estado = _EstadoErlang(a, max(k_anterior, estable))
+
+        if por_meta:
+            if cumple(estado, lambda_):
+                while estado.k > estable:
+                    estado.bajar()
+                    if not cumple(estado, lambda_):
+                        estado.subir()
+                        break
+            else:
+                while not cumple(estado, lambda_):
+                    if estado.k >= k_max:
+                        raise ValueError(f"Ningún número de servidores hasta k = {k_max} cumple las metas para λ = {lambda_}")
+                    estado.subir()
+        else:
+            # CT(k) es convexa en k: se baja o se sube mientras mejore
+            costo = medidas(estado, lambda_)[2]
+            while estado.k > estable:
+                estado.bajar()
+                nuevo = medidas(estado, lambda_)[2]
+                if nuevo >= costo:
+                    estado.subir()
+                    break
+                costo = nuevo
+            while estado.k < k_max:
+                estado.subir()
+                nuevo = medidas(estado, lambda_)[2]
+                if nuevo >= costo:
+                    estado.bajar()
+                    break
+                costo = nuevo
+
+        C, Wq, CT = medidas(estado, lambda_)
+        plan.append({'lambda': lambda_, 'k': estado.k, 'Wq': Wq, 'P_espera': C, 'CT': CT})
+        k_anterior = estado.k
+
+    return {
+        'intervalos': plan,
+        'k': [intervalo['k'] for intervalo in plan],
+        'CT_total': sum(intervalo['CT'] for intervalo in plan),
+        'horas_servidor': sum(intervalo['k'] for intervalo in plan) * duracion,
+    }
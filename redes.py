@@ -0,0 +1,190 @@
+import warnings
+from collections import deque
+
+import numpy as np
+
+from lotes import calcular_lote
+
+try:
+    from scipy import sparse
+    from scipy.sparse.linalg import spsolve
+except ImportError:  # scipy está en requirements.txt, pero se admite su ausencia
+    sparse = None
+
+# Sin scipy, las redes de hasta este número de nodos se resuelven con un
+# sistema denso; las más grandes, iterando λ = γ + Pᵀλ sobre la matriz dispersa
+NODOS_DENSOS = 2000
+ITERACIONES_MAXIMAS = 100000
+TOLERANCIA = 1e-13
+MENSAJE_CERRADA = "La red no es abierta: hay nodos de los que los clientes nunca salen"
+
+
+def _validar_enrutamiento(enrutamiento, n):
+    """Convierte las ternas (origen, destino, probabilidad) en arreglos y las valida"""
+    ternas = np.asarray(enrutamiento, dtype=float).reshape(-1, 3)
+    origen = ternas[:, 0].astype(np.int64)
+    destino = ternas[:, 1].astype(np.int64)
+    probabilidad = ternas[:, 2]
+    if np.any(origen != ternas[:, 0]) or np.any(destino != ternas[:, 1]):
+        raise ValueError("Los nodos del enrutamiento deben ser enteros")
+    if np.any((origen < 0) | (origen >= n) | (destino < 0) | (destino >= n)):
+        raise ValueError(f"Los nodos del enrutamiento deben estar entre 0 y {n - 1}")
+    if np.any(probabilidad < 0):
+        raise ValueError("Las probabilidades de enrutamiento no pueden ser negativas")
+    salida = np.bincount(origen, weights=probabilidad, minlength=n)
+    if np.any(salida > 1 + 1e-12):
+        raise ValueError("Las probabilidades de salida de cada nodo deben sumar como mucho 1")
+    return origen, destino, probabilidad
+
+
+def _verificar_abierta(origen, destino, probabilidad, n):
+    """
+    Verifica que desde todos los nodos se pueda salir de la red, recorriendo
+    el enrutamiento al revés desde los nodos con probabilidad de salida
+    positiva. Si no, (I - Pᵀ) es singular y la red no es abierta.
+    """
+    salida = 1 - np.bincount(origen, weights=probabilidad, minlength=n)
+    con_arista = probabilidad > 0
+    origen, destino = origen[con_arista], destino[con_arista]
+    orden = np.argsort(destino, kind='stable')
+    previos = origen[orden].tolist()
+    inicio = np.searchsorted(destino[orden], np.arange(n + 1)).tolist()
+
+    alcanzados = (salida > 1e-12).tolist()
+    pendientes = deque(i for i in range(n) if alcanzados[i])
+    while pendientes:
+        j = pendientes.popleft()
+        for i in previos[inicio[j]:inicio[j + 1]]:
+            if not alcanzados[i]:
+                alcanzados[i] = True
+                pendientes.append(i)
+    if not all(alcanzados):
+        raise ValueError(MENSAJE_CERRADA)
+
+
+def resolver_trafico(gamma, origen, destino, probabilidad):
+    """
+    Resuelve las ecuaciones de tráfico (I - Pᵀ) λ = γ.
+
+    Con scipy usa una factorización dispersa; sin scipy, un sistema denso
+    para redes pequeñas o la iteración λ = γ + Pᵀλ, que converge si la red
+    es abierta pero puede necesitar más de ITERACIONES_MAXIMAS pasos si los
+    clientes tardan mucho en salir. Las redes cerradas se detectan antes de
+    resolver, de modo que la falta de convergencia se informa aparte.
+
+    Returns:
+        tuple: (λ por nodo, método usado)
+    """
+    n = len(gamma)
+    _verificar_abierta(origen, destino, probabilidad, n)
+    if sparse is not None:
+        P = sparse.csr_matrix((probabilidad, (origen, destino)), shape=(n, n))
+        A = (sparse.identity(n, format='csc') - P.T).tocsc()
+        with warnings.catch_warnings():
+            # Una matriz singular da NaN, que se rechaza más abajo
+            warnings.simplefilter('ignore')
+            lambda_ = np.atleast_1d(spsolve(A, gamma))
+        metodo = 'scipy'
+    elif n <= NODOS_DENSOS:
+        A = np.eye(n)
+        np.add.at(A, (destino, origen), -probabilidad)
+        try:
+            lambda_ = np.linalg.solve(A, gamma)
+        except np.linalg.LinAlgError:
+            raise ValueError(MENSAJE_CERRADA)
+        metodo = 'numpy'
+    else:
+        lambda_ = gamma.copy()
+        for _ in range(ITERACIONES_MAXIMAS):
+            nuevo = gamma + np.bincount(destino, weights=probabilidad * lambda_[origen], minlength=n)
+            # nuevo - λ es el residuo γ - (I - Pᵀ) λ del paso anterior
+            listo = np.max(np.abs(nuevo - lambda_)) <= TOLERANCIA * max(1.0, np.max(np.abs(nuevo)))
+            lambda_ = nuevo
+            if listo:
+                break
+        else:
+            raise ValueError(f"Las ecuaciones de tráfico no convergieron en {ITERACIONES_MAXIMAS} iteraciones; "
+                             "instale scipy para resolverlas de forma directa")
+        metodo = 'iterativo'
+
+    if not np.all(np.isfinite(lambda_)) or np.any(lambda_ < -1e-9 * max(1.0, gamma.sum())):
+        raise ValueError(MENSAJE_CERRADA)
+    return np.maximum(lambda_, 0.0), metodo
+
+
+def resolver_red(gamma, mu, k=1, enrutamiento=(), costo_unitario=None, costo_diario=None,
+                 horas_laborables=8):
+    """
+    Red de Jackson abierta: cada nodo es un M/M/1 o M/M/k con llegadas
+    externas γ y, al terminar el servicio en el nodo i, el cliente pasa al
+    nodo j con probabilidad P[i, j] o sale de la red con 1 - Σ_j P[i, j].
+
+    Se resuelven las ecuaciones de tráfico y cada nodo se evalúa con las
+    fórmulas vectorizadas de lotes. Por el teorema de Jackson los nodos se
+    comportan como colas independientes, así que L y Lq de la red son las
+    sumas, y W y Wq salen de la ley de Little con el caudal total Σγ.
+
+    Args:
+        gamma: Tasa de llegadas externas de cada nodo.
+        mu: Tasa de servicio de cada nodo (escalar o arreglo).
+        k: Servidores de cada nodo (escalar o arreglo).
+        enrutamiento (list): Ternas (origen, destino, probabilidad), con los
+            nodos numerados desde 0; las ternas repetidas se suman.
+        costo_unitario, costo_diario, horas_laborables: Parámetros de costos;
+            los costos solo se calculan si se proporciona alguno de los dos primeros.
+
+    Returns:
+        dict: 'nodos' con λ, ρ, L, Lq, W, Wq y P_espera por nodo (y sus
+            costos si aplica), y 'red' con las medidas agregadas.
+    """
+    gamma = np.asarray(gamma, dtype=float).ravel()
+    n = len(gamma)
+    if n == 0:
+        raise ValueError("La red debe tener al menos un nodo")
+    mu, k = np.broadcast_arrays(np.asarray(mu, dtype=float), np.asarray(k, dtype=np.int64))
+    mu, k = np.broadcast_to(mu, (n,)).copy(), np.broadcast_to(k, (n,)).copy()
+    if np.any(gamma < 0) or np.any(mu <= 0):
+        raise ValueError("Las tasas deben ser positivas")
+    if np.any(k < 1):
+        raise ValueError("El número de servidores debe ser al menos 1")
+
+    origen, destino, probabilidad = _validar_enrutamiento(enrutamiento, n)
+    lambda_, metodo = resolver_trafico(gamma, origen, destino, probabilidad)
+
+    inestables = np.flatnonzero(lambda_ >= k * mu)
+    if len(inestables):
+        lista = ', '.join(str(i) for i in inestables[:10]) + (', ...' if len(inestables) > 10 else '')
+        raise ValueError(f"El sistema no es estable en los nodos {lista}: la tasa de llegada debe ser menor que k por la tasa de servicio.")
+
+    claves = ['ro', 'L', 'Lq', 'W', 'Wq']
+    if costo_unitario is not None or costo_diario is not None:
+        claves += ['CTts', 'CTs', 'CT']
+    nodos = {'lambda': lambda_, **{clave: np.zeros(n) for clave in claves}, 'P_espera': np.zeros(n)}
+    costos = dict(costo_unitario=costo_unitario, costo_diario=costo_diario, horas_laborables=horas_laborables)
+    for op, indices in [(1, np.flatnonzero(k == 1)), (2, np.flatnonzero(k > 1))]:
+        if len(indices) == 0:
+            continue
+        resultados = calcular_lote(op, lambda_[indices], mu[indices], k[indices], **costos)
+        for clave in claves:
+            nodos[clave][indices] = resultados[clave]
+        nodos['P_espera'][indices] = resultados['ro'] if op == 1 else resultados['Pk']
+    # Nodos sin tráfico: nada que esperar
+    for clave in ['L', 'Lq', 'Wq', 'P_espera']:
+        nodos[clave][lambda_ == 0] = 0.0
+
+    caudal = float(gamma.sum())
+    L = float(nodos['L'].sum())
+    Lq = float(nodos['Lq'].sum())
+    red = {
+        'caudal': caudal,
+        'L': L,
+        'Lq': Lq,
+        'W': L / caudal if caudal > 0 else 0.0,
+        'Wq': Lq / caudal if caudal > 0 else 0.0,
+        'servidores': int(k.sum()),
+        'metodo': metodo,
+    }
+    if 'CT' in nodos:
+        for clave in ['CTts', 'CTs', 'CT']:
+            red[clave] = float(nodos[clave].sum())
+    return {'nodos': {clave: valor.tolist() for clave, valor in nodos.items()}, 'red': red}
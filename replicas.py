@@ -0,0 +1,144 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+
+import numpy as np
+
+
+def cuantil_t(confianza, grados):
+    """
+    Cuantil bilateral de la t de Student. Exacto para 1 y 2 grados de libertad
+    y con la expansión de Cornish-Fisher para el resto.
+    """
+    p = 1 - (1 - confianza) / 2
+    if grados == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if grados == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    v = grados
+    return (z + (z ** 3 + z) / (4 * v)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4))
+
+
+class AgregadorEnLinea:
+    """
+    Media y varianza en línea (Welford) de los diccionarios de resultados de
+    cada réplica, sin guardar las réplicas individuales.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self._media = {}
+        self._m2 = {}
+
+    def agregar(self, resultados):
+        """Incorpora los resultados de una réplica"""
+        self.n += 1
+        for clave, valor in resultados.items():
+            media = self._media.get(clave, 0.0)
+            delta = valor - media
+            media += delta / self.n
+            self._media[clave] = media
+            self._m2[clave] = self._m2.get(clave, 0.0) + delta * (valor - media)
+
+    def combinar(self, otro):
+        """Incorpora otro agregador (fórmula de Chan para varianzas en paralelo)"""
+        total = self.n + otro.n
+        if otro.n == 0:
+            return
+        for clave, media_otro in otro._media.items():
+            media = self._media.get(clave, 0.0)
+            delta = media_otro - media
+            self._media[clave] = media + delta * otro.n / total
+            self._m2[clave] = (self._m2.get(clave, 0.0) + otro._m2[clave]
+                               + delta ** 2 * self.n * otro.n / total)
+        self.n = total
+
+    def resultados(self, confianza=0.95):
+        """Media e intervalo de confianza t de Student de cada medida"""
+        t = cuantil_t(confianza, self.n - 1) if self.n > 1 else math.inf
+        resultados = {}
+        for clave, media in self._media.items():
+            if self.n > 1:
+                semi_ancho = t * math.sqrt(self._m2[clave] / (self.n - 1) / self.n)
+            else:
+                semi_ancho = math.inf
+            resultados[clave] = {'valor': media, 'ic': [media - semi_ancho, media + semi_ancho]}
+        return resultados
+
+
+def _procesos(workers):
+    """Número de procesos a usar: 'workers' (None para todos los núcleos), como mucho uno por núcleo"""
+    nucleos = os.cpu_count() or 1
+    if workers is not None and workers < 1:
+        raise ValueError("El número de procesos debe ser al menos 1")
+    return min(workers or nucleos, nucleos)
+
+
+def _ejecutar_lote(funcion, argumentos, opciones, semillas):
+    """Ejecuta en un proceso trabajador las réplicas de un lote y las agrega localmente"""
+    agregador = AgregadorEnLinea()
+    for semilla in semillas:
+        agregador.agregar(funcion(*argumentos, semilla=semilla, **opciones))
+    return agregador
+
+
+def ejecutar_replicas(funcion, argumentos=(), opciones=None, replicas=10, workers=None,
+                      semilla=None, lote=None, ejecutar_lotes=None):
+    """
+    Ejecuta réplicas independientes de 'funcion' en un grupo de procesos y
+    agrega sus resultados a medida que llegan.
+
+    Cada réplica recibe la semilla 'semilla=' derivada con
+    numpy.random.SeedSequence(semilla).spawn, por lo que las réplicas son las
+    mismas con cualquier número de procesos. Las réplicas se envían en lotes
+    para reducir la comunicación entre procesos, y cada lote devuelve un
+    agregador parcial en vez de los resultados individuales.
+
+    Args:
+        funcion: Función de nivel de módulo que devuelve un dict de medidas.
+        argumentos (tuple): Argumentos posicionales de la función.
+        opciones (dict, optional): Argumentos con nombre adicionales.
+        replicas (int): Número de réplicas.
+        workers (int, optional): Número de procesos; None usa todos los núcleos
+            y 1 ejecuta todo en el proceso actual. Nunca se usan más procesos
+            que núcleos.
+        semilla: Semilla raíz.
+        lote (int, optional): Réplicas por tarea; por defecto unas cuatro
+            tareas por proceso.
+        ejecutar_lotes (optional): Función ejecutar_lotes(f, tareas) que
+            devuelve [f(*tarea) for tarea in tareas], por ejemplo repartiendo
+            las tareas en un grupo de procesos existente
+            (ejecucion.EjecutorAcotado.ejecutar_varios). Si se indica, no se
+            crea un grupo propio y se envía una tarea por proceso.
+
+    Returns:
+        AgregadorEnLinea: Media y varianza de cada medida.
+    """
+    opciones = opciones or {}
+    semillas = np.random.SeedSequence(semilla).spawn(replicas)
+    workers = min(_procesos(workers), replicas)
+
+    if ejecutar_lotes is not None:
+        lote = lote or math.ceil(replicas / workers)
+        agregador = AgregadorEnLinea()
+        tareas = [(funcion, argumentos, opciones, semillas[i:i + lote]) for i in range(0, replicas, lote)]
+        for parcial in ejecutar_lotes(_ejecutar_lote, tareas):
+            agregador.combinar(parcial)
+        return agregador
+
+    if workers <= 1:
+        return _ejecutar_lote(funcion, argumentos, opciones, semillas)
+
+    lote = lote or max(1, math.ceil(replicas / (workers * 4)))
+    agregador = AgregadorEnLinea()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(_ejecutar_lote, funcion, argumentos, opciones, semillas[i:i + lote])
+                   for i in range(0, replicas, lote)]
+        for futuro in as_completed(futuros):
+            agregador.combinar(futuro.result())
+    return agregador
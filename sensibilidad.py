@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+
+from modelos import Evaluacion, Parametros
+from optimizacion import erlang_b_sucesivos, erlang_c
+
+# Número máximo de celdas (k × costo de espera × costo de servidor × horas)
+CELDAS_MAXIMAS = 10000000
+# Valores de k que se evalúan si no se indica k_max
+K_POR_DEFECTO = 100
+
+
+def _espera_por_k(op, lambda_, mu, ks, M=0, K=0):
+    """
+    Tiempo de espera total por hora (tasa de llegadas · W) para cada k.
+
+    Para PICM se avanza la recurrencia de Erlang B de k a k + 1 en O(1); para
+    los demás modelos se evalúa una vez el grafo del modelo por cada k.
+    """
+    if op == 2:
+        W = {}
+        for k, B in erlang_b_sucesivos(lambda_ / mu, int(ks[0])):
+            if k > ks[-1]:
+                break
+            W[k] = erlang_c(k, lambda_ / mu, B) / (k * mu - lambda_) + 1 / mu
+        return np.array([lambda_ * W[k] for k in ks])
+
+    espera = []
+    for k in ks:
+        evaluacion = Evaluacion(Parametros(op, lambda_, mu, int(k), M, K))
+        espera.append(evaluacion['_llegadas'] * evaluacion['W'])
+    return np.array(espera)
+
+
+def sensibilidad_costos(op, lambda_, mu, costos_espera, costos_servidor, horas=(8,),
+                        M=0, K=0, k_min=None, k_max=None, incluir_costos=False):
+    """
+    Costo total CT = CTts + CTs para cada combinación de k, costo unitario de
+    espera, costo diario por servidor y horas laborables, y el k de costo
+    mínimo para cada combinación de costos.
+
+    Las medidas del modelo se calculan una sola vez por k; las fórmulas de
+    costo se aplican después a toda la rejilla de costos con operaciones
+    vectoriales:
+        CT[k, i, j, l] = tasa · W(k) · horas[l] · costos_espera[i] + k · costos_servidor[j]
+
+    Args:
+        op (int): 2 (PICM), 4 (PFCM) o 6 (M/M/k/K).
+        lambda_, mu, M, K: Parámetros del modelo.
+        costos_espera, costos_servidor, horas (list): Ejes de la rejilla.
+        k_min (int, optional): Primer k; por defecto el menor k estable (PICM) o 1.
+        k_max (int, optional): Último k; por defecto k_min + K_POR_DEFECTO - 1,
+            sin pasar de M (PFCM) ni de K (M/M/k/K).
+        incluir_costos (bool): Si se devuelve también la matriz CT completa.
+
+    Returns:
+        dict: Ejes de la rejilla, 'k_optimo' y 'CT_minimo' con forma
+            (costos_espera × costos_servidor × horas) y, si se pidió, 'CT'.
+    """
+    if op not in [2, 4, 6]:
+        raise ValueError("El análisis de sensibilidad de costos solo aplica a PICM, PFCM y M/M/k/K")
+    if mu <= 0 or lambda_ < 0:
+        raise ValueError("Las tasas deben ser positivas")
+    if op == 4 and not M:
+        raise ValueError("El modelo PFCM requiere el tamaño de la población M")
+    if op == 6 and not K:
+        raise ValueError("El modelo M/M/k/K requiere la capacidad K")
+
+    costos_espera = np.asarray(costos_espera, dtype=float)
+    costos_servidor = np.asarray(costos_servidor, dtype=float)
+    horas = np.asarray(horas, dtype=float)
+    if costos_espera.ndim != 1 or costos_servidor.ndim != 1 or horas.ndim != 1:
+        raise ValueError("Los costos y las horas deben ser listas de valores")
+    if not (len(costos_espera) and len(costos_servidor) and len(horas)):
+        raise ValueError("Se requiere al menos un valor de cada costo y de las horas")
+
+    estable = math.floor(lambda_ / mu) + 1 if op == 2 else 1
+    k_min = estable if k_min is None else int(k_min)
+    if k_min < estable:
+        raise ValueError("El sistema no es estable. La tasa de llegada debe ser menor que k por la tasa de servicio.")
+    if k_max is None:
+        k_max = k_min + K_POR_DEFECTO - 1
+        k_max = min(k_max, M) if op == 4 else min(k_max, K) if op == 6 else k_max
+    k_max = int(k_max)
+    if k_max < k_min:
+        raise ValueError("k_max debe ser mayor o igual que k_min")
+
+    ks = np.arange(k_min, k_max + 1)
+    celdas = len(ks) * len(costos_espera) * len(costos_servidor) * len(horas)
+    if celdas > CELDAS_MAXIMAS:
+        raise ValueError(f"La rejilla tiene {celdas} celdas; el máximo es {CELDAS_MAXIMAS}")
+
+    espera = _espera_por_k(op, lambda_, mu, ks, M, K)
+
+    # Ejes: k, costo de espera, costo de servidor, horas
+    CT = (espera[:, None, None, None] * horas[None, None, None, :] * costos_espera[None, :, None, None]
+          + ks[:, None, None, None] * costos_servidor[None, None, :, None])
+    indices = np.argmin(CT, axis=0)
+    CT_minimo = np.take_along_axis(CT, indices[None], axis=0)[0]
+
+    resultado = {
+        'k': ks.tolist(),
+        'costos_espera': costos_espera.tolist(),
+        'costos_servidor': costos_servidor.tolist(),
+        'horas': horas.tolist(),
+        'k_optimo': ks[indices].tolist(),
+        'CT_minimo': CT_minimo.tolist(),
+    }
+    if incluir_costos:
+        resultado['CT'] = CT.tolist()
+    return resultado
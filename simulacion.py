@@ -0,0 +1,297 @@
+import heapq
+import math
+import time
+from functools import partial
+
+import numpy as np
+
+from replicas import AgregadorEnLinea, ejecutar_replicas
+
+# Muestras que se generan de una vez por cada distribución
+TAMANO_BLOQUE = 1 << 16
+# Límites de una simulación: réplicas, clientes por réplica y clientes en total
+REPLICAS_MAXIMAS = 1000
+CLIENTES_MAXIMOS = 10000000
+CLIENTES_TOTALES_MAXIMOS = 50000000
+
+
+# --------------------- DISTRIBUCIONES ---------------------
+# Cada distribución es una función (rng, tamaño) -> arreglo de muestras. Se
+# construyen con functools.partial para que se puedan enviar a otros procesos.
+
+def _muestras_exponencial(tasa, rng, tamano):
+    return rng.exponential(1 / tasa, tamano)
+
+
+def _muestras_determinista(valor, rng, tamano):
+    return np.full(tamano, float(valor))
+
+
+def _muestras_erlang(fases, tasa, rng, tamano):
+    return rng.gamma(fases, 1 / (fases * tasa), tamano)
+
+
+def _muestras_uniforme(minimo, maximo, rng, tamano):
+    return rng.uniform(minimo, maximo, tamano)
+
+
+def _muestras_lognormal(mu, sigma, rng, tamano):
+    return rng.lognormal(mu, sigma, tamano)
+
+
+def exponencial(tasa):
+    """Tiempos exponenciales con la tasa dada (media 1/tasa)"""
+    return partial(_muestras_exponencial, tasa)
+
+
+def determinista(valor):
+    """Tiempos constantes"""
+    return partial(_muestras_determinista, valor)
+
+
+def erlang(fases, tasa):
+    """Tiempos Erlang con 'fases' etapas y media 1/tasa"""
+    return partial(_muestras_erlang, fases, tasa)
+
+
+def uniforme(minimo, maximo):
+    """Tiempos uniformes en [minimo, maximo]"""
+    return partial(_muestras_uniforme, minimo, maximo)
+
+
+def lognormal(media, desviacion):
+    """Tiempos lognormales con la media y desviación estándar dadas"""
+    sigma2 = math.log(1 + (desviacion / media) ** 2)
+    return partial(_muestras_lognormal, math.log(media) - sigma2 / 2, math.sqrt(sigma2))
+
+
+# Distribuciones disponibles por nombre
+DISTRIBUCIONES = {
+    'exponencial': exponencial,
+    'determinista': determinista,
+    'erlang': erlang,
+    'uniforme': uniforme,
+    'lognormal': lognormal,
+}
+
+
+class _Muestreador:
+    """Entrega muestras una a una a partir de bloques pregenerados con NumPy"""
+
+    def __init__(self, distribucion, rng, tamano=TAMANO_BLOQUE):
+        self.distribucion = distribucion
+        self.rng = rng
+        self.tamano = tamano
+        self._bloque = []
+        self._pos = 0
+
+    def siguiente(self):
+        if self._pos >= len(self._bloque):
+            self._bloque = self.distribucion(self.rng, self.tamano).tolist()
+            self._pos = 0
+        valor = self._bloque[self._pos]
+        self._pos += 1
+        return valor
+
+
+# --------------------- ESTADÍSTICOS ---------------------
+
+def _medidas_tiempo(llegadas, salidas, k, t_inicio, t_fin, n=None):
+    """
+    Promedios en el tiempo (L, Lq, P0, Pn) sobre [t_inicio, t_fin] a partir de
+    los instantes de llegada y salida de cada cliente.
+    """
+    tiempos = np.concatenate(([0.0], llegadas, salidas))
+    cambios = np.concatenate(([0], np.ones(len(llegadas), dtype=np.int64),
+                              -np.ones(len(salidas), dtype=np.int64)))
+    orden = np.argsort(tiempos, kind='stable')
+    tiempos = tiempos[orden]
+    estados = np.cumsum(cambios[orden])
+
+    # El estado después del evento i se mantiene hasta el evento i+1
+    inicio = np.maximum(tiempos, t_inicio)
+    fin = np.minimum(np.append(tiempos[1:], t_fin), t_fin)
+    duracion = np.maximum(fin - inicio, 0)
+    total = duracion.sum()
+
+    Pn = np.bincount(estados, weights=duracion) / total
+    N = np.arange(len(Pn))
+    medidas = {
+        'L': float(Pn @ N),
+        'Lq': float(Pn @ np.maximum(N - k, 0)),
+        'P0': float(Pn[0]),
+    }
+    if n is not None:
+        medidas[f'P{n}'] = float(Pn[n]) if n < len(Pn) else 0.0
+    return medidas
+
+
+# --------------------- MODELOS ---------------------
+
+def _replica_poblacion_infinita(llegadas, servicio, k, clientes, calentamiento, rng, n=None):
+    """Una réplica de M/M/1 o M/M/k (o sus variantes G/G/k) con disciplina FCFS"""
+    entre_llegadas = llegadas(rng, clientes)
+    servicios = servicio(rng, clientes)
+    t_llegada = np.cumsum(entre_llegadas)
+
+    if k == 1:
+        # Recursión de Lindley vectorizada: Wq_i = X_i - min(0, min_{j<=i} X_j)
+        X = np.concatenate(([0.0], np.cumsum(servicios[:-1] - entre_llegadas[1:])))
+        espera = X - np.minimum(np.minimum.accumulate(X), 0)
+    else:
+        # Cada cliente toma el servidor que se libera primero (montículo de k servidores)
+        libres = [0.0] * k
+        espera = np.empty(clientes)
+        for i, (t, s) in enumerate(zip(t_llegada.tolist(), servicios.tolist())):
+            libre = libres[0]
+            inicio = t if t > libre else libre
+            heapq.heapreplace(libres, inicio + s)
+            espera[i] = inicio - t
+
+    t_salida = t_llegada + espera + servicios
+    return _resumir(t_llegada, t_salida, espera, servicios, k, calentamiento, n)
+
+
+def _replica_poblacion_finita(llegadas, servicio, k, M, clientes, calentamiento, rng, n=None):
+    """
+    Una réplica de M/M/1/M/M o M/M/k/M/M: cada una de las M unidades opera un
+    tiempo con la distribución de 'llegadas' y luego entra a la cola FCFS.
+    """
+    operacion = _Muestreador(llegadas, rng)
+    servicios_dist = _Muestreador(servicio, rng)
+
+    # Montículo de próximas llegadas (una por unidad) y de servidores libres
+    proximas = [operacion.siguiente() for _ in range(M)]
+    heapq.heapify(proximas)
+    libres = [0.0] * k
+
+    t_llegada = np.empty(clientes)
+    espera = np.empty(clientes)
+    servicios = np.empty(clientes)
+    for i in range(clientes):
+        t = heapq.heappop(proximas)
+        libre = libres[0]
+        inicio = t if t > libre else libre
+        s = servicios_dist.siguiente()
+        fin = inicio + s
+        heapq.heapreplace(libres, fin)
+        # La unidad reparada vuelve a operar
+        heapq.heappush(proximas, fin + operacion.siguiente())
+        t_llegada[i] = t
+        espera[i] = inicio - t
+        servicios[i] = s
+
+    t_salida = t_llegada + espera + servicios
+    return _resumir(t_llegada, t_salida, espera, servicios, k, calentamiento, n)
+
+
+def _resumir(t_llegada, t_salida, espera, servicios, k, calentamiento, n):
+    """Estimaciones puntuales de una réplica descartando el periodo de calentamiento"""
+    primero = int(len(t_llegada) * calentamiento)
+    t_inicio = t_llegada[primero]
+    t_fin = t_llegada[-1]
+    medidas = _medidas_tiempo(t_llegada, t_salida, k, t_inicio, t_fin, n)
+    medidas['Wq'] = float(espera[primero:].mean())
+    medidas['W'] = float((espera[primero:] + servicios[primero:]).mean())
+    return medidas
+
+
+def simular_replica(op, llegadas, servicio, k=1, M=None, clientes=100000,
+                    calentamiento=0.1, semilla=None, n=None):
+    """
+    Ejecuta una réplica de la simulación y devuelve las estimaciones puntuales.
+
+    Args:
+        op (int): Modelo (1: PICS, 2: PICM, 3: PFCS, 4: PFCM).
+        llegadas: Distribución de tiempos entre llegadas (o de operación por
+            unidad en los modelos de población finita).
+        servicio: Distribución de tiempos de servicio.
+        k (int): Número de servidores (se ignora en PICS y PFCS).
+        M (int, optional): Tamaño de la población (PFCS y PFCM).
+        clientes (int): Número de clientes a simular.
+        calentamiento (float): Fracción inicial de clientes que se descarta.
+        semilla: Semilla o numpy.random.SeedSequence.
+        n (int, optional): Número de clientes para estimar Pn.
+
+    Returns:
+        dict: Estimaciones de L, Lq, W, Wq, P0 y Pn.
+    """
+    rng = np.random.default_rng(semilla)
+    servidores = k if op in [2, 4] else 1
+    if op in [1, 2]:
+        return _replica_poblacion_infinita(llegadas, servicio, servidores, clientes,
+                                           calentamiento, rng, n)
+    if op in [3, 4]:
+        if not M:
+            raise ValueError("Los modelos de población finita requieren M")
+        return _replica_poblacion_finita(llegadas, servicio, servidores, M, clientes,
+                                         calentamiento, rng, n)
+    raise ValueError(f"Modelo no válido: {op}")
+
+
+def intervalos_confianza(replicas, confianza=0.95):
+    """
+    Combina las estimaciones de varias réplicas independientes en media e
+    intervalo de confianza t de Student para cada medida.
+    """
+    agregador = AgregadorEnLinea()
+    for estimacion in replicas:
+        agregador.agregar(estimacion)
+    return agregador.resultados(confianza)
+
+
+def simular(op, lambda_=None, mu=None, k=1, M=None, llegadas=None, servicio=None,
+            clientes=100000, replicas=10, calentamiento=0.1, semilla=None, n=None,
+            confianza=0.95, workers=1, ejecutar_lotes=None):
+    """
+    Simulación de eventos discretos de los cuatro modelos con réplicas
+    independientes e intervalos de confianza.
+
+    Si no se indican 'llegadas' o 'servicio' se usan exponenciales con tasas
+    lambda_ y mu, que corresponden a los modelos analíticos de
+    QueueTheoryCalculator. Con workers > 1 (o None para usar todos los núcleos)
+    las réplicas se reparten entre procesos, como mucho uno por núcleo; cada
+    réplica recibe la misma semilla derivada sin importar el número de
+    procesos. Las réplicas y los clientes están acotados por REPLICAS_MAXIMAS,
+    CLIENTES_MAXIMOS y CLIENTES_TOTALES_MAXIMOS. Con 'ejecutar_lotes' las
+    réplicas se envían a un grupo de procesos existente (ver
+    replicas.ejecutar_replicas).
+
+    Returns:
+        dict: Para cada medida (L, Lq, W, Wq, P0, Pn) su valor medio e
+            intervalo de confianza, más datos de la ejecución.
+    """
+    if llegadas is None:
+        llegadas = exponencial(lambda_)
+    if servicio is None:
+        servicio = exponencial(mu)
+    if replicas < 1:
+        raise ValueError("Se requiere al menos una réplica")
+    if replicas > REPLICAS_MAXIMAS:
+        raise ValueError(f"El número de réplicas no puede ser mayor que {REPLICAS_MAXIMAS}")
+    if clientes < 1:
+        raise ValueError("Se requiere al menos un cliente por réplica")
+    if clientes > CLIENTES_MAXIMOS:
+        raise ValueError(f"El número de clientes por réplica no puede ser mayor que {CLIENTES_MAXIMOS}")
+    if clientes * replicas > CLIENTES_TOTALES_MAXIMOS:
+        raise ValueError(f"El total de clientes (clientes por réplicas) no puede ser mayor que {CLIENTES_TOTALES_MAXIMOS}")
+
+    inicio = time.perf_counter()
+    agregador = ejecutar_replicas(
+        simular_replica,
+        argumentos=(op, llegadas, servicio, k, M, clientes, calentamiento),
+        opciones={'n': n},
+        replicas=replicas,
+        workers=workers,
+        semilla=semilla,
+        ejecutar_lotes=ejecutar_lotes,
+    )
+    duracion = time.perf_counter() - inicio
+
+    eventos = 2 * clientes * replicas  # una llegada y una salida por cliente
+    return {
+        'resultados': agregador.resultados(confianza),
+        'replicas': replicas,
+        'eventos': eventos,
+        'eventos_por_segundo': eventos / duracion if duracion > 0 else math.inf,
+    }
@@ -0,0 +1,183 @@
+"""
+Tablas precalculadas de Erlang C y P0 para M/M/k.
+
+Las tablas se construyen fuera de línea y se guardan como archivos .npy que
+se abren en modo memoria (mmap_mode='r'): no hay costo de lectura al arrancar
+y las páginas se comparten entre los procesos que sirven la aplicación.
+
+La rejilla es k = 1..k_max (filas) por ρ = λ/(kμ) en [0, ro_max] con paso
+h = ro_max / puntos (columnas). Entre dos nodos se interpola linealmente; el
+error de la interpolación lineal está acotado por h²/8 · max|f''| en la
+celda, y max|f''| se estima con las segundas diferencias de la propia tabla.
+P0 se interpola en escala logarítmica.
+
+Uso (construcción):
+    python tablas_erlang.py [directorio] [--k-max 500] [--puntos 4096]
+"""
+import argparse
+import json
+import math
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+K_MAXIMO = 500
+PUNTOS = 4096
+# Por encima de este ρ las funciones cambian demasiado rápido para interpolar
+RO_MAXIMO = 0.999
+# Cota de error máxima para usar la tabla en lugar del cálculo directo
+TOLERANCIA = 1e-6
+# Error relativo de redondeo que se suma a las cotas (las sumas de k términos
+# acumulan más que el épsilon de máquina)
+ERROR_REDONDEO = 64 * np.finfo(float).eps
+DIRECTORIO = os.environ.get('TABLAS_ERLANG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablas'))
+
+_ARCHIVOS = ('erlang_c', 'log_p0', 'cota_erlang_c', 'cota_log_p0')
+
+
+class Consulta(NamedTuple):
+    """Valores de la tabla para (k, a) y sus cotas de error absoluto"""
+    C: float
+    P0: float
+    cota_C: float
+    cota_P0: float
+
+
+# --------------------- CONSTRUCCIÓN ---------------------
+
+def _cotas(f):
+    """
+    Cota h²/8 · max|f''| por celda [j, j + 1] de cada fila, con f'' estimada
+    por las segundas diferencias en los dos extremos de la celda, más el
+    error de redondeo de los valores de la tabla.
+    """
+    segundas = np.abs(f[:, :-2] - 2 * f[:, 1:-1] + f[:, 2:])
+    segundas = np.concatenate((segundas[:, :1], segundas, segundas[:, -1:]), axis=1)
+    redondeo = ERROR_REDONDEO * np.maximum(np.abs(f[:, :-1]), np.abs(f[:, 1:]))
+    return np.maximum(segundas[:, :-1], segundas[:, 1:]) / 8 + redondeo
+
+
+def calcular_tablas(k_max=K_MAXIMO, puntos=PUNTOS, ro_maximo=RO_MAXIMO):
+    """
+    Erlang C y log P0 en la rejilla completa, con sus cotas por celda.
+
+    Usa la recurrencia de Erlang B sobre todas las filas a la vez y
+        C = kB / (k - a(1 - B)),
+        1/P0 = e^a · P(Poisson(a) <= k) · (1 + Bρ/(1 - ρ)),
+    donde la suma de Poisson se acumula en escala logarítmica para evitar
+    desbordamientos con k grande.
+    """
+    k = np.arange(1, k_max + 1, dtype=float)[:, None]
+    ro = np.linspace(0, ro_maximo, puntos + 1)[None, :]
+    a = k * ro
+
+    B = np.ones_like(a)
+    suma = np.exp(-a)  # Término n = 0 de la suma de Poisson
+    with np.errstate(divide='ignore'):
+        log_a = np.log(a)
+    log_fact = 0.0
+    for n in range(1, k_max + 1):
+        # Solo las filas con k >= n siguen acumulando
+        filas = slice(n - 1, None)
+        B[filas] = a[filas] * B[filas] / (n + a[filas] * B[filas])
+        log_fact += math.log(n)
+        suma[filas] += np.exp(-a[filas] + n * log_a[filas] - log_fact)
+
+    C = k * B / (k - a * (1 - B))
+    log_p0 = -a - np.log(suma) - np.log1p(B * ro / (1 - ro))
+    return {
+        'erlang_c': C,
+        'log_p0': log_p0,
+        'cota_erlang_c': _cotas(C),
+        'cota_log_p0': _cotas(log_p0),
+    }
+
+
+def construir_tablas(directorio=DIRECTORIO, k_max=K_MAXIMO, puntos=PUNTOS, ro_maximo=RO_MAXIMO):
+    """Calcula las tablas y las guarda en 'directorio' junto con la descripción de la rejilla"""
+    os.makedirs(directorio, exist_ok=True)
+    for nombre, tabla in calcular_tablas(k_max, puntos, ro_maximo).items():
+        np.save(os.path.join(directorio, nombre + '.npy'), tabla)
+    with open(os.path.join(directorio, 'rejilla.json'), 'w') as archivo:
+        json.dump({'k_max': k_max, 'puntos': puntos, 'ro_maximo': ro_maximo}, archivo)
+
+
+# --------------------- CONSULTA ---------------------
+
+class TablasErlang:
+    """Tablas abiertas en modo memoria"""
+
+    def __init__(self, directorio):
+        with open(os.path.join(directorio, 'rejilla.json')) as archivo:
+            rejilla = json.load(archivo)
+        self.k_max = rejilla['k_max']
+        self.puntos = rejilla['puntos']
+        self.ro_maximo = rejilla['ro_maximo']
+        self.paso = self.ro_maximo / self.puntos
+        for nombre in _ARCHIVOS:
+            setattr(self, nombre, np.load(os.path.join(directorio, nombre + '.npy'), mmap_mode='r'))
+
+    def consultar(self, k, a):
+        """
+        Erlang C y P0 de M/M/k con carga ofrecida a = λ/μ, o None si (k, ρ)
+        está fuera de la rejilla. En un nodo de la rejilla se devuelve el
+        valor de la tabla; entre nodos se interpola linealmente.
+        """
+        if k != int(k) or not 1 <= k <= self.k_max or a < 0:
+            return None
+        ro = a / k
+        if ro > self.ro_maximo:
+            return None
+        fila = int(k) - 1
+        x = ro / self.paso
+        j = min(int(x), self.puntos - 1)
+        f = x - j
+
+        def interpolar(tabla):
+            return float((1 - f) * tabla[fila, j] + f * tabla[fila, j + 1])
+
+        cota_C = float(self.cota_erlang_c[fila, j])
+        cota_log = float(self.cota_log_p0[fila, j])
+        P0 = math.exp(interpolar(self.log_p0))
+        return Consulta(interpolar(self.erlang_c), P0, cota_C, P0 * math.expm1(cota_log))
+
+
+_tablas = None
+
+
+def cargar_tablas(directorio=DIRECTORIO):
+    """
+    Abre las tablas de 'directorio' para todo el proceso. Devuelve False (y
+    se sigue calculando directamente) si no se han construido.
+    """
+    global _tablas
+    if not os.path.exists(os.path.join(directorio, 'rejilla.json')):
+        return False
+    _tablas = TablasErlang(directorio)
+    return True
+
+
+def consultar(k, a, tolerancia=TOLERANCIA):
+    """
+    Consulta las tablas cargadas; None si no hay tablas, si (k, a) está fuera
+    de la rejilla o si la cota de error de la interpolación supera la
+    tolerancia (en ese caso se debe calcular directamente).
+    """
+    if _tablas is None:
+        return None
+    consulta = _tablas.consultar(k, a)
+    if consulta is None or consulta.cota_C > tolerancia or consulta.cota_P0 > tolerancia * consulta.P0:
+        return None
+    return consulta
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directorio', nargs='?', default=DIRECTORIO)
+    parser.add_argument('--k-max', type=int, default=K_MAXIMO)
+    parser.add_argument('--puntos', type=int, default=PUNTOS)
+    parser.add_argument('--ro-maximo', type=float, default=RO_MAXIMO)
+    args = parser.parse_args()
+    construir_tablas(args.directorio, args.k_max, args.puntos, args.ro_maximo)
+    print(f"Tablas guardadas en {args.directorio}")
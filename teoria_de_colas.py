@@ -1,25 +1,42 @@
 import math
 
+from alta_precision import estable
+from modelos import MODELOS, Costos, Evaluacion, Parametros, campos_por_defecto, nombre_calculo
+from nacimiento_muerte import probabilidad
+
+
 class QueueTheoryCalculator:
     def __init__(self):
         self.lambda_ = 0  # Tasa de llegada
         self.mu = 0       # Tasa de servicio
         self.k = 1        # Número de servidores
         self.M = 0        # Población (para modelos finitos)
+        self.K = 0        # Capacidad del sistema (M/M/1/K, M/M/k/K)
+        self.sigma = 0    # Desviación estándar del tiempo de servicio (M/G/1)
         self.n = 0        # Número de clientes para Pn
-        self.op = 0       # Modelo seleccionado (1: PICS, 2: PICM, 3: PFCS, 4: PFCM)
+        self.op = 0       # Modelo seleccionado (ver modelos.MODELOS)
         
         # Costos
         self.costo_unitario = 0
         self.horas_laborables = 8  # Valor por defecto
         self.costo_diario = 0
 
-    def set_parameters(self, lambda_, mu, k=1, M=0, n=0, op=1):
+        # Caché de los resultados del modelo (se reconstruye si cambian los parámetros)
+        self._cache_clave = None
+        self._cache_estado = None
+
+        # Función opcional medidor(nombre, segundos) que recibe la duración de
+        # cada cálculo hecho desde calculate() ('calcular_P0', 'calcular_Wq', ...)
+        self.medidor = None
+
+    def set_parameters(self, lambda_, mu, k=1, M=0, n=0, op=1, K=0, sigma=0):
         """Establece los parámetros del modelo"""
         self.lambda_ = lambda_
         self.mu = mu
         self.k = k
         self.M = M
+        self.K = K
+        self.sigma = sigma
         self.n = n
         self.op = op
 
@@ -34,331 +51,168 @@ class QueueTheoryCalculator:
     def calcular_factorial(self, n):
         """Calcula el factorial de un número"""
         return math.factorial(n) if n >= 0 else 1
+
+    def parametros(self):
+        """Registro inmutable con los parámetros actuales del modelo"""
+        return Parametros(self.op, self.lambda_, self.mu, self.k, self.M or 0, self.K or 0, self.sigma or 0)
+
+    def costos(self):
+        """Registro inmutable con los parámetros de costos actuales"""
+        return Costos(self.costo_unitario, self.costo_diario, self.horas_laborables)
+
+    def _estado(self):
+        """
+        Devuelve la evaluación perezosa (modelos.Evaluacion) de los parámetros
+        actuales, que se conserva mientras no cambien: cada medida se calcula
+        una sola vez y solo cuando se pide. None si el modelo no es válido.
+        """
+        clave = (self.parametros(), self.costos())
+        if clave[0].op not in MODELOS:
+            return None
+        if self._cache_clave != clave:
+            self._cache_estado = Evaluacion(clave[0], costos=clave[1])
+            self._cache_clave = clave
+        return self._cache_estado
+
+    def _valor(self, campo):
+        """Medida 'campo' del modelo actual, o 0 si no aplica"""
+        evaluacion = self._estado()
+        if evaluacion is None or campo not in evaluacion.grafo:
+            return 0
+        return evaluacion[campo]
+
+    def calcular_distribucion(self):
+        """Devuelve la lista [P0, P1, ..., PM] (o hasta PK) para los modelos de población o capacidad finita"""
+        return self._valor('_P').tolist() if self.op in [3, 4, 5, 6] else []
     
     def es_estable(self): #condicion de estabilidad
-        """Verifica la estabilidad del sistema"""
-        if self.op == 1:
-            return self.lambda_ / self.mu < 1
+        """Verifica la estabilidad del sistema (ρ < 1, o λ < kμ en PICM), sin errores de redondeo"""
+        return estable(self.parametros())
+
+    def metodo(self):
+        """
+        'alta_precision' si las medidas calculadas necesitaron aritmética de
+        precisión arbitraria ('float_mal_condicionado' si la necesitaban pero
+        no se pudo usar), 'tabla' si se interpolaron en las tablas de Erlang
+        y, si no, 'float'
+        """
+        evaluacion = self._estado()
+        return evaluacion.get('_metodo', 'float') if evaluacion is not None else 'float'
 
     def calcular_ro(self): # p
-        """Calcula ρ (ro) - Factor de utilización del sistema (λ/μ)"""
-        if self.op == 1:  # PICS
-            return self.lambda_ / self.mu
-        elif self.op == 2:  # PICM
-            return self.lambda_ / (self.k * self.mu)
-        else:
-            return 0  # No aplica para otros modelos
-        
+        """Calcula ρ (ro) - Factor de utilización del sistema (λ/kμ); 0 en los modelos de población finita"""
+        return self._valor('ro')
 
     def calcular_P0(self):
         """Calcula P0 - Probabilidad de que no haya clientes en el sistema"""
-        
-        if self.op == 1:  # M/M/1 (PICS)
-            if self.es_estable():
-                return 1 - self.calcular_ro()
-            else:
-                raise ValueError("El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1.")   
-        
-        elif self.op == 2:  # M/M/k (PICM)
-            sumatoria = 0
-            for n in range(self.k):
-                term = (1 / self.calcular_factorial(n)) * ((self.lambda_ / self.mu) ** n)
-                sumatoria += term
-            
-            ultimo_term = (1 / self.calcular_factorial(self.k)) * ((self.lambda_ / self.mu) ** self.k)
-            denom = (self.k * self.mu) / (self.k * self.mu - self.lambda_)
-            
-            return 1 / (sumatoria + ultimo_term * denom)
-        
-        elif self.op == 3:  # M/M/1/M/M (PFCS)
-            sumatoria = 0
-            for n in range(self.M + 1):
-                term = (self.calcular_factorial(self.M) / 
-                       self.calcular_factorial(self.M - n)) * ((self.lambda_ / self.mu) ** n)
-                sumatoria += term
-            return 1 / sumatoria
-        
-        elif self.op == 4:  # M/M/k/M/M (PFCM)
-            sumatoria1 = 0
-            for n in range(self.k):
-                term = (self.calcular_factorial(self.M) / 
-                       (self.calcular_factorial(self.M - n) * self.calcular_factorial(n))) * ((self.lambda_ / self.mu) ** n)
-                sumatoria1 += term
-            
-            sumatoria2 = 0
-            for n in range(self.k, self.M + 1):
-                term = (self.calcular_factorial(self.M) / 
-                       (self.calcular_factorial(self.M - n) * self.calcular_factorial(self.k) * (self.k ** (n - self.k)))) * ((self.lambda_ / self.mu) ** n)
-                sumatoria2 += term
-            
-            return 1 / (sumatoria1 + sumatoria2)
-        
-        return 0
+        return self._valor('P0')
 
     def calcular_Pn(self, n=None):
         """Calcula Pn - Probabilidad de que haya n clientes en el sistema"""
         if n is None:
             n = self.n
-        
-        if self.op == 1:  # M/M/1 (PICS)
-            if self.es_estable():
-                return self.calcular_P0() * (self.calcular_ro() ** n)
-            else:
-                raise ValueError("El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1.")
-        
-        elif self.op == 2:  # M/M/k (PICM)
-            if n <= self.k:
-                return (self.calcular_P0() / self.calcular_factorial(n)) * ((self.lambda_ / self.mu) ** n)
-            else:
-                return (self.calcular_P0() / (self.calcular_factorial(self.k) * (self.k ** (n - self.k)))) * ((self.lambda_ / self.mu) ** n)
-        
-        elif self.op == 3:  # M/M/1/M/M (PFCS)
-            return (self.calcular_factorial(self.M) / 
-                   self.calcular_factorial(self.M - n)) * ((self.lambda_ / self.mu) ** n) * self.calcular_P0()
-        
-        elif self.op == 4:  # M/M/k/M/M (PFCM)
-            if 0 <= n <= self.k:
-                return (self.calcular_P0() * (self.calcular_factorial(self.M) / 
-                       (self.calcular_factorial(self.M - n) * self.calcular_factorial(n))) * ((self.lambda_ / self.mu) ** n))
-            else:
-                return (self.calcular_P0() * (self.calcular_factorial(self.M) / 
-                       (self.calcular_factorial(self.M - n) * self.calcular_factorial(self.k) * (self.k ** (n - self.k))))) * ((self.lambda_ / self.mu) ** n)
-        
-        return 0
+        evaluacion = self._estado()
+        if evaluacion is None:
+            return 0
+        if '_cadena' not in evaluacion.grafo:
+            raise ValueError("Pn no está disponible para este modelo")
+        return probabilidad(evaluacion['_cadena'], n)
 
     def calcular_Pk(self):
         """Calcula Pk - Probabilidad de que todos los servidores estén ocupados (PICM)"""
-        if self.op != 2:
-            return 0
-        
-        return ((1 / self.calcular_factorial(self.k)) * ((self.lambda_ / self.mu) ** self.k) * 
-               ((self.k * self.mu) / (self.k * self.mu - self.lambda_)) * self.calcular_P0())
+        return self._valor('Pk')
 
     def calcular_PE(self):
         """Calcula PE - Probabilidad de que un cliente tenga que esperar"""
-        if self.op == 3:  # PFCS
-            return 1 - self.calcular_P0()
-        elif self.op == 4:  # PFCM
-            sumatoria = 0
-            for n in range(self.k):
-                sumatoria += self.calcular_Pn(n)
-            return 1 - sumatoria
-        return 0
+        return self._valor('PE')
 
     def calcular_PNE(self):
         """Calcula PNE - Probabilidad de que un cliente no tenga que esperar (PFCM)"""
+        if self.op == 4:
+            # P(n < k) sumada directamente, como en calculate()
+            return self._valor('PNE')
         return 1 - self.calcular_PE()
 
     # --------------------- MEDIDAS DE DESEMPEÑO ---------------------
 
     def calcular_L(self):
         """Número esperado de clientes en el sistema"""
-        if self.op == 1:  # M/M/1 (PICS)
-            if self.es_estable():
-                return self.lambda_ / (self.mu - self.lambda_)
-            else:
-                raise ValueError("El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1.")
-        
-        elif self.op == 2:  # M/M/k (PICM)
-            term1 = (self.lambda_ * self.mu * ((self.lambda_ / self.mu) ** self.k)) / (self.calcular_factorial(self.k - 1) * ((self.k * self.mu - self.lambda_) ** 2))
-            return term1 * self.calcular_P0() + (self.lambda_ / self.mu)
-        
-        elif self.op == 3:  # PFCS
-            return self.M - (self.mu / self.lambda_) * (1 - self.calcular_P0())
-        
-        elif self.op == 4:  # PFCM
-            sumatoria1 = 0
-            sumatoria3 = 0
-            for n in range(self.k):
-                sumatoria1 += n * self.calcular_Pn(n)
-                sumatoria3 += self.calcular_Pn(n)
-            
-            sumatoria3 = self.k * (1 - sumatoria3)
-            return sumatoria1 + self.calcular_Lq() + sumatoria3
-        
-        return 0
+        return self._valor('L')
 
     def calcular_Lq(self):
         """Número esperado de clientes en la cola"""
-        if self.op == 1:  # M/M/1 (PICS)
-            if self.es_estable():
-                return (self.lambda_ ** 2) / (self.mu * (self.mu - self.lambda_))
-            else:
-                raise ValueError("El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1.")
-        
-        elif self.op == 2:  # M/M/k (PICM)
-            term = (self.lambda_ * self.mu * ((self.lambda_ / self.mu) ** self.k)) / (self.calcular_factorial(self.k - 1) * ((self.k * self.mu - self.lambda_) ** 2))
-            return term * self.calcular_P0()
-        
-        elif self.op == 3:  # PFCS
-            return self.M - ((self.lambda_ + self.mu) / self.lambda_) * (1 - self.calcular_P0())
-        
-        elif self.op == 4:  # PFCM
-            sumatoria = 0
-            for n in range(self.k, self.M + 1):
-                sumatoria += (n - self.k) * self.calcular_Pn(n)
-            return sumatoria
-        
-        return 0
+        return self._valor('Lq')
 
     def calcular_Ln(self):
         """Número esperado de clientes en la cola (no vacía)"""
-        if self.op == 1:  # M/M/1 (PICS)
-            if self.es_estable():
-                return self.calcular_L()
-            else:
-                raise ValueError("El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1.")
-        
-        elif self.op == 2:  # M/M/k (PICM)
-            return self.calcular_Lq() / self.calcular_Pk()
-        
-        elif self.op in [3, 4]:  # PFCS o PFCM
-            return self.calcular_Lq() / self.calcular_PE()
-        
-        return 0
+        return self._valor('Ln')
 
     def calcular_W(self):
         """Tiempo promedio esperado en el sistema por los clientes"""
-        if self.op == 1:  # M/M/1 (PICS)
-            if self.es_estable():
-                return 1 / (self.mu - self.lambda_)
-            else:
-                raise ValueError("El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1.")
-        
-        elif self.op == 2:  # M/M/k (PICM)
-            return self.calcular_Wq() + (1 / self.mu)
-        
-        elif self.op == 3:  # PFCS
-            return self.calcular_Wq() + (1 / self.mu)
-        
-        elif self.op == 4:  # PFCM
-            return self.calcular_Wq() + (1 / self.mu)
-        
-        return 0
+        return self._valor('W')
 
     def calcular_Wq(self):
         """Tiempo esperado en la cola por los clientes """
-        if self.op == 1:  # M/M/1 (PICS)
-            if self.es_estable():
-                return self.lambda_ / (self.mu * (self.mu - self.lambda_))
-            else:
-                raise ValueError("El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1.")
-        
-        elif self.op == 2:  # M/M/k (PICM)
-            term = (self.mu * ((self.lambda_ / self.mu) ** self.k) * self.calcular_P0()) / (self.calcular_factorial(self.k - 1) * ((self.k * self.mu - self.lambda_) ** 2))
-            return term
-        
-        elif self.op == 3:  # PFCS
-            return self.calcular_Lq() / ((self.M - self.calcular_L()) * self.lambda_)
-        
-        elif self.op == 4:  # PFCM
-            return self.calcular_Lq() / ((self.M - self.calcular_L()) * self.lambda_)
-        
-        return 0
+        return self._valor('Wq')
 
     def calcular_Wn(self):
         """Tiempo esperado en la cola para colas no vacías por los clientes"""
-        if self.op == 1:  # M/M/1 (PICS)
-            if self.es_estable():
-                return self.calcular_W()
-            else:
-                raise ValueError("El sistema no es estable. La tasa de llegada entre la tasa de servicio debe ser menor que 1.")
-        
-        elif self.op == 2:  # M/M/k (PICM)
-            return self.calcular_Wq() / self.calcular_Pk()
-        
-        elif self.op in [3, 4]:  # PFCS o PFCM
-            return self.calcular_Wq() / self.calcular_PE()
-        
-        return 0
+        return self._valor('Wn')
 
     # --------------------- CÁLCULOS DE COSTOS ---------------------
 
     def calcular_CTte(self):
         """Costo total de tiempo de espera"""
-        return self.lambda_ * self.horas_laborables * self.calcular_Wq() * self.costo_unitario
+        return self._valor('CTte')
 
     def calcular_CTts(self):
         """Costo total de tiempo en el sistema"""
-        return self.lambda_ * self.horas_laborables * self.calcular_W() * self.costo_unitario
+        return self._valor('CTts')
 
     def calcular_CTse(self):
         """Costo total de servicio"""
-        return self.lambda_ * self.horas_laborables * (1 / self.mu) * self.costo_unitario
+        return self._valor('CTse')
 
     def calcular_CTs(self):
         """Costo total de servidores"""
-        return self.k * self.costo_diario
+        return self._valor('CTs')
 
     def calcular_CT(self):
         """Costo total del sistema"""
-        return self.calcular_CTts() + self.calcular_CTs()
+        return self._valor('CT')
     
     # --------------------- CÁLCULOS GENERALES ---------------------
-    def calculate(self, n=None):
+    def _medir(self, nombre, segundos):
+        """Informa al medidor la duración de un nodo de la evaluación"""
+        self.medidor(nombre_calculo(nombre), segundos)
+
+    def calculate(self, n=None, fields=None):
         """
         Calcula todas las medidas de desempeño relevantes según el modelo seleccionado.
         
         Args:
             n (int, optional): Número de clientes para calcular Pn.
+            fields (list, optional): Medidas a calcular (por ejemplo ['Wq', 'P0']);
+                por defecto todas las del modelo.
             
         Returns:
             dict: Diccionario con todos los resultados calculados.
         """
-        results = {}
-        
+        evaluacion = self._estado()
         try:
-            # Cálculos básicos comunes a todos los modelos
-            results['ro'] = self.calcular_ro()
-            results['P0'] = self.calcular_P0()
-            
-            # Cálculos específicos según el modelo
-            if n is not None:
-                results[f'P{n}'] = self.calcular_Pn(n)
-            
-            if self.op == 1:  # PICS
-                # Verificar estabilidad para M/M/1
-                if not self.es_estable():
-                    raise ValueError("El sistema no es estable")
-                    
-                results['L'] = self.calcular_L()
-                results['Lq'] = self.calcular_Lq()
-                results['Ln'] = self.calcular_Ln()
-                results['W'] = self.calcular_W()
-                results['Wq'] = self.calcular_Wq()
-                results['Wn'] = self.calcular_Wn()
-                
-            elif self.op == 2:  # PICM
-                results['Pk'] = self.calcular_Pk()
-                results['L'] = self.calcular_L()
-                results['Lq'] = self.calcular_Lq()
-                results['Ln'] = self.calcular_Ln()
-                results['W'] = self.calcular_W()
-                results['Wq'] = self.calcular_Wq()
-                results['Wn'] = self.calcular_Wn()
-                
-            elif self.op == 3:  # PFCS
-                results['PE'] = self.calcular_PE()
-                results['L'] = self.calcular_L()
-                results['Lq'] = self.calcular_Lq()
-                results['Ln'] = self.calcular_Ln()
-                results['W'] = self.calcular_W()
-                results['Wq'] = self.calcular_Wq()
-                results['Wn'] = self.calcular_Wn()
-                
-            elif self.op == 4:  # PFCM
-                results['PE'] = self.calcular_PE()
-                results['PNE'] = self.calcular_PNE()
-                results['L'] = self.calcular_L()
-                results['Lq'] = self.calcular_Lq()
-                results['Ln'] = self.calcular_Ln()
-                results['W'] = self.calcular_W()
-                results['Wq'] = self.calcular_Wq()
-                results['Wn'] = self.calcular_Wn()
-            
-            return results
-        
+            if evaluacion is None:
+                raise ValueError(f"Modelo no válido: {self.op}")
+            # La evaluación vale para cualquier n; Pn se calcula aparte
+            evaluacion.n = n
+            evaluacion.pop('Pn', None)
+            if fields is None:
+                fields = campos_por_defecto(self.op, n)
+            # Solo se miden los nodos que aún no estaban calculados
+            evaluacion.medidor = self._medir if self.medidor is not None else None
+            try:
+                resultados = evaluacion.resultados(fields)
+            finally:
+                evaluacion.medidor = None
         except Exception as e:
             raise ValueError(f"Error en los cálculos: {str(e)}")
-        
-        
\ No newline at end of file
+        return resultados.como_dict()
@@ -0,0 +1,88 @@
+"""
+Casos mal condicionados en punto flotante (cerca de la saturación en PICS y
+PICM, M - L → 0 en PFCS y PFCM), que se calculan en precisión arbitraria y
+se comparan con aritmética racional exacta.
+"""
+from fractions import Fraction
+
+import pytest
+
+import alta_precision
+from modelos import Parametros, evaluar
+
+
+def _infinita_exacta(lambda_, mu, k):
+    """P0, P(espera), L, Lq y Wq de M/M/k como racionales exactos"""
+    lambda_, mu = Fraction(lambda_), Fraction(mu)
+    a = lambda_ / mu
+    terminos = [Fraction(1)]
+    for n in range(1, k + 1):
+        terminos.append(terminos[-1] * a / n)
+    ultimo = terminos[-1] * k * mu / (k * mu - lambda_)
+    P0 = 1 / (sum(terminos[:-1]) + ultimo)
+    C = ultimo * P0
+    Wq = C / (k * mu - lambda_)
+    return {'P0': P0, 'C': C, 'L': lambda_ * Wq + a, 'Lq': lambda_ * Wq, 'Wq': Wq}
+
+
+def _finita_exacta(lambda_, mu, k, M):
+    """P0, PE, PNE, L, Lq y Wq de M/M/k/M/M como racionales exactos"""
+    lambda_, mu = Fraction(lambda_), Fraction(mu)
+    pesos = [Fraction(1)]
+    for n in range(M):
+        pesos.append(pesos[-1] * (M - n) * lambda_ / (min(n + 1, k) * mu))
+    total = sum(pesos)
+    P = [w / total for w in pesos]
+    L = sum(n * Pn for n, Pn in enumerate(P))
+    Lq = sum((n - k) * Pn for n, Pn in enumerate(P) if n > k)
+    return {'P0': P[0], 'PE': sum(P[k:]), 'PNE': sum(P[:k]), 'L': L, 'Lq': Lq,
+            'Wq': Lq / ((M - L) * lambda_)}
+
+
+def _comparar(resultados, exactas, claves, rel=1e-12):
+    for clave, campo in claves.items():
+        assert getattr(resultados, campo) == pytest.approx(float(exactas[clave]), rel=rel, abs=0), campo
+
+
+@pytest.mark.parametrize('holgura, k', [(1e-10, 1), (1e-10, 5), (1e-12, 20), (3e-8, 3)])
+def test_cerca_de_saturacion(holgura, k):
+    # ρ = 1 - holgura: en float, kμ - λ y 1 - ρ pierden la mayoría de los dígitos
+    mu = 1.0
+    lambda_ = k * mu * (1 - holgura)
+    op = 1 if k == 1 else 2
+    resultados = evaluar(Parametros(op, lambda_, mu, k, 0, 0, 0))
+    assert resultados.metodo == 'alta_precision'
+    exactas = _infinita_exacta(lambda_, mu, k)
+    claves = {'P0': 'P0', 'L': 'L', 'Lq': 'Lq', 'Wq': 'Wq'}
+    if op == 2:
+        claves['C'] = 'Pk'
+    _comparar(resultados, exactas, claves)
+
+
+@pytest.mark.parametrize('lambda_, mu, k, M', [
+    # M - L ≈ k μ / λ: en float se pierden los dígitos de M - L
+    (1e7, 1.0, 1, 50),
+    (1e6, 0.5, 4, 300),
+    (1e5, 1.0, 2, 150),  # pesos mayores que 10^REESCALA: se reescalan
+])
+def test_poblacion_casi_toda_en_cola(lambda_, mu, k, M):
+    resultados = evaluar(Parametros(3 if k == 1 else 4, lambda_, mu, k, M, 0, 0))
+    assert resultados.metodo == 'alta_precision'
+    exactas = _finita_exacta(lambda_, mu, k, M)
+    claves = {'P0': 'P0', 'L': 'L', 'Lq': 'Lq', 'Wq': 'Wq'}
+    if k > 1:
+        claves.update({'PE': 'PE', 'PNE': 'PNE'})
+    _comparar(resultados, exactas, claves)
+
+
+def test_sin_alta_precision_se_conserva_float(monkeypatch):
+    monkeypatch.setattr(alta_precision, 'ESTADOS_MAXIMOS', 10)
+    resultados = evaluar(Parametros(2, 20 * (1 - 1e-10), 1.0, 20, 0, 0, 0))
+    assert resultados.metodo == 'float_mal_condicionado'
+
+
+def test_saturacion_exacta_es_inestable():
+    # λ = kμ exactamente: el sistema no es estable aunque el float lo redondee
+    with pytest.raises(ValueError, match="estable"):
+        evaluar(Parametros(2, 3.0, 1.0, 3, 0, 0, 0))
+    assert not alta_precision.estable(Parametros(1, 0.1 + 0.2, 0.30000000000000004, 1, 0, 0, 0))
@@ -0,0 +1,53 @@
+"""
+Claves del caché de resultados: entradas distintas nunca comparten un
+resultado guardado, aunque difieran solo en las últimas cifras.
+"""
+import pytest
+
+from app import app, results_cache
+from cache_resultados import CacheResultados, normalizar_valor
+
+
+@pytest.fixture
+def cliente():
+    results_cache.limpiar()
+    yield app.test_client()
+    results_cache.limpiar()
+
+
+def test_normalizar_valor_exacto():
+    assert normalizar_valor(0.99999999999) != normalizar_valor(0.999999999991)
+    assert normalizar_valor(0.1) == normalizar_valor('0.1')
+    assert normalizar_valor(2) == normalizar_valor(2.0) == normalizar_valor('2')
+    assert normalizar_valor(None) is normalizar_valor('') is None
+
+
+def test_cerca_de_saturacion_no_comparten_resultado(cliente):
+    resultados = {}
+    for lambda_ in [0.99999999999, 0.999999999991]:
+        respuesta = cliente.post('/calculate', json={'model': 'PICS', 'lambda': lambda_, 'mu': 1}).get_json()
+        resultados[lambda_] = respuesta['results']['L']
+        # L = ρ / (1 - ρ); 1 - ρ es exacto en float para ρ cerca de 1
+        assert resultados[lambda_] == pytest.approx(lambda_ / (1 - lambda_), rel=1e-6)
+    # Difieren en torno a un 10 %
+    assert resultados[0.999999999991] / resultados[0.99999999999] == pytest.approx(10 / 9, rel=1e-4)
+
+
+def test_misma_entrada_usa_el_cache(cliente):
+    cuerpo = {'model': 'PICM', 'lambda': 2.5, 'mu': 1, 'k': 3}
+    primera = cliente.post('/calculate', json=cuerpo).get_json()
+    aciertos = results_cache.aciertos
+    segunda = cliente.post('/calculate', json=dict(cuerpo, k='3')).get_json()
+    assert results_cache.aciertos == aciertos + 1
+    assert segunda['results'] == primera['results']
+
+
+def test_cache_lru_y_expiracion():
+    cache = CacheResultados(max_entradas=2, ttl=None)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obtener('a')
+    cache.guardar('c', 3)
+    assert cache.obtener('b') is None
+    assert cache.obtener('a') == 1 and cache.obtener('c') == 3
+    assert cache.expulsiones == 1
@@ -0,0 +1,56 @@
+"""
+Búsqueda del número de servidores para PICM y PFCM.
+"""
+import time
+
+import pytest
+
+from optimizacion import _medidas_picm, erlang_b_sucesivos, optimizar_servidores
+
+
+def _erlang_b_recurrencia(k, a):
+    """B(k, a) recorriendo la recurrencia desde k = 0"""
+    B = 1.0
+    for i in range(1, k + 1):
+        B = a * B / (i + a * B)
+    return B
+
+
+@pytest.mark.parametrize('a, k_inicial', [(0.5, 1), (7.3, 8), (250.0, 251), (4000.5, 4100)])
+def test_erlang_b_sucesivos_coincide_con_la_recurrencia(a, k_inicial):
+    sucesivos = erlang_b_sucesivos(a, k_inicial)
+    for _ in range(20):
+        k, B = next(sucesivos)
+        assert B == pytest.approx(_erlang_b_recurrencia(k, a), rel=1e-11)
+
+
+def test_carga_grande_no_recorre_desde_cero():
+    inicio = time.perf_counter()
+    resultado = optimizar_servidores(1e8, 1, op=2, Wq_max=1e-3, k_max=2 * 10 ** 8)
+    assert time.perf_counter() - inicio < 2
+    assert resultado['k'] > 1e8
+    assert resultado['Wq'] <= 1e-3
+
+
+def test_inestable_hasta_k_max():
+    with pytest.raises(ValueError, match="estable"):
+        optimizar_servidores(1e8, 1, op=2, costo_unitario=1, costo_diario=1)
+
+
+def test_metas_inalcanzables():
+    with pytest.raises(ValueError, match="cumple las metas"):
+        optimizar_servidores(2, 1, op=2, Wq_max=1e-9, k_max=3)
+
+
+def test_costo_minimo_picm():
+    resultado = optimizar_servidores(20, 1, op=2, costo_unitario=10, costo_diario=8)
+
+    def costo(k):
+        W = _medidas_picm(20, 1, k, _erlang_b_recurrencia(k, 20.0))['W']
+        return 20 * 8 * W * 10 + k * 8
+
+    k = resultado['k']
+    assert resultado['CT'] == pytest.approx(costo(k), rel=1e-12)
+    assert costo(k) <= costo(k + 1)
+    if k - 1 > 20:
+        assert costo(k) <= costo(k - 1)
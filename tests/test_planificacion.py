@@ -0,0 +1,74 @@
+"""
+Plan de servidores por intervalos y la evaluación directa de Erlang B en la
+que se apoya, comparados con aritmética racional exacta.
+"""
+from fractions import Fraction
+
+import pytest
+
+from optimizacion import erlang_b, erlang_c
+from planificacion import planificar_personal
+
+
+def _erlang_b_exacta(k, a):
+    """B(k, a) como racional exacto"""
+    a = Fraction(a)
+    terminos = [Fraction(1)]
+    for i in range(1, k + 1):
+        terminos.append(terminos[-1] * a / i)
+    return terminos[-1] / sum(terminos)
+
+
+def _Wq_exacta(lambda_, mu, k):
+    a = Fraction(lambda_) / Fraction(mu)
+    B = _erlang_b_exacta(k, a)
+    C = k * B / (k - a * (1 - B))
+    return C / (k * Fraction(mu) - Fraction(lambda_))
+
+
+@pytest.mark.parametrize('k, a', [
+    (0, 3.0), (1, 0.5), (5, 3.0), (3, 5.0), (50, 40.0),
+    (120, 100.0), (30, 29.5), (2000, 1900.25), (60, 2.0),
+])
+def test_erlang_b_coincide_con_racionales(k, a):
+    assert erlang_b(k, a) == pytest.approx(float(_erlang_b_exacta(k, a)), rel=1e-12, abs=0)
+
+
+def test_erlang_b_despreciable_no_desborda():
+    # a^k / k! desborda en float, pero B es simplemente 0
+    assert erlang_b(400, 2.0) == 0.0
+    assert erlang_b(10 ** 5, 10 ** 4) == 0.0
+
+
+def test_intervalo_posterior_a_uno_cargado():
+    # Tras el intervalo de λ = 400, B(k, 2) subdesborda; el último intervalo
+    # no debe heredar ese estado y quedarse sin personal
+    plan = planificar_personal([2, 400, 2], mu=1, Wq_max=0.01)
+    assert plan['k'][0] == plan['k'][2] == 6
+    ultimo = plan['intervalos'][2]
+    assert ultimo['Wq'] == pytest.approx(float(_Wq_exacta(2, 1, 6)), rel=1e-9)
+    assert ultimo['Wq'] <= 0.01 < float(_Wq_exacta(2, 1, 5))
+
+
+def test_intervalo_posterior_a_uno_cargado_por_costo():
+    aislado = planificar_personal([2], mu=1, costo_unitario=10, costo_diario=8)
+    plan = planificar_personal([2, 400, 2], mu=1, costo_unitario=10, costo_diario=8)
+    assert plan['k'][0] == plan['k'][2] == aislado['k'][0]
+    assert plan['intervalos'][2]['CT'] == pytest.approx(aislado['intervalos'][0]['CT'], rel=1e-9)
+
+
+def test_menor_k_que_cumple_la_meta():
+    tasas = [0.5, 3.0, 12.0, 7.5, 40.0, 1.0]
+    plan = planificar_personal(tasas, mu=1, Wq_max=0.05)
+    for lambda_, k in zip(tasas, plan['k']):
+        assert _Wq_exacta(lambda_, 1, k) <= Fraction(0.05)
+        if k - 1 > lambda_:
+            assert _Wq_exacta(lambda_, 1, k - 1) > Fraction(0.05)
+
+
+def test_probabilidad_de_espera_coincide_con_erlang_c():
+    plan = planificar_personal([25.0], mu=1, P_espera_max=0.2)
+    k = plan['k'][0]
+    B = erlang_b(k, 25.0)
+    assert plan['intervalos'][0]['P_espera'] == pytest.approx(erlang_c(k, 25.0, B), rel=1e-12)
+    assert plan['intervalos'][0]['P_espera'] <= 0.2
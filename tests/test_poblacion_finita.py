@@ -0,0 +1,154 @@
+"""
+Modelos de población finita (PFCS, PFCM) calculados en escala logarítmica,
+comparados con las fórmulas factoriales originales donde todavía se pueden
+evaluar y con aritmética racional exacta para poblaciones más grandes.
+"""
+import math
+from fractions import Fraction
+
+import pytest
+
+from lotes import calcular_lote
+from modelos import distribucion_poblacion_finita
+from teoria_de_colas import QueueTheoryCalculator
+
+
+# --------------------- FÓRMULAS DE REFERENCIA ---------------------
+
+def _P0_factorial(lambda_, mu, k, M):
+    """P0 con las fórmulas factoriales de la versión original"""
+    a = lambda_ / mu
+    if k == 1:
+        return 1 / sum(math.factorial(M) / math.factorial(M - n) * a ** n for n in range(M + 1))
+    suma1 = sum(math.factorial(M) / (math.factorial(M - n) * math.factorial(n)) * a ** n
+                for n in range(k))
+    suma2 = sum(math.factorial(M) / (math.factorial(M - n) * math.factorial(k) * k ** (n - k)) * a ** n
+                for n in range(k, M + 1))
+    return 1 / (suma1 + suma2)
+
+
+def _Pn_factorial(lambda_, mu, k, M, n):
+    """Pn con las fórmulas factoriales de la versión original"""
+    a = lambda_ / mu
+    P0 = _P0_factorial(lambda_, mu, k, M)
+    if k == 1:
+        return math.factorial(M) / math.factorial(M - n) * a ** n * P0
+    if n <= k:
+        return P0 * math.factorial(M) / (math.factorial(M - n) * math.factorial(n)) * a ** n
+    return P0 * math.factorial(M) / (math.factorial(M - n) * math.factorial(k) * k ** (n - k)) * a ** n
+
+
+def _distribucion_exacta(lambda_, mu, k, M):
+    """P0..PM como racionales exactos"""
+    lambda_, mu = Fraction(lambda_), Fraction(mu)
+    pesos = [Fraction(1)]
+    for n in range(M):
+        pesos.append(pesos[-1] * (M - n) * lambda_ / (min(n + 1, k) * mu))
+    total = sum(pesos)
+    return [w / total for w in pesos]
+
+
+def _medidas_exactas(lambda_, mu, k, M):
+    """P0, L, Lq, PE y Wq exactos"""
+    P = _distribucion_exacta(lambda_, mu, k, M)
+    L = sum(n * Pn for n, Pn in enumerate(P))
+    Lq = sum((n - k) * Pn for n, Pn in enumerate(P) if n > k)
+    return {
+        'P0': P[0],
+        'L': L,
+        'Lq': Lq,
+        'PE': sum(P[k:]),
+        'Wq': Lq / ((M - L) * Fraction(lambda_)),
+    }
+
+
+def _calculadora(lambda_, mu, k, M):
+    calculadora = QueueTheoryCalculator()
+    calculadora.set_parameters(lambda_, mu, k=k, M=M, op=3 if k == 1 else 4)
+    return calculadora
+
+
+# --------------------- CASOS PEQUEÑOS: FÓRMULAS FACTORIALES ---------------------
+
+CASOS_PEQUENOS = [
+    (0.1, 0.5, 1, 5),
+    (0.05, 1.0, 1, 40),
+    (0.3, 2.0, 1, 20),
+    (0.1, 0.5, 2, 10),
+    (0.2, 1.5, 3, 30),
+    (0.01, 0.25, 4, 60),
+    (1.0, 0.5, 2, 12),
+]
+
+
+@pytest.mark.parametrize('lambda_, mu, k, M', CASOS_PEQUENOS)
+def test_distribucion_coincide_con_factoriales(lambda_, mu, k, M):
+    P = distribucion_poblacion_finita(lambda_, mu, k, M)
+    assert len(P) == M + 1
+    for n, Pn in enumerate(P):
+        assert Pn == pytest.approx(_Pn_factorial(lambda_, mu, k, M, n), rel=1e-12, abs=1e-300)
+
+
+@pytest.mark.parametrize('lambda_, mu, k, M', CASOS_PEQUENOS)
+def test_modelo_coincide_con_factoriales(lambda_, mu, k, M):
+    calculadora = _calculadora(lambda_, mu, k, M)
+    assert calculadora.calcular_P0() == pytest.approx(_P0_factorial(lambda_, mu, k, M), rel=1e-12)
+    for n in [0, 1, k, M // 2, M]:
+        assert calculadora.calcular_Pn(n) == pytest.approx(_Pn_factorial(lambda_, mu, k, M, n), rel=1e-12, abs=1e-300)
+
+
+def test_factoriales_desbordan_para_poblaciones_grandes():
+    # El motivo del cálculo en escala logarítmica
+    with pytest.raises(OverflowError):
+        _P0_factorial(0.1, 0.5, 1, 400)
+    P = distribucion_poblacion_finita(0.1, 0.5, 1, 400)
+    assert all(math.isfinite(Pn) for Pn in P)
+    assert math.fsum(P) == pytest.approx(1.0, rel=1e-12)
+
+
+# --------------------- POBLACIONES GRANDES: ARITMÉTICA EXACTA ---------------------
+
+CASOS_GRANDES = [
+    (0.25, 2.0, 1, 300),
+    (0.125, 4.0, 1, 1000),
+    (0.5, 1.0, 8, 300),
+    (0.0625, 0.5, 20, 600),
+    (0.25, 0.25, 3, 500),
+]
+
+
+@pytest.mark.parametrize('lambda_, mu, k, M', CASOS_GRANDES)
+def test_distribucion_coincide_con_racionales(lambda_, mu, k, M):
+    exacta = _distribucion_exacta(lambda_, mu, k, M)
+    P = distribucion_poblacion_finita(lambda_, mu, k, M)
+    maximo = float(max(exacta))
+    for Pn, referencia in zip(P, exacta):
+        # Error relativo en los estados con probabilidad apreciable y absoluto en el resto
+        assert Pn == pytest.approx(float(referencia), rel=1e-11, abs=1e-13 * maximo)
+
+
+@pytest.mark.parametrize('lambda_, mu, k, M', CASOS_GRANDES)
+def test_medidas_coinciden_con_racionales(lambda_, mu, k, M):
+    exactas = _medidas_exactas(lambda_, mu, k, M)
+    calculadora = _calculadora(lambda_, mu, k, M)
+    obtenidas = {
+        'P0': calculadora.calcular_P0(),
+        'L': calculadora.calcular_L(),
+        'Lq': calculadora.calcular_Lq(),
+        'PE': calculadora.calcular_PE(),
+        'Wq': calculadora.calcular_Wq(),
+    }
+    for clave, referencia in exactas.items():
+        assert obtenidas[clave] == pytest.approx(float(referencia), rel=1e-10, abs=1e-300), clave
+
+
+# --------------------- LOTES VECTORIZADOS ---------------------
+
+@pytest.mark.parametrize('lambda_, mu, k, M', [(5.0, 1.0, 2, 30), (0.5, 0.25, 3, 200), (0.1, 0.5, 2, 10)])
+def test_lote_PNE_sin_cancelacion(lambda_, mu, k, M):
+    # Con PE ≈ 1, PNE = 1 - PE perdería todos los dígitos
+    exacta = _distribucion_exacta(lambda_, mu, k, M)
+    PNE = float(sum(exacta[:k]))
+    resultados = calcular_lote(4, [lambda_], [mu], [k], [M])
+    assert resultados['PNE'][0] == pytest.approx(PNE, rel=1e-10, abs=0)
+    assert resultados['PNE'][0] == pytest.approx(_calculadora(lambda_, mu, k, M).calcular_PNE(), rel=1e-10, abs=0)
@@ -0,0 +1,42 @@
+"""
+Ecuaciones de tráfico de las redes de Jackson abiertas.
+"""
+import pytest
+
+import redes
+from redes import MENSAJE_CERRADA, resolver_red
+
+
+def _ciclo(n, p):
+    return [[i, (i + 1) % n, p] for i in range(n)]
+
+
+def test_ciclo_grande_con_realimentacion_alta():
+    # Red abierta que la iteración de punto fijo no resuelve en ITERACIONES_MAXIMAS pasos
+    n, p = 3000, 0.9999
+    resultado = resolver_red([1.0] + [0.0] * (n - 1), mu=20000, enrutamiento=_ciclo(n, p))
+    assert resultado['nodos']['lambda'][0] == pytest.approx(1 / (1 - p ** n), rel=1e-9)
+
+
+def test_dos_nodos():
+    resultado = resolver_red([1.0, 0.5], mu=[3, 3], enrutamiento=[[0, 1, 0.5], [1, 0, 0.2]])
+    # λ0 = 1 + 0.2 λ1, λ1 = 0.5 + 0.5 λ0
+    assert resultado['nodos']['lambda'] == pytest.approx([11 / 9, 10 / 9], rel=1e-12)
+
+
+@pytest.mark.parametrize('gamma, enrutamiento', [
+    ([1.0, 0.0, 0.0], _ciclo(3, 1.0)),
+    ([1.0, 0.0, 0.0], [[0, 1, 0.5], [1, 2, 1.0], [2, 1, 1.0]]),
+])
+def test_red_cerrada(gamma, enrutamiento):
+    with pytest.raises(ValueError, match=MENSAJE_CERRADA):
+        resolver_red(gamma, mu=5, enrutamiento=enrutamiento)
+
+
+def test_sin_convergencia_se_distingue_de_red_cerrada(monkeypatch):
+    # Sin scipy, una red abierta que no converge no se informa como cerrada
+    monkeypatch.setattr(redes, 'sparse', None)
+    monkeypatch.setattr(redes, 'NODOS_DENSOS', 10)
+    monkeypatch.setattr(redes, 'ITERACIONES_MAXIMAS', 100)
+    with pytest.raises(ValueError, match="no convergieron"):
+        resolver_red([1.0] + [0.0] * 49, mu=1000, enrutamiento=_ciclo(50, 0.9999))
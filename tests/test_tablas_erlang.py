@@ -0,0 +1,63 @@
+"""
+Medidas de PICM interpoladas en las tablas de Erlang: el error respecto del
+valor exacto (aritmética racional) queda dentro de las cotas informadas.
+"""
+from fractions import Fraction
+
+import pytest
+
+import tablas_erlang
+from modelos import Parametros, evaluar
+
+
+@pytest.fixture(scope='module')
+def directorio_tablas(tmp_path_factory):
+    directorio = tmp_path_factory.mktemp('tablas')
+    tablas_erlang.construir_tablas(str(directorio), k_max=12, puntos=2048)
+    return str(directorio)
+
+
+@pytest.fixture
+def tablas(directorio_tablas, monkeypatch):
+    monkeypatch.setattr(tablas_erlang, '_tablas', None)
+    assert tablas_erlang.cargar_tablas(directorio_tablas)
+    yield
+
+
+def _medidas_exactas(lambda_, mu, k):
+    """P0, Pk (Erlang C), L, Lq, W y Wq de M/M/k como racionales exactos"""
+    lambda_, mu = Fraction(lambda_), Fraction(mu)
+    a = lambda_ / mu
+    terminos = [Fraction(1)]
+    for n in range(1, k + 1):
+        terminos.append(terminos[-1] * a / n)
+    ultimo = terminos[-1] * k / (k - a)
+    P0 = 1 / (sum(terminos[:-1]) + ultimo)
+    C = ultimo * P0
+    Wq = C / (k * mu - lambda_)
+    return {'P0': P0, 'Pk': C, 'Lq': lambda_ * Wq, 'L': lambda_ * Wq + a, 'Wq': Wq, 'W': Wq + 1 / mu}
+
+
+@pytest.mark.parametrize('lambda_, mu, k', [
+    (0.3, 1.0, 1),
+    (0.7, 2.0, 1),
+    (0.3, 1.0, 5),
+    (3.1, 1.25, 4),
+    (7.77, 1.0, 10),
+    (0.05, 0.5, 12),
+    (9.0, 1.0, 12),
+])
+def test_error_dentro_de_las_cotas(tablas, lambda_, mu, k):
+    resultados = evaluar(Parametros(2, lambda_, mu, k, 0, 0, 0))
+    assert resultados.metodo == 'tabla'
+    exactas = _medidas_exactas(lambda_, mu, k)
+    for clave, cota in resultados.cotas.items():
+        error = abs(Fraction(getattr(resultados, clave)) - exactas[clave])
+        assert error <= Fraction(cota), clave
+        assert cota <= 1e-6 * max(1.0, abs(float(exactas[clave]))), clave
+
+
+def test_fuera_de_la_rejilla_se_calcula_directamente(tablas):
+    resultados = evaluar(Parametros(2, 40.0, 1.0, 50, 0, 0, 0))
+    assert resultados.metodo == 'float'
+    assert resultados.cotas is None
@@ -0,0 +1,51 @@
+"""
+Análisis transitorio por uniformización: a horizonte largo las medidas y los
+costos de la jornada se acercan a los del estado estable.
+"""
+import pytest
+
+from teoria_de_colas import QueueTheoryCalculator
+from transitorio import transitorio
+
+# (op, λ, μ, k, M, K)
+MODELOS = [
+    (1, 0.6, 1.0, 1, 0, 0),
+    (2, 2.5, 1.0, 3, 0, 0),
+    (3, 0.1, 1.0, 1, 10, 0),
+    (4, 0.1, 1.0, 3, 20, 0),
+    (5, 0.9, 1.0, 1, 0, 6),
+    (6, 2.0, 1.0, 2, 0, 5),
+]
+
+
+def _estable(op, lambda_, mu, k, M, K, horas):
+    calculadora = QueueTheoryCalculator()
+    calculadora.set_parameters(lambda_, mu, k=k, M=M, op=op, K=K)
+    calculadora.set_cost_parameters(2.0, 0, horas)
+    return calculadora
+
+
+@pytest.mark.parametrize('op, lambda_, mu, k, M, K', MODELOS)
+def test_converge_al_estado_estable(op, lambda_, mu, k, M, K):
+    resultado = transitorio(op, lambda_, mu, k=k, M=M, K=K, horas=1000, puntos=11)
+    estable = _estable(op, lambda_, mu, k, M, K, 1000)
+    assert resultado['L'][-1] == pytest.approx(estable.calcular_L(), rel=1e-6)
+    assert resultado['Lq'][-1] == pytest.approx(estable.calcular_Lq(), rel=1e-6, abs=1e-12)
+
+
+@pytest.mark.parametrize('op, lambda_, mu, k, M, K', MODELOS)
+def test_costos_de_horizonte_largo_coinciden_con_estado_estable(op, lambda_, mu, k, M, K):
+    horas = 2000
+    resultado = transitorio(op, lambda_, mu, k=k, M=M, K=K, horas=horas, puntos=3,
+                            costo_unitario=2.0, costo_diario=0)
+    estable = _estable(op, lambda_, mu, k, M, K, horas)
+    # Solo difieren en el arranque con el sistema vacío, que pesa O(1 / horas)
+    assert resultado['CTts'] == pytest.approx(estable.calcular_CTts(), rel=1e-2)
+    assert resultado['CTte'] == pytest.approx(estable.calcular_CTte(), rel=2e-2, abs=1e-9)
+
+
+def test_parte_del_estado_inicial():
+    resultado = transitorio(2, 2.5, 1.0, k=3, horas=1, puntos=5, n0=4)
+    assert resultado['L'][0] == 4
+    assert resultado['Lq'][0] == 1
+    assert resultado['P0'][0] == 0
@@ -0,0 +1,315 @@
+import math
+
+import numpy as np
+
+from modelos import Parametros, log_factoriales, servidores
+from nacimiento_muerte import resolver
+
+# Error máximo por truncamiento de la serie de Poisson en cada paso de la rejilla
+TOLERANCIA = 1e-10
+# Probabilidad por debajo de la cual se recortan los extremos de la ventana de estados
+TOLERANCIA_VENTANA = 1e-16
+# Iteraciones entre recortes de la ventana de estados
+RECORTE_CADA = 32
+# Número máximo de estados de la cadena truncada
+N_MAXIMO = 1000000
+
+
+def _pesos_poisson(x, tolerancia):
+    """
+    Pesos P(Poisson(x) = j) y colas P(Poisson(x) > j) para j = 0..J, con J el
+    menor valor cuya cola es menor que 'tolerancia'.
+    """
+    if x <= 0:
+        return np.ones(1), np.zeros(1)
+    J = int(x + 10 * math.sqrt(x) + 40)
+    j = np.arange(J + 1)
+    pesos = np.exp(-x + j * math.log(x) - log_factoriales(J))
+    colas = np.concatenate((np.cumsum(pesos[::-1])[::-1][1:], [0.0]))
+    ultimo = int(np.argmax(colas < tolerancia))
+    return pesos[:ultimo + 1], colas[:ultimo + 1]
+
+
+def tasas_truncadas(p, horas, n0=0, tolerancia=TOLERANCIA):
+    """
+    Tasas de nacimiento y muerte (por estado 0..N) de la cadena del modelo.
+
+    En los modelos de población o capacidad finita N es M o K. En los de
+    población infinita N es n0 más el cuantil 1 - tolerancia de las llegadas
+    en el horizonte (Poisson(λ·horas)): el número de clientes no puede
+    superar los que había más los que llegaron, por lo que la truncación vale
+    también para sistemas inestables.
+    """
+    k = servidores(p)
+    if p.op in [1, 2]:
+        pesos, _ = _pesos_poisson(p.lambda_ * horas, tolerancia)
+        N = n0 + len(pesos)
+    elif p.op in [3, 4]:
+        N = p.M
+    elif p.op in [5, 6]:
+        if p.K < k:
+            raise ValueError("La capacidad K debe ser mayor o igual que el número de servidores")
+        N = p.K
+    else:
+        raise ValueError("El análisis transitorio solo está disponible para los modelos de nacimiento y muerte")
+    if N > N_MAXIMO:
+        raise ValueError(f"La cadena truncada tendría más de {N_MAXIMO} estados")
+    if not 0 <= n0 <= N:
+        raise ValueError(f"El estado inicial debe estar entre 0 y {N}")
+
+    n = np.arange(N + 1)
+    if p.op in [3, 4]:
+        nacimientos = (p.M - n) * float(p.lambda_)
+    else:
+        nacimientos = np.full(N + 1, float(p.lambda_))
+    nacimientos[N] = 0.0
+    muertes = np.minimum(n, k) * float(p.mu)
+    return nacimientos, muertes
+
+
+class _Uniformizacion:
+    """
+    Avanza la distribución p(t) de una cadena de nacimiento y muerte con
+        p(t + Δ) = Σ_j Poisson(j; ΛΔ) · p(t) Pʲ,   P = I + Q / Λ,
+    donde Q es el generador tridiagonal. Cada producto p·P es una operación
+    vectorial O(ancho) sobre una ventana de estados que crece un estado por
+    iteración y se recorta cuando los extremos tienen probabilidad
+    despreciable.
+
+    En J iteraciones la probabilidad no sale de la ventana ampliada en J
+    estados, así que en cada paso basta con Λ >= max(λn + μn) sobre esa
+    ventana y no sobre toda la cadena. En las cadenas con tasas muy
+    distintas entre estados (por ejemplo M/M/k/M/M con M grande, donde
+    λn = (M - n) λ) esto reduce mucho las iteraciones una vez que la
+    distribución deja los estados de tasa alta.
+
+    Cuando p(t) está a distancia menor que la tolerancia de la distribución
+    estacionaria, los pasos siguientes devuelven la estacionaria sin iterar.
+    """
+
+    def __init__(self, nacimientos, muertes, n0, tolerancia):
+        self.tasas = nacimientos + muertes
+        self.tasa = float(np.max(self.tasas)) or 1.0
+        self.nacimientos = nacimientos
+        self.muertes = muertes
+        self.N = len(nacimientos) - 1
+        self.tolerancia = tolerancia
+        self.p = np.zeros(self.N + 1)
+        self.p[n0] = 1.0
+        self.inicio, self.fin = n0, n0 + 1  # Ventana [inicio, fin) con probabilidad no nula
+        self.error = 0.0
+        self.iteraciones = 0
+        self.estacionaria = False
+        self.tasa_maxima_usada = 0.0
+
+    def verificar_estacionaria(self, pi):
+        """
+        Si p(t) está a distancia (L1) menor que la tolerancia de la
+        distribución estacionaria pi, la toma como p(t) de aquí en adelante;
+        la distancia no crece con el tiempo, así que se suma una vez al error.
+        """
+        if self.estacionaria:
+            return True
+        # La masa perdida por truncamiento ya está contada en el error
+        distancia = float(np.abs(self.p / self.p.sum() - pi).sum())
+        if distancia > self.tolerancia:
+            return False
+        self.error += distancia
+        self.estacionaria = True
+        self.p = pi.copy()
+        self.inicio, self.fin = self._recortar(self.p, 0, self.N + 1)
+        return True
+
+    def _ventana(self, delta):
+        """
+        Tasa de uniformización, pesos de Poisson y ventana [A, B) del paso.
+        Se parte de la tasa máxima de la cadena y se baja al máximo sobre la
+        ventana mientras eso la reduzca; cada tasa es cota de la ventana
+        siguiente, que es más chica.
+        """
+        tasa = self.tasa
+        while True:
+            pesos, colas = _pesos_poisson(tasa * delta, self.tolerancia)
+            A = max(0, self.inicio - len(pesos))
+            B = min(self.N + 1, self.fin + len(pesos))
+            local = float(self.tasas[A:B].max()) or 1.0
+            if local > 0.9 * tasa:
+                return tasa, pesos, colas, A, B
+            tasa = local
+
+    def _recortar(self, v, a, b):
+        """
+        Índices [a2, b2) dentro de [a, b) fuera de los cuales la probabilidad
+        de v es despreciable; la probabilidad descartada se suma al error.
+        """
+        acumulado = np.cumsum(v[a:b])
+        total = acumulado[-1]
+        izquierda = int(np.searchsorted(acumulado, TOLERANCIA_VENTANA))
+        derecha = int(np.searchsorted(acumulado, total - TOLERANCIA_VENTANA)) + 1
+        izquierda = min(izquierda, derecha - 1)
+        self.error += float(acumulado[izquierda - 1]) if izquierda > 0 else 0.0
+        self.error += float(total - acumulado[derecha - 1]) if derecha < b - a else 0.0
+        return a + izquierda, a + derecha
+
+    def avanzar(self, delta):
+        """
+        Avanza la distribución 'delta' unidades de tiempo y devuelve la integral
+        ∫_0^delta p(t + s) ds con la ventana [A, B) a la que corresponde.
+        """
+        if self.estacionaria:
+            return self.p * delta, 0, self.N + 1
+
+        tasa, pesos, colas, A, B = self._ventana(delta)
+        self.tasa_maxima_usada = max(self.tasa_maxima_usada, tasa)
+        integrales = colas / tasa
+        self.error += self.tolerancia
+
+        # Ventana máxima: len(pesos) estados más hacia cada lado. Los índices
+        # a, b son relativos a A; los buffers son cero fuera de [a, b).
+        queda = 1 - self.tasas[A:B] / tasa
+        sube = self.nacimientos[A:B] / tasa
+        baja = self.muertes[A:B] / tasa
+        actual = np.zeros(B - A)
+        siguiente = np.zeros(B - A)
+        resultado = np.zeros(B - A)
+        integral = np.zeros(B - A)
+        a, b = self.inicio - A, self.fin - A
+        actual[a:b] = self.p[self.inicio:self.fin]
+
+        for j in range(len(pesos)):
+            if j > 0:
+                a, b = max(0, a - 1), min(B - A, b + 1)
+                x, y = actual[a:b], siguiente[a:b]
+                np.multiply(x, queda[a:b], out=y)
+                y[1:] += x[:-1] * sube[a:b - 1]
+                y[:-1] += x[1:] * baja[a + 1:b]
+                actual, siguiente = siguiente, actual
+                self.iteraciones += 1
+                if j % RECORTE_CADA == 0:
+                    a2, b2 = self._recortar(actual, a, b)
+                    for buffer in (actual, siguiente):
+                        buffer[a:a2] = 0.0
+                        buffer[b2:b] = 0.0
+                    a, b = a2, b2
+            x = actual[a:b]
+            if pesos[j] > 0:
+                resultado[a:b] += pesos[j] * x
+            integral[a:b] += integrales[j] * x
+
+        # La distribución conserva solo la parte con probabilidad no despreciable
+        a2, b2 = self._recortar(resultado, 0, B - A)
+        self.p[self.inicio:self.fin] = 0.0
+        self.p[A + a2:A + b2] = resultado[a2:b2]
+        self.inicio, self.fin = A + a2, A + b2
+        return integral, A, B
+
+
+def _medidas(p, a, b, k, nacimientos, mu):
+    """L, Lq, P0 y Wq (espera media de un cliente que llega) para p en la ventana [a, b)"""
+    n = np.arange(a, b)
+    L = float(p @ n)
+    Lq = float(p @ np.maximum(n - k, 0))
+    llegadas = nacimientos[a:b] * p
+    total = llegadas.sum()
+    # Un cliente que llega con n >= k clientes espera n - k + 1 servicios a tasa kμ
+    Wq = float(llegadas @ (np.maximum(n - k + 1, 0) / (k * mu)) / total) if total > 0 else 0.0
+    P0 = float(p[0]) if a == 0 else 0.0
+    return L, Lq, Wq, P0
+
+
+def transitorio(op, lambda_, mu, k=1, M=0, K=0, horas=8, puntos=97, n0=0,
+                tolerancia=TOLERANCIA, incluir_estados=False,
+                costo_unitario=None, costo_diario=None):
+    """
+    Análisis transitorio por uniformización: P(n, t), L(t), Lq(t) y Wq(t) en
+    una rejilla de tiempos de 0 a 'horas', partiendo de n0 clientes (por
+    defecto el sistema vacío al inicio de la jornada).
+
+    El costo es proporcional a las iteraciones, del orden de ∫ Λ(t) dt con
+    Λ(t) la tasa máxima cerca de los estados ocupados en t. Por ejemplo, un
+    M/M/100/10000/10000 con λ = 1 y μ = 2 durante 8 horas necesita unas
+    26000 iteraciones (0.4-0.5 s), porque la distribución deja pronto los
+    estados con λn ≈ Mλ. Si la distribución se queda en estados de tasa alta
+    (por ejemplo M grande con el sistema casi vacío), las iteraciones crecen
+    como M·λ·horas.
+
+    Args:
+        op (int): Modelo de nacimiento y muerte (1-6, ver modelos.MODELOS).
+        lambda_, mu, k, M, K: Parámetros del modelo.
+        horas (float): Horizonte (por ejemplo las horas laborables).
+        puntos (int): Número de tiempos de la rejilla, equiespaciados.
+        n0 (int): Clientes en el sistema en t = 0.
+        tolerancia (float): Error de truncamiento de la serie de Poisson por
+            paso; el error total se informa en 'error_truncamiento'.
+        incluir_estados (bool): Si se devuelve la matriz P(n, t) completa.
+        costo_unitario, costo_diario (float, optional): Si se indican, se
+            calculan los costos de la jornada con las integrales de Lq(t) y
+            L(t), en lugar de los valores en estado estable.
+
+    Returns:
+        dict: Rejilla 't' y las series 'L', 'Lq', 'Wq', 'P0'; las integrales
+            de L y Lq en [0, horas]; 'estacionaria' si se alcanzó la
+            distribución estacionaria antes del final; y, si se pidió, 'Pn'
+            (una lista por t).
+    """
+    if horas <= 0 or puntos < 2:
+        raise ValueError("Se requiere un horizonte positivo y al menos dos puntos")
+    if lambda_ < 0 or mu <= 0:
+        raise ValueError("Las tasas deben ser positivas")
+
+    p = Parametros(op, lambda_, mu, k, M or 0, K or 0)
+    c = servidores(p)
+    nacimientos, muertes = tasas_truncadas(p, horas, n0, tolerancia)
+    uniformizacion = _Uniformizacion(nacimientos, muertes, n0, tolerancia)
+    # Distribución estacionaria de la cadena truncada
+    estacionaria = resolver(nacimientos[:-1], muertes[1:]).P
+
+    tiempos = np.linspace(0, horas, puntos)
+    series = {'L': [], 'Lq': [], 'Wq': [], 'P0': []}
+    estados = []
+    integral_L = integral_Lq = 0.0
+
+    def registrar():
+        a, b = uniformizacion.inicio, uniformizacion.fin
+        for clave, valor in zip(['L', 'Lq', 'Wq', 'P0'],
+                                _medidas(uniformizacion.p[a:b], a, b, c, nacimientos, mu)):
+            series[clave].append(valor)
+        if incluir_estados:
+            estados.append(uniformizacion.p[:b].tolist())
+
+    registrar()
+    for anterior, actual in zip(tiempos[:-1], tiempos[1:]):
+        uniformizacion.verificar_estacionaria(estacionaria)
+        integral, a, b = uniformizacion.avanzar(actual - anterior)
+        n = np.arange(a, b)
+        integral_L += float(integral @ n)
+        integral_Lq += float(integral @ np.maximum(n - c, 0))
+        registrar()
+
+    resultado = {
+        't': tiempos.tolist(),
+        **series,
+        'integral_L': integral_L,
+        'integral_Lq': integral_Lq,
+        'estados': uniformizacion.N + 1,
+        'tasa_uniformizacion': uniformizacion.tasa_maxima_usada,
+        'iteraciones': uniformizacion.iteraciones,
+        'estacionaria': uniformizacion.estacionaria,
+        'error_truncamiento': uniformizacion.error,
+    }
+    if incluir_estados:
+        resultado['Pn'] = estados
+    if costo_unitario is not None or costo_diario is not None:
+        # Costo de la jornada: tiempo total de espera (o en el sistema) de los
+        # clientes. En estado estable es λ_ef · horas · W · cu = horas · L · cu
+        # (Little), la misma definición que calcular_CTts y calcular_CTte
+        cu = costo_unitario or 0
+        CTts = cu * integral_L
+        CTs = k * (costo_diario or 0)
+        resultado.update({
+            'CTte': cu * integral_Lq,
+            'CTts': CTts,
+            'CTs': CTs,
+            'CT': CTts + CTs,
+        })
+    return resultado